@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+bank_registry.py
+
+多题库登记表（banks.json）：
+- 每个导入过的 Word 题库登记一条：名称、源文件路径、题库快照（解析结果 JSON）、题量、导入时间；
+- 每个题库的快照单独保存在 config.BANK_SNAPSHOT_DIR/<bank_id>.json，
+  导入新题库不再覆盖其他题库；老版本的 questions.json 作为默认题库（bank_id = "default"）继续使用；
+- 题号只在单个题库内唯一：作答历史每条记录带 bank 字段，错题本 / 收藏夹按题库分文件
+  （profiles.get_profile(档案名, bank_id)），不同题库的同号题目不会混在一起；
+- 最近用过的几个题库的 Question 列表缓存在内存里（LRU），切换题库时直接取缓存，
+  不重新读 JSON，更不会重新解析 docx；话题（topics.py）不在导入时算，第一次取题库时按快照补上
+  （话题模型按快照缓存，重新导入后只把新题归入已有话题），每份缓存只补一次；
+  topics 模块（连带 NumPy）在第一次需要话题时才导入，不拖慢程序启动；
+- 只读题目内容的地方（导入去重、命令行工具）用 questions(bank_id, topics=False)：
+  不算话题，没缓存的题库直接读快照，也不挤掉 LRU 里正在用的题库；
+- 当前题库记在 banks.json 对应条目的 "active" 字段里，激活题库时把
+  storage.DEFAULT_JSON_PATH 指向该题库的快照，其余读写题库的代码无需改动。
+
+banks.json 仍然是一个列表，老格式（只有 name / path）可以直接读取：
+    [{"id": "default", "name": "questions.docx", "path": "...", "snapshot": "...", "count": 210,
+      "imported_at": 1700000000.0, "active": true}]
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import config
+import storage
+from models import Question
+
+BANKS_JSON_PATH = getattr(config, "BANKS_JSON_PATH", os.path.join(config.BASE_DIR, "banks.json"))
+BANK_SNAPSHOT_DIR = getattr(config, "BANK_SNAPSHOT_DIR", os.path.join(config.BASE_DIR, "data", "banks"))
+DEFAULT_BANK_ID = getattr(config, "DEFAULT_BANK_ID", "default")
+
+# 内存里最多同时保留几个题库的 Question 列表
+SNAPSHOT_CACHE_SIZE = 4
+
+
+def _bank_id_for(path: str) -> str:
+    norm = os.path.normcase(os.path.abspath(path))
+    return "b" + hashlib.sha1(norm.encode("utf-8")).hexdigest()[:10]
+
+
+def _same_path(a: str, b: str) -> bool:
+    if not a or not b:
+        return False
+    return os.path.normcase(os.path.abspath(a)) == os.path.normcase(os.path.abspath(b))
+
+
+@dataclass
+class BankEntry:
+    bank_id: str
+    name: str
+    path: str
+    snapshot: str
+    count: int = 0
+    imported_at: float = 0.0
+    active: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.bank_id,
+            "name": self.name,
+            "path": self.path,
+            "snapshot": self.snapshot,
+            "count": self.count,
+            "imported_at": self.imported_at,
+            "active": self.active,
+        }
+
+
+class BankRegistry:
+    """读写 banks.json，并缓存各题库的 Question 列表。"""
+
+    def __init__(
+        self,
+        json_path: Optional[str] = None,
+        snapshot_dir: Optional[str] = None,
+        cache_size: int = SNAPSHOT_CACHE_SIZE,
+    ):
+        self.json_path = json_path or BANKS_JSON_PATH
+        self.snapshot_dir = snapshot_dir or BANK_SNAPSHOT_DIR
+        self.cache_size = cache_size
+        self.entries: List[BankEntry] = []
+        self._cache: "OrderedDict[str, List[Question]]" = OrderedDict()
+        # 已经补过话题的缓存（按题库）；话题名可能为空串，不能靠 q.topic 判断
+        self._topics_done: set = set()
+        self.load()
+
+    # ---------- banks.json ----------
+
+    def _entry_from_dict(self, data: Dict[str, Any], taken: set) -> BankEntry:
+        path = str(data.get("path") or "")
+        name = str(data.get("name") or os.path.basename(path) or "未命名题库")
+        bank_id = data.get("id")
+        snapshot = data.get("snapshot")
+        if not bank_id:
+            # 老格式：第一条没有快照的记录就是原来的 questions.json
+            bank_id = DEFAULT_BANK_ID if DEFAULT_BANK_ID not in taken and not snapshot else _bank_id_for(path or name)
+        if not snapshot:
+            snapshot = (
+                config.DEFAULT_JSON_PATH
+                if bank_id == DEFAULT_BANK_ID
+                else os.path.join(self.snapshot_dir, f"{bank_id}.json")
+            )
+        return BankEntry(
+            bank_id=str(bank_id),
+            name=name,
+            path=path,
+            snapshot=str(snapshot),
+            count=int(data.get("count", 0) or 0),
+            imported_at=float(data.get("imported_at", 0) or 0),
+            active=bool(data.get("active", False)),
+        )
+
+    def load(self):
+        data: Any = []
+        if os.path.exists(self.json_path):
+            try:
+                with open(self.json_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception:
+                data = []
+        if not isinstance(data, list):
+            data = []
+
+        entries: List[BankEntry] = []
+        taken: set = set()
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            entry = self._entry_from_dict(item, taken)
+            if entry.bank_id in taken:
+                continue
+            taken.add(entry.bank_id)
+            entries.append(entry)
+
+        # 还没有登记、但老的 questions.json 已经存在：补一条默认题库
+        if DEFAULT_BANK_ID not in taken and os.path.exists(config.DEFAULT_JSON_PATH):
+            entries.insert(
+                0,
+                BankEntry(DEFAULT_BANK_ID, os.path.basename(config.DEFAULT_JSON_PATH), "", config.DEFAULT_JSON_PATH),
+            )
+        if entries and not any(e.active for e in entries):
+            entries[0].active = True
+        self.entries = entries
+
+    def save(self):
+        folder = os.path.dirname(self.json_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(self.json_path, "w", encoding="utf-8") as f:
+            json.dump([e.to_dict() for e in self.entries], f, ensure_ascii=False, indent=2)
+
+    # ---------- 查询 ----------
+
+    def get(self, bank_id: str) -> Optional[BankEntry]:
+        for entry in self.entries:
+            if entry.bank_id == bank_id:
+                return entry
+        return None
+
+    def bank_id_for_snapshot(self, snapshot: str) -> str:
+        """按快照路径找题库 id；没有登记的 JSON 按路径派生一个，不与默认题库共用错题本。"""
+        for entry in self.entries:
+            if _same_path(entry.snapshot, snapshot):
+                return entry.bank_id
+        if _same_path(snapshot, config.DEFAULT_JSON_PATH):
+            return DEFAULT_BANK_ID
+        return _bank_id_for(snapshot)
+
+    @property
+    def active(self) -> Optional[BankEntry]:
+        for entry in self.entries:
+            if entry.active:
+                return entry
+        return None
+
+    def questions(self, bank_id: str, topics: bool = True) -> List[Question]:
+        """
+        取某个题库的题目列表：优先用内存缓存，其次读快照 JSON；还没有话题时补上。
+        topics=False 时只读原始快照：不算话题，也不放进缓存。
+        """
+        entry = self.get(bank_id)
+        qs = self._cache.get(bank_id)
+        if qs is not None:
+            if topics:
+                self._cache.move_to_end(bank_id)
+        elif not topics:
+            return storage.load_questions_from_file(entry.snapshot) if entry else []
+        else:
+            qs = storage.load_questions_from_file(entry.snapshot) if entry else []
+            self._remember(bank_id, qs)
+        if topics and entry is not None and bank_id not in self._topics_done:
+            self._attach_topics(qs, entry.snapshot)
+            self._topics_done.add(bank_id)
+        return qs
+
+    @staticmethod
+    def _attach_topics(questions: List[Question], snapshot: str):
+        try:
+            from topics import ensure_topics
+        except ImportError:
+            # 话题聚类依赖 NumPy；没装时老快照就不补算话题
+            return
+        ensure_topics(questions, snapshot)
+
+    def _remember(self, bank_id: str, questions: List[Question]):
+        self._cache[bank_id] = questions
+        self._cache.move_to_end(bank_id)
+        self._topics_done.discard(bank_id)
+        while len(self._cache) > self.cache_size:
+            evicted, _ = self._cache.popitem(last=False)
+            self._topics_done.discard(evicted)
+
+    # ---------- 修改 ----------
+
+    def register(self, source_path: str, questions: List[Question], name: Optional[str] = None) -> BankEntry:
+        """
+        登记一个刚解析完的题库并写入它自己的快照。
+        同一个源文件再次导入时更新原来的条目，不会产生重复题库。
+        """
+        entry = next((e for e in self.entries if _same_path(e.path, source_path)), None)
+        if entry is None:
+            bank_id = _bank_id_for(source_path)
+            entry = BankEntry(
+                bank_id=bank_id,
+                name=name or os.path.basename(source_path),
+                path=source_path,
+                snapshot=os.path.join(self.snapshot_dir, f"{bank_id}.json"),
+            )
+            self.entries.append(entry)
+        entry.count = len(questions)
+        entry.imported_at = time.time()
+        storage.save_questions_to_file(questions, entry.snapshot)
+        self._remember(entry.bank_id, questions)
+        self.save()
+        return entry
+
+    def activate(self, bank_id: str) -> BankEntry:
+        entry = self.get(bank_id)
+        if entry is None:
+            raise ValueError(f"题库“{bank_id}”不存在")
+        changed = not entry.active
+        for e in self.entries:
+            e.active = e is entry
+        storage.DEFAULT_JSON_PATH = entry.snapshot
+        if changed:
+            self.save()
+        return entry
+
+    def remove(self, bank_id: str):
+        """删除题库登记和它的快照文件。"""
+        entry = self.get(bank_id)
+        if entry is None:
+            return
+        self.entries.remove(entry)
+        self._cache.pop(bank_id, None)
+        self._topics_done.discard(bank_id)
+        try:
+            if os.path.exists(entry.snapshot):
+                os.remove(entry.snapshot)
+        except OSError:
+            pass
+        if entry.active and self.entries:
+            self.entries[0].active = True
+        self.save()
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+bench_parser.py
+
+Word 题库解析器的性能基准：新的单遍分类核心 vs 原来的逐个正则尝试。
+- 用合成大题库（synthetic_bank）生成一份 .docx（写到临时目录）；
+- 分阶段计时：加载 docx、段落文本提取（paragraph.text vs iter_paragraph_texts）、
+  行分类 + 状态机（旧实现 vs tokenize_lines + assemble_questions）；
+- 两种实现的解析结果逐题比对，确保输出完全一致；
+- 每个阶段重复多次取中位数，输出毫秒和每秒处理的段落数。
+
+用法：
+    python bench_parser.py --size 20000 --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+from docx import Document
+
+from question_parser import (
+    CN_OPTION_MAP,
+    OPTION_RE,
+    QUESTION_START_RE,
+    SECTION_RE,
+    _detect_qtype_from_section,
+    assemble_questions,
+    iter_paragraph_texts,
+    tokenize_lines,
+)
+from synthetic_bank import make_synthetic_questions, synthetic_bank_lines
+
+
+def legacy_parse_lines(lines: List[str]) -> List[Dict[str, Any]]:
+    """原来 _parse_document 的循环体（逐段依次尝试四种匹配），仅用于对比。"""
+    questions_raw: List[Dict[str, Any]] = []
+    current: Dict[str, Any] | None = None
+    state: str | None = None
+    current_section_type: str | None = None
+
+    for raw in lines:
+        text = raw.strip()
+        if not text:
+            continue
+        m_sec = SECTION_RE.match(text)
+        if m_sec:
+            qtype = _detect_qtype_from_section(m_sec.group(1))
+            if qtype:
+                current_section_type = qtype
+            continue
+        m_q = QUESTION_START_RE.match(text)
+        if m_q:
+            if current is not None:
+                questions_raw.append(current)
+            body = m_q.group(2).strip()
+            current = {
+                "number": int(m_q.group(1)),
+                "q_type": current_section_type,
+                "text_lines": [],
+                "options": {},
+                "answer_lines": [],
+            }
+            if body:
+                current["text_lines"].append(body)
+            state = "question"
+            continue
+        if current is None:
+            continue
+        if text.startswith("正确答案"):
+            part = text.split("：", 1)
+            if len(part) == 1:
+                part = text.split(":", 1)
+            ans = part[1].strip() if len(part) > 1 else ""
+            if ans:
+                current["answer_lines"].append(ans)
+            state = "answer"
+            continue
+        m_opt = OPTION_RE.match(text)
+        if m_opt and state in ("question", "options"):
+            label = m_opt.group(1)
+            current["options"][CN_OPTION_MAP.get(label, label)] = m_opt.group(2).strip()
+            state = "options"
+            continue
+        if state == "answer":
+            current["answer_lines"].append(text)
+        else:
+            current["text_lines"].append(text)
+
+    if current is not None:
+        questions_raw.append(current)
+    return questions_raw
+
+
+def _median_ms(func: Callable[[], object], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(samples)
+
+
+def _write_docx(lines: List[str], path: str):
+    doc = Document()
+    for line in lines:
+        doc.add_paragraph(line)
+    doc.save(path)
+
+
+def run_benchmark(size: int, repeat: int, seed: int = 2024) -> List[str]:
+    questions = make_synthetic_questions(size, seed=seed)
+    lines = list(synthetic_bank_lines(questions))
+
+    with tempfile.TemporaryDirectory(prefix="quiz_parser_") as tmp_dir:
+        path = os.path.join(tmp_dir, "bank.docx")
+        _write_docx(lines, path)
+        file_bytes = os.path.getsize(path)
+
+        t_load = _median_ms(lambda: Document(path), repeat)
+        document = Document(path)
+
+        old_texts = [p.text for p in document.paragraphs]
+        new_texts = list(iter_paragraph_texts(document))
+        if old_texts != new_texts:
+            raise AssertionError("iter_paragraph_texts 与 paragraph.text 结果不一致")
+        if legacy_parse_lines(old_texts) != assemble_questions(tokenize_lines(new_texts)):
+            raise AssertionError("新旧解析核心的输出不一致")
+
+        t_text_old = _median_ms(lambda: [p.text for p in document.paragraphs], repeat)
+        t_text_new = _median_ms(lambda: list(iter_paragraph_texts(document)), repeat)
+        t_core_old = _median_ms(lambda: legacy_parse_lines(old_texts), repeat)
+        t_core_new = _median_ms(lambda: assemble_questions(tokenize_lines(new_texts)), repeat)
+
+    n = len(lines)
+
+    def row(name: str, ms: float, base: float = 0.0) -> str:
+        rate = n / (ms / 1000.0) if ms > 0 else 0.0
+        speedup = f"{base / ms:>8.2f}x" if base and ms else f"{'':>9}"
+        return f"{name:<28}{ms:>10.2f}{rate:>14.0f}{speedup}"
+
+    return [
+        f"题库规模：{size} 题 · 段落数：{n} · 文件大小：{file_bytes / 1024:.0f} KB · 重复次数：{repeat}",
+        "",
+        f"{'阶段':<28}{'毫秒':>10}{'段落/秒':>14}{'加速比':>9}",
+        "-" * 64,
+        row("加载 docx（Document）", t_load),
+        row("文本提取：paragraph.text", t_text_old),
+        row("文本提取：iter_paragraph_texts", t_text_new, t_text_old),
+        row("分类+状态机：旧实现", t_core_old),
+        row("分类+状态机：单遍分类", t_core_new, t_core_old),
+        row("合计：旧实现", t_text_old + t_core_old),
+        row("合计：新实现", t_text_new + t_core_new, t_text_old + t_core_old),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Word 题库解析器性能基准")
+    parser.add_argument("--size", type=int, default=20000, help="合成题库的题目数量")
+    parser.add_argument("--repeat", type=int, default=5, help="每个阶段的重复次数")
+    parser.add_argument("--seed", type=int, default=2024, help="随机种子")
+    parser.add_argument("--output", default="", help="可选：把结果额外写入该文件")
+    args = parser.parse_args()
+
+    text = "\n".join(run_benchmark(args.size, args.repeat, args.seed))
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+bench_qt.py
+
+Qt 窗口版的离屏性能基准：
+- 在 QT_QPA_PLATFORM=offscreen 下启动 QuizWindow，不需要真实显示器；
+- 使用合成大题库（synthetic_bank），脚本化执行最慢的几类交互：
+  窗口构建、样式 / 动画初始化、打开题库总览、开始一轮刷题、
+  切题（_show_current_question）、刷新答题卡、提交答案；
+- 每种交互重复多次，输出延迟分位数（p50 / p90 / p99 / max，单位毫秒）。
+
+所有读写都重定向到临时目录，不会改动真实的题库、错题本和统计文件。
+
+用法：
+    python bench_qt.py --size 1000 --repeat 50
+    python bench_qt.py --size 5000 --repeat 20 --output bench_output.txt
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+# 必须在导入 PySide6 之前设置，否则 Qt 会尝试连接真实的显示服务
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+import bank_registry  # noqa: E402
+import config  # noqa: E402
+import profiles  # noqa: E402
+import storage  # noqa: E402
+import qt_app  # noqa: E402
+from synthetic_bank import make_synthetic_questions  # noqa: E402
+
+
+def _redirect_data_files(tmp_dir: str) -> None:
+    """把题库 / 题库登记表 / 错题本 / 统计 / 收藏 / 历史 / 档案的默认路径都指向临时目录。"""
+    config.DEFAULT_JSON_PATH = os.path.join(tmp_dir, "questions.json")
+    storage.DEFAULT_JSON_PATH = config.DEFAULT_JSON_PATH
+    bank_registry.BANKS_JSON_PATH = os.path.join(tmp_dir, "banks.json")
+    bank_registry.BANK_SNAPSHOT_DIR = os.path.join(tmp_dir, "banks")
+    # 默认档案的路径取自 config，窗口启动时 profiles.activate 会据此改写 storage
+    config.WRONG_JSON_PATH = os.path.join(tmp_dir, "wrong_questions.json")
+    config.STATS_JSON_PATH = os.path.join(tmp_dir, "stats.json")
+    config.FAV_JSON_PATH = os.path.join(tmp_dir, "favorites.json")
+    config.HISTORY_JSONL_PATH = os.path.join(tmp_dir, "history.jsonl")
+    profiles.PROFILES_DIR = os.path.join(tmp_dir, "profiles")
+    profiles.PROFILES_INDEX_PATH = os.path.join(tmp_dir, "profiles", "profiles.json")
+    storage.use_profile_paths(config.WRONG_JSON_PATH, config.STATS_JSON_PATH, config.HISTORY_JSONL_PATH)
+    qt_app.FAV_JSON_PATH = config.FAV_JSON_PATH
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """最近秩法求分位数，sorted_values 需已升序。"""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[k]
+
+
+class _Recorder:
+    """按交互名称收集耗时样本（毫秒）。"""
+
+    def __init__(self, app: QApplication):
+        self.app = app
+        self.samples: Dict[str, List[float]] = {}
+
+    def measure(self, name: str, func: Callable[[], object]) -> None:
+        t0 = time.perf_counter()
+        func()
+        # 把排队的布局 / 重绘事件也算进本次交互
+        self.app.processEvents()
+        elapsed = (time.perf_counter() - t0) * 1000.0
+        self.samples.setdefault(name, []).append(elapsed)
+
+    def report_lines(self) -> List[str]:
+        lines = [
+            f"{'交互':<24}{'次数':>6}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}",
+            "-" * 70,
+        ]
+        for name, values in self.samples.items():
+            s = sorted(values)
+            lines.append(
+                f"{name:<24}{len(s):>6}"
+                f"{_percentile(s, 50):>10.2f}{_percentile(s, 90):>10.2f}"
+                f"{_percentile(s, 99):>10.2f}{s[-1]:>10.2f}"
+            )
+        return lines
+
+
+def _answer_for(q) -> str:
+    """为提交交互构造一个答案：一半答对，一半答错。"""
+    if q.q_type == config.QTYPE_SINGLE and q.options:
+        return random.choice(sorted(q.options.keys()))
+    if q.q_type == config.QTYPE_TF:
+        return random.choice(["正确", "错误"])
+    return q.answer if random.random() < 0.5 else "不知道"
+
+
+def run_benchmark(size: int, repeat: int, seed: int = 2024) -> List[str]:
+    random.seed(seed)
+    app = QApplication.instance() or QApplication(sys.argv)
+    rec = _Recorder(app)
+    questions = make_synthetic_questions(size, seed=seed)
+
+    with tempfile.TemporaryDirectory(prefix="quiz_bench_") as tmp_dir:
+        _redirect_data_files(tmp_dir)
+        storage.save_questions_to_file(questions)
+
+        windows = []
+        for _ in range(max(1, repeat // 10)):
+            rec.measure("窗口构建", lambda: windows.append(qt_app.QuizWindow()))
+        win = windows[-1]
+        for w in windows[:-1]:
+            w.deleteLater()
+        win.show()
+        app.processEvents()
+
+        for _ in range(repeat):
+            rec.measure("样式表应用", win._apply_style)
+
+        for _ in range(max(1, repeat // 10)):
+            def _open_overview():
+                dlg = qt_app.QuestionOverviewDialog(win, questions, win.favorite_ids, win.app_icon)
+                dlg.deleteLater()
+            rec.measure("打开题库总览", _open_overview)
+
+        session = list(questions)
+        rec.measure("开始刷题", lambda: win._begin_quiz(session, mode="normal"))
+
+        total = len(win.current_questions)
+        for _ in range(repeat):
+            # 跳转目标避开最后一题，否则“下一题”会直接结束本轮
+            target = random.randrange(max(1, total - 1))
+            rec.measure("切题（跳转）", lambda: win._goto_question_idx(target))
+            if win.current_index < total - 1:
+                rec.measure("下一题", win._goto_next_question)
+            rec.measure("刷新答题卡", win._refresh_answer_card)
+
+        for _ in range(repeat):
+            idx = random.randrange(total)
+            win._goto_question_idx(idx)
+            if not win.waiting_answer:
+                continue
+            q = win.current_question
+            raw = _answer_for(q)
+            if q.q_type in (config.QTYPE_SINGLE, config.QTYPE_TF):
+                win.current_option_value = raw
+            else:
+                win.short_answer_edit.setPlainText(raw)
+            rec.measure("提交答案", win._handle_submit_answer)
+
+        win.close()
+
+    header = [
+        f"题库规模：{size} 题 · 重复次数：{repeat} · 平台：{os.environ.get('QT_QPA_PLATFORM')}",
+        "",
+    ]
+    return header + rec.report_lines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QuizWindow 离屏性能基准")
+    parser.add_argument("--size", type=int, default=1000, help="合成题库的题目数量")
+    parser.add_argument("--repeat", type=int, default=50, help="每种交互的重复次数")
+    parser.add_argument("--seed", type=int, default=2024, help="随机种子")
+    parser.add_argument("--output", default="", help="可选：把结果额外写入该文件")
+    args = parser.parse_args()
+
+    lines = run_benchmark(args.size, args.repeat, args.seed)
+    text = "\n".join(lines)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
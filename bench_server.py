@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+bench_server.py
+
+刷题服务（quiz_server）的压测工具：
+- 默认在子进程里启动一个本地服务，题库使用合成大题库（synthetic_bank），
+  错题本 / 统计 / 会话检查点都写到临时目录；也可以用 --url 指向已经在运行的服务；
+- 模拟 N 名学生：每人一条 keep-alive 连接，依次执行
+  创建会话 → 逐题获取题目 → 思考若干秒 → 提交答案 → 结束会话；
+- 学生在 --ramp 秒内陆续进场，思考时间服从均值为 --think 的指数分布；
+- 输出总吞吐量（请求 / 秒）、各接口的 p50 / p95 / p99 延迟（毫秒）和错误率。
+
+用法：
+    python bench_server.py --learners 500 --questions 20 --think 2
+    python bench_server.py --url http://127.0.0.1:8765 --learners 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import config
+from synthetic_bank import make_synthetic_questions
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """最近秩法求分位数，sorted_values 需已升序。"""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[k]
+
+
+# ---------- 本地服务（子进程） ----------
+
+
+def _server_main(size: int, seed: int, ready, stop):
+    """子进程入口：合成题库 + 临时数据目录，启动服务后把端口告诉父进程。"""
+    import profiles
+    import storage
+    from quiz_server import QuizServer
+    from session_store import SessionStore
+
+    with tempfile.TemporaryDirectory(prefix="quiz_load_") as tmp_dir:
+        # 服务端按档案取错题本 / 统计路径（默认档案的路径取自 config），都指向临时目录
+        config.WRONG_JSON_PATH = os.path.join(tmp_dir, "wrong_questions.json")
+        config.STATS_JSON_PATH = os.path.join(tmp_dir, "stats.json")
+        config.HISTORY_JSONL_PATH = os.path.join(tmp_dir, "history.jsonl")
+        profiles.PROFILES_DIR = os.path.join(tmp_dir, "profiles")
+        profiles.PROFILES_INDEX_PATH = os.path.join(tmp_dir, "profiles", "profiles.json")
+        storage.use_profile_paths(config.WRONG_JSON_PATH, config.STATS_JSON_PATH, config.HISTORY_JSONL_PATH)
+        questions = make_synthetic_questions(size, seed=seed)
+
+        async def run():
+            server = QuizServer(questions, SessionStore(checkpoint_dir=os.path.join(tmp_dir, "sessions")))
+            await server.start("127.0.0.1", 0)
+            ready.put(server.port)
+            await asyncio.to_thread(stop.wait)
+            await server.close()
+
+        asyncio.run(run())
+
+
+# ---------- HTTP 客户端 ----------
+
+
+class _Connection:
+    """一名学生的 keep-alive 连接，断开后自动重连。"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Tuple[int, Any]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload = b"" if body is None else json.dumps(body, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"{method} {path} HTTP/1.1\r\n"
+            f"Host: {self.host}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n\r\n"
+        )
+        self.writer.write(head.encode("latin-1") + payload)
+        await self.writer.drain()
+
+        raw = await self.reader.readuntil(b"\r\n\r\n")
+        lines = raw.decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ")[1])
+        headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", "0") or 0)
+        data = await self.reader.readexactly(length) if length else b""
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, json.loads(data) if data else None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+            self.reader = None
+
+
+# ---------- 压测 ----------
+
+
+class _LoadStats:
+    def __init__(self):
+        self.latency: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.finished_learners = 0
+
+    def record(self, name: str, elapsed_ms: float, ok: bool):
+        self.latency.setdefault(name, []).append(elapsed_ms)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+
+def _answer_for(question: Dict[str, Any]) -> str:
+    """随便作答：单选随机选一个，判断随机对错，其余给一段文本。"""
+    options = question.get("options") or {}
+    if question.get("q_type") == config.QTYPE_SINGLE and options:
+        return random.choice(sorted(options))
+    if question.get("q_type") == config.QTYPE_TF:
+        return random.choice(["正确", "错误"])
+    return "不知道"
+
+
+async def _learner(
+    no: int, host: str, port: int, stats: _LoadStats, questions: int, think: float, start_delay: float
+):
+    await asyncio.sleep(start_delay)
+    conn = _Connection(host, port)
+
+    async def call(name: str, method: str, path: str, body=None, expect=(200,)):
+        t0 = time.perf_counter()
+        try:
+            status, data = await conn.request(method, path, body)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            await conn.close()
+            status, data = 0, None
+        stats.record(name, (time.perf_counter() - t0) * 1000.0, status in expect)
+        return status, data
+
+    try:
+        status, data = await call(
+            "创建会话", "POST", "/sessions", {"learner": f"学生{no}", "count": questions}, expect=(201,)
+        )
+        if status != 201:
+            return
+        sid = data["session_id"]
+        for idx in range(data["total"]):
+            status, q = await call("获取题目", "GET", f"/sessions/{sid}/questions/{idx}")
+            if status != 200:
+                continue
+            if think > 0:
+                await asyncio.sleep(random.expovariate(1.0 / think))
+            await call(
+                "提交答案", "POST", f"/sessions/{sid}/answers",
+                {"index": idx, "answer": _answer_for(q["question"])},
+            )
+        await call("结束会话", "POST", f"/sessions/{sid}/finish")
+        stats.finished_learners += 1
+    finally:
+        await conn.close()
+
+
+async def run_load(host: str, port: int, learners: int, questions: int, think: float, ramp: float) -> List[str]:
+    stats = _LoadStats()
+    t0 = time.perf_counter()
+    await asyncio.gather(
+        *[
+            _learner(i + 1, host, port, stats, questions, think, ramp * i / max(1, learners))
+            for i in range(learners)
+        ]
+    )
+    wall = time.perf_counter() - t0
+
+    total_requests = sum(len(v) for v in stats.latency.values())
+    total_errors = sum(stats.errors.values())
+    lines = [
+        f"学生数：{learners} · 每人题量：{questions} · 平均思考：{think:g}s · 进场时间：{ramp:g}s",
+        f"总耗时：{wall:.2f}s · 请求数：{total_requests} · 吞吐量：{total_requests / wall if wall else 0:.1f} 请求/秒",
+        f"完成会话：{stats.finished_learners}/{learners} · "
+        f"错误率：{(total_errors / total_requests * 100) if total_requests else 0:.2f}%",
+        "",
+        f"{'接口':<12}{'次数':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}{'错误率':>10}",
+        "-" * 70,
+    ]
+    for name, values in stats.latency.items():
+        s = sorted(values)
+        err = stats.errors.get(name, 0) / len(s) * 100
+        lines.append(
+            f"{name:<12}{len(s):>8}"
+            f"{_percentile(s, 50):>10.2f}{_percentile(s, 95):>10.2f}"
+            f"{_percentile(s, 99):>10.2f}{s[-1]:>10.2f}{err:>9.2f}%"
+        )
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="刷题服务压测工具")
+    parser.add_argument("--url", default="", help="已运行服务的地址；省略时在本地启动一个合成题库的服务")
+    parser.add_argument("--size", type=int, default=5000, help="本地服务的合成题库题量")
+    parser.add_argument("--learners", type=int, default=100, help="模拟学生数")
+    parser.add_argument("--questions", type=int, default=20, help="每名学生的题量")
+    parser.add_argument("--think", type=float, default=1.0, help="平均思考时间（秒），0 表示不停顿")
+    parser.add_argument("--ramp", type=float, default=5.0, help="所有学生在多少秒内陆续进场")
+    parser.add_argument("--seed", type=int, default=2024, help="随机种子")
+    parser.add_argument("--output", default="", help="可选：把结果额外写入该文件")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    proc = None
+    stop = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname or "127.0.0.1", url.port or 80
+    else:
+        # 服务放在独立进程里，避免和压测客户端抢同一个事件循环
+        ctx = multiprocessing.get_context("spawn")
+        ready = ctx.Queue()
+        stop = ctx.Event()
+        proc = ctx.Process(target=_server_main, args=(args.size, args.seed, ready, stop), daemon=True)
+        proc.start()
+        host, port = "127.0.0.1", ready.get(timeout=120)
+
+    try:
+        lines = asyncio.run(
+            run_load(host, port, args.learners, args.questions, args.think, args.ramp)
+        )
+    finally:
+        if proc is not None:
+            stop.set()
+            proc.join(timeout=10)
+            if proc.is_alive():
+                proc.terminate()
+
+    text = "\n".join(lines)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+blank_answers.py
+
+填空题的结构化答案：
+- 题库里的填空题答案是整段原文，例如 "第1空:\\n顺序映像\\n第2空:\\n非顺序映像"；
+  导入时按“第N空”拆成每空一组可接受答案（Question.blanks），已经归一化好，随题库快照保存；
+- 每空可以有多个可接受写法：用 | 或 ｜ 分隔（"栈|堆栈"），或者写成括号注释
+  （"O(nlog2n)(2为底)" 同时接受带注释和去掉注释的写法，"(或xxx)" 额外接受 xxx）；
+- 判分时只把用户答案拆空、归一化一次，逐空与预先算好的键比较，O(空数)，支持按空给部分分；
+- 老版本的题库快照没有 blanks 字段，第一次判分时现算一次并挂在题目对象上；
+- 默认严格模式，判分结果与以前一致；
+- 宽松模式（config.BLANK_MATCH_MODE = "tolerant"，需手动开启）：先做 NFKC 折叠（全角→半角）、
+  大小写折叠并去掉句读标点再比较；夹在两个数字之间的 . : , 保留，"05" 不等于 "0.5"；
+- 笔误容忍（config.BLANK_TYPO_TOLERANCE，默认关闭）：不含数字、长度不少于 6 的中文答案
+  允许 1~2 个字的差异（带状 Levenshtein，超过上限立即放弃）；“非 / 不 / 无 / 逆 …”
+  这类决定意思正反的字（_POLARITY_CHARS）必须逐个对上，"线性结构" 和 "非线性结构"、
+  "顺序映像" 和 "逆序映像" 不会被当成笔误；数字、公式、字母序列始终必须完全一致；
+  宽松键由严格键推出，按题目的答案内容缓存（LRU），大批量判分时每道题只算一次。
+
+用户答案的拆分：优先认“第N空”标记，其次按换行 / 分号 / 竖线拆，
+数量对不上再按逗号、顿号、空白拆；都对不上时取份数更接近空数的那种拆法，
+按位置逐空比较（多出的部分忽略，缺的空算错），保证按空给部分分。
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import config
+from models import Question
+
+BLANK_MATCH_MODE = getattr(config, "BLANK_MATCH_MODE", "strict")
+BLANK_TYPO_TOLERANCE = getattr(config, "BLANK_TYPO_TOLERANCE", False)
+MODE_STRICT = "strict"
+MODE_TOLERANT = "tolerant"
+
+BLANK_MARK_RE = re.compile(r"第\s*(\d+)\s*空\s*[:：]?")
+_ALT_SPLIT_RE = re.compile(r"\s*[|｜]\s*")
+# 末尾的中文括号注释，例如 "(2为底)" "（或链式存储）"
+_NOTE_RE = re.compile(r"[（(]([^()（）]*[一-鿿][^()（）]*)[)）]\s*$")
+_WS_RE = re.compile(r"\s+")
+_USER_SPLIT_STRONG = re.compile(r"[\n;；|｜]+")
+_USER_SPLIT_WEAK = re.compile(r"[\s,，、;；|｜]+")
+_EDGE_PUNCT = "。．.，,；;、：: "
+
+# 展示多个空时的分隔符
+BLANK_JOINER = "；"
+
+# 宽松模式下去掉的句读标点（NFKC 之后），数学符号和括号保留
+_FUZZY_DROP = str.maketrans("", "", "，。、；：？！“”‘’\"'《》「」【】…·;?!")
+# . : , 只有不夹在两个数字之间时才去掉（"0.5"、"192.168.1.1"、"1:2" 保留）
+_FUZZY_DIGIT_PUNCT_RE = re.compile(r"[,.:](?!\d)|(?<!\d)[,.:]")
+_CJK_RE = re.compile(r"[一-鿿]")
+# 决定意思正反的字：笔误容忍时这些字不能被替换、多写或漏写
+_POLARITY_CHARS = frozenset("非不无未否没勿逆反负正顺倒前后先上下左右内外大小多少高低增减加入出有真假单双空时长短首尾始终主从动静强弱")
+# 笔误容忍的最小答案长度
+TYPO_MIN_LENGTH = 6
+# 宽松键缓存的题目数上限
+FUZZY_CACHE_SIZE = 65536
+
+
+def canonical_blank(text: str) -> str:
+    """单个空的归一化键：去掉所有空白和首尾标点，字母统一大写。"""
+    return _WS_RE.sub("", text).strip(_EDGE_PUNCT).upper()
+
+
+def _variants(text: str) -> List[str]:
+    keys: List[str] = []
+    for alt in _ALT_SPLIT_RE.split(text):
+        candidates = [alt]
+        note = _NOTE_RE.search(alt)
+        if note:
+            base = alt[: note.start()]
+            inner = note.group(1).strip()
+            candidates.append(base)
+            if inner.startswith("或"):
+                candidates.append(inner[1:])
+        for cand in candidates:
+            key = canonical_blank(cand)
+            if key and key not in keys:
+                keys.append(key)
+    return keys
+
+
+def _split_by_marks(text: str) -> List[str] | None:
+    """按“第N空”标记拆分；没有标记时返回 None。标记前的内容忽略。"""
+    marks = list(BLANK_MARK_RE.finditer(text))
+    if not marks:
+        return None
+    parts: List[str] = []
+    for i, m in enumerate(marks):
+        end = marks[i + 1].start() if i + 1 < len(marks) else len(text)
+        parts.append(text[m.end():end])
+    return parts
+
+
+def split_blank_answer(answer: str) -> List[List[str]]:
+    """把填空题的答案原文拆成每空一组可接受的归一化答案。"""
+    parts = _split_by_marks(answer or "")
+    if parts is None:
+        parts = [answer or ""]
+    blanks = [_variants(" ".join(part.split())) for part in parts]
+    if not any(blanks):
+        return []
+    return blanks
+
+
+def split_user_answer(raw: str, count: int) -> List[str]:
+    """把用户输入拆成 count 个空（尽量对齐；拆不齐时返回份数最接近 count 的拆法，按位置比较）。"""
+    raw = (raw or "").strip()
+    if count <= 1:
+        return [raw]
+    parts = _split_by_marks(raw)
+    if parts is not None:
+        return parts
+    parts = [p for p in _USER_SPLIT_STRONG.split(raw) if p.strip()]
+    if len(parts) == count:
+        return parts
+    weak = [p for p in _USER_SPLIT_WEAK.split(raw) if p]
+    if len(weak) == count:
+        return weak
+    # 份数一样接近时优先用强分隔符的拆法
+    return min((parts, weak), key=lambda split: abs(len(split) - count))
+
+
+def blank_keys(question: Question) -> List[List[str]]:
+    """取题目预先算好的每空答案；老题库没有时现算一次并缓存在题目对象上。"""
+    if not question.blanks:
+        question.blanks = split_blank_answer(question.answer)
+    return question.blanks
+
+
+def format_blank_keys(keys: List[List[str]]) -> str:
+    """每空取第一种写法拼起来，作为“规范化后的正确答案”展示。"""
+    return BLANK_JOINER.join(variants[0] if variants else "" for variants in keys)
+
+
+def fuzzy_key(text: str) -> str:
+    """宽松模式的归一化键：NFKC 折叠、大小写折叠、去掉空白和句读标点（数字之间的除外）。"""
+    folded = _WS_RE.sub("", unicodedata.normalize("NFKC", text)).casefold().translate(_FUZZY_DROP)
+    return _FUZZY_DIGIT_PUNCT_RE.sub("", folded)
+
+
+def edit_budget(key: str) -> int:
+    """
+    允许的笔误数：笔误容忍关闭时为 0；只给含中文、长度不少于 TYPO_MIN_LENGTH 的答案，
+    数字 / 公式 / 字母序列必须一致。
+    """
+    if not BLANK_TYPO_TOLERANCE or len(key) < TYPO_MIN_LENGTH or not _CJK_RE.search(key):
+        return 0
+    if any(ch.isdigit() for ch in key):
+        return 0
+    return 1 if len(key) <= 10 else 2
+
+
+def _polarity(key: str) -> List[str]:
+    return [ch for ch in key if ch in _POLARITY_CHARS]
+
+
+def bounded_edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    带状 Levenshtein：只计算对角线两侧 limit 宽的区域；
+    距离超过 limit 时立即返回 limit + 1（不关心具体是多少）。
+    """
+    if a == b:
+        return 0
+    la, lb = len(a), len(b)
+    if abs(la - lb) > limit:
+        return limit + 1
+    if la > lb:
+        a, b, la, lb = b, a, lb, la
+    big = limit + 1
+    prev = [j if j <= limit else big for j in range(lb + 1)]
+    for i in range(1, la + 1):
+        lo = max(1, i - limit)
+        hi = min(lb, i + limit)
+        cur = [big] * (lb + 1)
+        if i <= limit:
+            cur[0] = i
+        ca = a[i - 1]
+        row_min = cur[0] if lo == 1 else big
+        for j in range(lo, hi + 1):
+            cost = prev[j - 1] + (ca != b[j - 1])
+            if prev[j] + 1 < cost:
+                cost = prev[j] + 1
+            if cur[j - 1] + 1 < cost:
+                cost = cur[j - 1] + 1
+            cur[j] = cost if cost < big else big
+            if cost < row_min:
+                row_min = cost
+        if row_min > limit:
+            return big
+        prev = cur
+    return prev[lb] if prev[lb] <= limit else big
+
+
+@lru_cache(maxsize=FUZZY_CACHE_SIZE)
+def _fuzzy_keys(keys: Tuple[Tuple[str, ...], ...]) -> Tuple[Tuple[Tuple[str, int], ...], ...]:
+    """每空每种写法的 (宽松键, 允许笔误数)；按答案内容缓存。"""
+    return tuple(
+        tuple((fk, edit_budget(fk)) for fk in dict.fromkeys(fuzzy_key(v) for v in variants) if fk)
+        for variants in keys
+    )
+
+
+@dataclass
+class BlankGrade:
+    """逐空判分结果；approx 标记宽松模式下“近似正确”（有笔误或标点差异）的空。"""
+
+    correct: List[bool] = field(default_factory=list)
+    user_keys: List[str] = field(default_factory=list)
+    approx: List[bool] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return len(self.correct)
+
+    @property
+    def hits(self) -> int:
+        return sum(self.correct)
+
+    @property
+    def score(self) -> float:
+        """部分分：答对的空数 / 总空数。"""
+        return self.hits / self.total if self.total else 0.0
+
+    @property
+    def all_correct(self) -> bool:
+        return self.total > 0 and all(self.correct)
+
+    def summary(self) -> str:
+        marks = " ".join(
+            f"第{i}空{('≈' if approx else '✓') if ok else '✗'}"
+            for i, (ok, approx) in enumerate(zip(self.correct, self.approx), 1)
+        )
+        note = "（≈ 表示有笔误或全角 / 标点差异，按正确计）" if any(self.approx) else ""
+        return f"{marks} · 得分 {self.hits}/{self.total}{note}"
+
+
+def _fuzzy_match(user_key: str, candidates: Tuple[Tuple[str, int], ...]) -> bool:
+    uk = fuzzy_key(user_key)
+    if not uk:
+        return False
+    for key, budget in candidates:
+        if uk == key:
+            return True
+        if budget and _polarity(uk) == _polarity(key) and bounded_edit_distance(uk, key, budget) <= budget:
+            return True
+    return False
+
+
+def grade_blanks(keys: List[List[str]], user_raw: str, mode: Optional[str] = None) -> BlankGrade:
+    """逐空判分；mode 为 None 时使用 config.BLANK_MATCH_MODE。"""
+    tolerant = (mode or BLANK_MATCH_MODE) == MODE_TOLERANT
+    fuzzy = _fuzzy_keys(tuple(tuple(v) for v in keys)) if tolerant else ()
+    parts = split_user_answer(user_raw, len(keys))
+    result = BlankGrade()
+    for i, variants in enumerate(keys):
+        user_key = canonical_blank(parts[i]) if i < len(parts) else ""
+        exact = bool(user_key) and user_key in variants
+        approx = not exact and tolerant and bool(user_key) and _fuzzy_match(user_key, fuzzy[i])
+        result.user_keys.append(user_key)
+        result.correct.append(exact or approx)
+        result.approx.append(approx)
+    return result
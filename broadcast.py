@@ -0,0 +1,429 @@
+# -*- coding: utf-8 -*-
+"""
+broadcast.py
+
+课堂同步答题（广播模式），挂在 quiz_server 上，基于 WebSocket（RFC 6455，自行实现，无第三方依赖）：
+- 老师端推送一道题，服务端把同一帧数据一次编码后写给所有在线学生；
+- 学生作答后按选项增量计数（单选按选项字母、判断按对 / 错、填空 / 简答按规范化文本），
+  改答案时只调整新旧两个计数，不重新统计；
+- 计数变化后不是每个答案都推给老师，而是合并成每 HISTOGRAM_INTERVAL 秒一次的直方图帧；
+- 所有连接都跑在同一个事件循环里，写入不等待单个客户端；
+  某个客户端发送缓冲区积压过多时直接断开，避免拖慢其他几百个连接。
+
+连接方式：
+    ws://host:port/broadcast?role=teacher&token=<老师口令>   （口令由 quiz_server 启动时打印，错误时握手返回 403）
+    ws://host:port/broadcast?role=student&name=张三
+
+消息（均为 JSON 文本帧）：
+    老师 → 服务端  {"type": "push", "question_id": 12}   推送指定题（省略时按 q_type 随机抽一道）
+                   {"type": "reveal"}                     公布答案并冻结计数
+                   {"type": "stop"}                       结束本题
+    学生 → 服务端  {"type": "answer", "answer": "B"}
+    服务端 → 学生  question / ack / reveal / stop
+    服务端 → 老师  state / histogram
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import struct
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import config
+from models import Question
+from blank_answers import blank_keys
+from quiz_engine import _grade_with_key, _normalize_correct_answer
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# 单条客户端消息的大小上限（学生只发短答案）
+MAX_WS_MESSAGE = 64 * 1024
+# 单个连接允许积压的发送字节数，超过视为慢客户端并断开
+MAX_WS_BUFFER = 256 * 1024
+# 老师端直方图的合并推送周期（秒）
+HISTOGRAM_INTERVAL = 0.2
+# 填空 / 简答按文本计数时最多保留多少个不同答案，其余归入“其他”
+MAX_TEXT_BUCKETS = 20
+
+OP_CONT = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+
+class WebSocketClosed(Exception):
+    """对端关闭连接或发送了不合法的帧。"""
+
+
+def websocket_accept(key: str) -> str:
+    """根据 Sec-WebSocket-Key 计算握手响应里的 Sec-WebSocket-Accept。"""
+    digest = hashlib.sha1((key + WS_GUID).encode("ascii")).digest()
+    return base64.b64encode(digest).decode("ascii")
+
+
+def handshake_response(key: str) -> bytes:
+    return (
+        "HTTP/1.1 101 Switching Protocols\r\n"
+        "Upgrade: websocket\r\n"
+        "Connection: Upgrade\r\n"
+        f"Sec-WebSocket-Accept: {websocket_accept(key)}\r\n\r\n"
+    ).encode("latin-1")
+
+
+def encode_frame(opcode: int, payload: bytes) -> bytes:
+    """服务端发出的帧不加掩码。"""
+    n = len(payload)
+    if n < 126:
+        head = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 65536:
+        head = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        head = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return head + payload
+
+
+def encode_json(data: Dict[str, Any]) -> bytes:
+    return encode_frame(OP_TEXT, json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def _unmask(payload: bytes, mask: bytes) -> bytes:
+    # 整块异或比逐字节循环快得多
+    n = len(payload)
+    if n == 0:
+        return payload
+    key = (mask * (n // 4 + 1))[:n]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(key, "big")).to_bytes(n, "big")
+
+
+async def read_message(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> Tuple[int, bytes]:
+    """
+    读取一条完整消息（合并分片），自动回复 ping。
+    返回 (opcode, payload)；收到关闭帧或连接断开时抛出 WebSocketClosed。
+    """
+    opcode = None
+    chunks = []
+    size = 0
+    try:
+        while True:
+            b1, b2 = await reader.readexactly(2)
+            fin = b1 & 0x80
+            op = b1 & 0x0F
+            if not b2 & 0x80:
+                raise WebSocketClosed("客户端帧必须带掩码")
+            n = b2 & 0x7F
+            if n == 126:
+                (n,) = struct.unpack("!H", await reader.readexactly(2))
+            elif n == 127:
+                (n,) = struct.unpack("!Q", await reader.readexactly(8))
+            if size + n > MAX_WS_MESSAGE:
+                raise WebSocketClosed("消息过大")
+            mask = await reader.readexactly(4)
+            payload = _unmask(await reader.readexactly(n), mask)
+
+            if op >= OP_CLOSE:
+                # 控制帧可以夹在分片之间
+                if op == OP_CLOSE:
+                    raise WebSocketClosed("对端关闭")
+                if op == OP_PING:
+                    writer.write(encode_frame(OP_PONG, payload))
+                continue
+
+            if opcode is None:
+                if op == OP_CONT:
+                    raise WebSocketClosed("分片顺序错误")
+                opcode = op
+            elif op != OP_CONT:
+                raise WebSocketClosed("分片顺序错误")
+            chunks.append(payload)
+            size += n
+            if fin:
+                return opcode, b"".join(chunks)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        raise WebSocketClosed("连接已断开")
+
+
+class BroadcastClient:
+    __slots__ = ("cid", "role", "name", "writer")
+
+    def __init__(self, cid: int, role: str, name: str, writer: asyncio.StreamWriter):
+        self.cid = cid
+        self.role = role
+        self.name = name
+        self.writer = writer
+
+
+class BroadcastRoom:
+    """一间教室：当前题目、学生连接、按选项增量累计的作答分布。"""
+
+    def __init__(self, bank: Sequence[Question], index_by_id: Dict[int, int], indexes_by_type: Dict[str, list]):
+        self.bank = bank
+        self._index_by_id = index_by_id
+        self._indexes_by_type = indexes_by_type
+
+        self.students: Dict[int, BroadcastClient] = {}
+        self.teachers: Dict[int, BroadcastClient] = {}
+        self._next_cid = 1
+
+        # 当前题目
+        self.question: Optional[Question] = None
+        self.round = 0
+        self.revealed = False
+        self._correct_key = ""
+        self._blank_keys: Optional[List[List[str]]] = None
+        self._question_frame: Optional[bytes] = None
+
+        # 作答分布：bucket -> 人数；每个学生当前计入的 (bucket, 是否正确)
+        self.counts: Dict[str, int] = {}
+        self.correct = 0
+        self._answers: Dict[int, Tuple[str, bool]] = {}
+
+        self._dirty = False
+        self._flush_task: Optional[asyncio.Task] = None
+
+    # ---------- 连接管理 ----------
+
+    def join(self, role: str, name: str, writer: asyncio.StreamWriter) -> BroadcastClient:
+        client = BroadcastClient(self._next_cid, role, name, writer)
+        self._next_cid += 1
+        if role == "teacher":
+            self.teachers[client.cid] = client
+            self._send(client, self.state())
+        else:
+            self.students[client.cid] = client
+            if self._question_frame is not None:
+                self._send_raw(client, self._question_frame)
+            self._mark_dirty()
+        return client
+
+    def leave(self, client: BroadcastClient):
+        if client.role == "teacher":
+            self.teachers.pop(client.cid, None)
+        elif self.students.pop(client.cid, None) is not None:
+            self._mark_dirty()
+
+    def _send_raw(self, client: BroadcastClient, frame: bytes) -> bool:
+        transport = client.writer.transport
+        if transport.is_closing():
+            return False
+        if transport.get_write_buffer_size() > MAX_WS_BUFFER:
+            # 慢客户端：直接断开，读协程随后会把它移出房间
+            transport.abort()
+            return False
+        client.writer.write(frame)
+        return True
+
+    def _send(self, client: BroadcastClient, data: Dict[str, Any]):
+        self._send_raw(client, encode_json(data))
+
+    def _fan_out(self, clients: Dict[int, BroadcastClient], frame: bytes):
+        # 同一帧只编码一次，逐个写入各连接的发送缓冲区
+        for client in list(clients.values()):
+            self._send_raw(client, frame)
+
+    # ---------- 状态 ----------
+
+    def histogram(self) -> Dict[str, Any]:
+        return {
+            "type": "histogram",
+            "round": self.round,
+            "counts": dict(self.counts),
+            "answered": len(self._answers),
+            "correct": self.correct,
+            "online": len(self.students),
+        }
+
+    def state(self, with_answer: bool = True) -> Dict[str, Any]:
+        """老师端看到的完整状态；公开查询时 with_answer=False，公布前不带答案。"""
+        q = self.question
+        data = self.histogram()
+        data.update(
+            {
+                "type": "state",
+                "question": None if q is None else {
+                    "id": q.id,
+                    "q_type": q.q_type,
+                    "question": q.question,
+                    "options": q.options,
+                    "answer": q.answer if with_answer or self.revealed else None,
+                },
+                "revealed": self.revealed,
+            }
+        )
+        return data
+
+    def _mark_dirty(self):
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(HISTOGRAM_INTERVAL)
+        self._flush_histogram()
+
+    def _flush_histogram(self):
+        if not self._dirty:
+            return
+        self._dirty = False
+        if self.teachers:
+            self._fan_out(self.teachers, encode_json(self.histogram()))
+
+    # ---------- 老师操作 ----------
+
+    def _pick(self, data: Dict[str, Any]) -> Optional[Question]:
+        qid = data.get("question_id")
+        if qid is not None:
+            try:
+                idx = self._index_by_id.get(int(qid))
+            except (TypeError, ValueError):
+                idx = None
+            return None if idx is None else self.bank[idx]
+        q_type = data.get("q_type") or "all"
+        pool = range(len(self.bank)) if q_type == "all" else self._indexes_by_type.get(q_type, [])
+        if not pool:
+            return None
+        return self.bank[random.choice(pool)]
+
+    def push(self, q: Question):
+        self.question = q
+        self.round += 1
+        self.revealed = False
+        self._correct_key = _normalize_correct_answer(q)
+        self._blank_keys = blank_keys(q) if q.q_type == config.QTYPE_BLANK else None
+        self.counts = {}
+        self.correct = 0
+        self._answers = {}
+        self._question_frame = encode_json(
+            {
+                "type": "question",
+                "round": self.round,
+                "question": {"id": q.id, "q_type": q.q_type, "question": q.question, "options": q.options},
+            }
+        )
+        self._fan_out(self.students, self._question_frame)
+        self._fan_out(self.teachers, encode_json(self.state()))
+
+    def reveal(self):
+        q = self.question
+        if q is None or self.revealed:
+            return
+        self.revealed = True
+        self._flush_histogram()
+        frame = encode_json(
+            {
+                "type": "reveal",
+                "round": self.round,
+                "answer": q.answer,
+                "explanation": q.explanation,
+                "counts": dict(self.counts),
+            }
+        )
+        self._fan_out(self.students, frame)
+        self._fan_out(self.teachers, encode_json(self.state()))
+
+    def stop(self):
+        self.question = None
+        self._question_frame = None
+        self.revealed = False
+        frame = encode_json({"type": "stop", "round": self.round})
+        self._fan_out(self.students, frame)
+        self._fan_out(self.teachers, encode_json(self.state()))
+
+    def handle_teacher(self, client: BroadcastClient, data: Dict[str, Any]):
+        kind = data.get("type")
+        if kind == "push":
+            q = self._pick(data)
+            if q is None:
+                self._send(client, {"type": "error", "error": "题库中没有符合条件的题目"})
+                return
+            self.push(q)
+        elif kind == "reveal":
+            self.reveal()
+        elif kind == "stop":
+            self.stop()
+        else:
+            self._send(client, {"type": "error", "error": "未知的消息类型"})
+
+    # ---------- 学生作答 ----------
+
+    def _bucket(self, q_type: str, user_norm: str) -> str:
+        if not user_norm:
+            return "未作答"
+        if q_type == config.QTYPE_TF:
+            return {"T": "正确", "F": "错误"}.get(user_norm, "无效")
+        if q_type == config.QTYPE_SINGLE:
+            return user_norm
+        if user_norm in self.counts or len(self.counts) < MAX_TEXT_BUCKETS:
+            return user_norm
+        return "其他"
+
+    def answer(self, client: BroadcastClient, raw: str):
+        q = self.question
+        if q is None or self.revealed:
+            self._send(client, {"type": "ack", "accepted": False, "round": self.round})
+            return
+        is_correct, user_norm, _ = _grade_with_key(q.q_type, self._correct_key, raw, self._blank_keys)
+        bucket = self._bucket(q.q_type, user_norm)
+
+        # 改答案：只撤销旧的那一格
+        prev = self._answers.get(client.cid)
+        if prev is not None:
+            old_bucket, old_correct = prev
+            left = self.counts.get(old_bucket, 0) - 1
+            if left > 0:
+                self.counts[old_bucket] = left
+            else:
+                self.counts.pop(old_bucket, None)
+            self.correct -= old_correct
+        self._answers[client.cid] = (bucket, is_correct)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.correct += is_correct
+
+        self._send(client, {"type": "ack", "accepted": True, "round": self.round})
+        self._mark_dirty()
+
+    def handle_student(self, client: BroadcastClient, data: Dict[str, Any]):
+        if data.get("type") == "answer":
+            self.answer(client, str(data.get("answer") or "").strip()[:200])
+        else:
+            self._send(client, {"type": "error", "error": "未知的消息类型"})
+
+    # ---------- 连接主循环 ----------
+
+    async def serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, role: str, name: str):
+        """握手已完成后调用，直到连接断开才返回。"""
+        client = self.join(role, name, writer)
+        handle = self.handle_teacher if role == "teacher" else self.handle_student
+        try:
+            while True:
+                opcode, payload = await read_message(reader, writer)
+                if opcode != OP_TEXT:
+                    continue
+                try:
+                    data = json.loads(payload.decode("utf-8"))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    self._send(client, {"type": "error", "error": "消息不是合法的 JSON"})
+                    continue
+                if isinstance(data, dict):
+                    handle(client, data)
+                if writer.transport.get_write_buffer_size() > MAX_WS_BUFFER:
+                    await writer.drain()
+        except WebSocketClosed:
+            pass
+        finally:
+            self.leave(client)
+            if not writer.transport.is_closing():
+                writer.write(encode_frame(OP_CLOSE, struct.pack("!H", 1000)))
+
+    def close(self):
+        """服务关闭时断开所有广播连接。"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        for client in list(self.teachers.values()) + list(self.students.values()):
+            client.writer.close()
@@ -18,12 +18,82 @@ DEFAULT_DOCX_PATH = os.path.join(BASE_DIR, "questions.docx")
 # 默认 JSON 题库路径（所有解析结果统一存这里）
 DEFAULT_JSON_PATH = os.path.join(BASE_DIR, "questions.json")
 
+# 题库登记表：所有导入过的题库（名称 / 源文件 / 快照路径）
+BANKS_JSON_PATH = os.path.join(BASE_DIR, "banks.json")
+
+# 除默认题库（上面的 questions.json）以外，各题库快照的保存目录
+BANK_SNAPSHOT_DIR = os.path.join(BASE_DIR, "data", "banks")
+DEFAULT_BANK_ID = "default"
+
+# Word 题库解析结果缓存（按文件内容 SHA-256 寻址）及其大小上限
+PARSE_CACHE_DIR = os.path.join(BASE_DIR, "data", "parse_cache")
+PARSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
 # 错题本 JSON 路径
 WRONG_JSON_PATH = os.path.join(BASE_DIR, "wrong_questions.json")
 
 # 做题统计 JSON 路径
 STATS_JSON_PATH = os.path.join(BASE_DIR, "stats.json")
 
+# 收藏夹 JSON 路径
+FAV_JSON_PATH = os.path.join(BASE_DIR, "favorites.json")
+
+# 作答历史（每答一题追加一行 JSON）
+HISTORY_JSONL_PATH = os.path.join(BASE_DIR, "history.jsonl")
+
+# 学习者档案：默认档案沿用上面的根目录文件，其他档案各占 PROFILES_DIR 下的一个子目录
+PROFILES_DIR = os.path.join(BASE_DIR, "data", "profiles")
+PROFILES_INDEX_PATH = os.path.join(PROFILES_DIR, "profiles.json")
+DEFAULT_PROFILE = "默认"
+
+# 填空题判分模式："strict" 逐空严格比较（默认，与以前的判分结果一致）；
+# "tolerant" 忽略全角 / 半角、大小写和标点差异（见 blank_answers.py），
+# 打开后已有题库的判分会变宽，错题本和统计的口径也随之变化，需要时再手动开启
+BLANK_MATCH_MODE = "strict"
+# 宽松模式下是否再容忍笔误（默认关闭）：只对不含数字、不少于 6 个字的中文答案放宽 1~2 个字，
+# 并且“非 / 不 / 无 / 逆 / 正 / 负 …”这类决定意思的字写错、多写、漏写都不算笔误
+BLANK_TYPO_TOLERANCE = False
+
+# 简答题参考分（n-gram TF-IDF 相似度 + 关键词覆盖，见 short_answer.py）：
+# 只作为自评时的参考显示，不直接计入对错；SHORT_PASS_SCORE 以上提示“基本答到要点”
+SHORT_AUTO_SCORE = True
+SHORT_PASS_SCORE = 0.5
+
+# 导入题库时的近似重复检测（MinHash + LSH，见 dedup.py）：
+# "off" 不检测；"report" 只在导入结果里报告；"merge" 导入时去掉与已有题目重复的新题
+DEDUP_ON_IMPORT = "report"
+DEDUP_THRESHOLD = 0.8
+
+# 相似题索引（字符 n-gram 哈希向量，见 similar_index.py）：向量维数和磁盘缓存目录
+SIMILAR_DIM = 512
+SIMILAR_INDEX_DIR = os.path.join(BASE_DIR, "data", "similar")
+
+# 话题聚类（字符 2-gram TF-IDF + 小批量 k-means，见 topics.py）：
+# TOPIC_COUNT 为 0 时按题量自动决定话题数；TOPIC_BALANCED_SAMPLING 开启时普通刷题按话题轮流抽题；
+# 话题模型按题库缓存在 TOPIC_CACHE_DIR，重新导入后新题就近归入已有话题，
+# 累计新题超过上次聚类题量的 TOPIC_REFIT_RATIO 时整体重新聚类
+TOPIC_COUNT = 0
+TOPIC_MAX_COUNT = 24
+TOPIC_BALANCED_SAMPLING = True
+TOPIC_CACHE_DIR = os.path.join(BASE_DIR, "data", "topics")
+TOPIC_REFIT_RATIO = 0.2
+
+# 题目难度 / 区分度分析（基于所有档案的作答历史，见 item_stats.py）：
+# ITEM_IRT_MODEL 可选 "off" / "1pl" / "2pl"；作答少于 ITEM_MIN_ATTEMPTS 次的题不分难度档；
+# 通过率 ≥ DIFFICULTY_EASY_P 为“容易”，< DIFFICULTY_HARD_P 为“较难”
+ITEM_STATS_DIR = os.path.join(BASE_DIR, "data", "item_stats")
+ITEM_IRT_MODEL = "2pl"
+ITEM_MIN_ATTEMPTS = 5
+DIFFICULTY_EASY_P = 0.8
+DIFFICULTY_HARD_P = 0.5
+# 作答历史比上次拟合时增长超过这个比例才在后台重算难度参数
+ITEM_REFIT_GROWTH = 0.05
+
+# 刷题服务：空闲会话的磁盘检查点目录
+SESSION_CHECKPOINT_DIR = os.path.join(BASE_DIR, "data", "sessions")
+# 刷题服务：广播模式老师端的口令（连接时带 &token=...）；为空时每次启动随机生成并打印在控制台
+BROADCAST_TEACHER_TOKEN = ""
+
 # ===== 题型常量 =====
 # 单选题
 QTYPE_SINGLE = "single"
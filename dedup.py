@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+dedup.py
+
+近似重复题检测（MinHash + LSH 分桶），用于合并多个章节题库时找出重复或轻微改写的题目：
+- 每道题取 题干 + 选项 的文本，做与宽松判分相同的归一化（NFKC、大小写折叠、去掉空白和句读标点），
+  切成字符 3-gram 作为 shingle，用 crc32 映射成整数；
+- 用 NUM_PERM 个随机乘法移位哈希 ((a·x + b) mod 2^64) >> 32 计算 MinHash 签名，NumPy 按块向量化，
+  十万题也只需要几秒；
+- 签名分成 BANDS 段、每段 ROWS 行（默认 16 × 8，相似度阈值约 0.7）：
+  任意一段完全相同的题落进同一个桶，成为候选对；不需要两两比较，整体近似线性；
+- 候选对再用签名的一致比例（Jaccard 估计值）确认，超过 threshold 才算重复；
+  题型不同的题不合并。大桶内只和桶首、前一个成员比较，避免桶过大时退化成平方复杂度；
+- 确认的重复对用并查集合成簇，输出报告（DedupReport）；导入时可选只报告或合并
+  （config.DEDUP_ON_IMPORT = "off" / "report" / "merge"），合并时保留已有题库里的题和
+  新题库里最先出现的那道。
+
+命令行用法（检查一个或多个题库 JSON 之间的重复）：
+    python dedup.py questions.json data/banks/b1234567890.json --threshold 0.8
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import config
+from blank_answers import fuzzy_key
+from models import Question
+
+DEDUP_ON_IMPORT = getattr(config, "DEDUP_ON_IMPORT", "report")
+DEDUP_THRESHOLD = getattr(config, "DEDUP_THRESHOLD", 0.8)
+
+SHINGLE_SIZE = 3
+BANDS = 16
+ROWS = 8
+NUM_PERM = BANDS * ROWS
+_SEED = 20240917
+# 每块处理的题目数（控制临时矩阵的大小）
+_CHUNK = 1024
+
+# 乘法移位哈希：h(x) = ((a·x + b) mod 2^64) >> 32，a 取奇数；uint64 自然回绕，不需要取模
+_rng = np.random.default_rng(_SEED)
+_A = _rng.integers(1, np.iinfo(np.uint64).max, size=NUM_PERM, dtype=np.uint64, endpoint=True) | np.uint64(1)
+_B = _rng.integers(0, np.iinfo(np.uint64).max, size=NUM_PERM, dtype=np.uint64, endpoint=True)
+_BAND_MIX = _rng.integers(1, 1 << 31, size=ROWS, dtype=np.uint64)
+_SHIFT = np.uint64(32)
+_EMPTY = np.iinfo(np.uint64).max
+
+
+def question_text(q: Question) -> str:
+    options = " ".join(q.options[k] for k in sorted(q.options)) if q.options else ""
+    return f"{q.question} {options}"
+
+
+def shingle_hashes(text: str) -> List[int]:
+    s = fuzzy_key(text)
+    if len(s) <= SHINGLE_SIZE:
+        return [zlib.crc32(s.encode("utf-8"))] if s else []
+    return list({zlib.crc32(s[i:i + SHINGLE_SIZE].encode("utf-8")) for i in range(len(s) - SHINGLE_SIZE + 1)})
+
+
+def minhash_signatures(texts: Sequence[str]) -> np.ndarray:
+    """返回 (题数, NUM_PERM) 的签名矩阵；没有可用文本的题整行为 uint64 最大值。"""
+    n = len(texts)
+    sig = np.full((n, NUM_PERM), _EMPTY, dtype=np.uint64)
+    for start in range(0, n, _CHUNK):
+        rows: List[int] = []
+        offsets: List[int] = []
+        values: List[int] = []
+        for i in range(start, min(n, start + _CHUNK)):
+            hashes = shingle_hashes(texts[i])
+            if hashes:
+                rows.append(i)
+                offsets.append(len(values))
+                values.extend(hashes)
+        if not rows:
+            continue
+        x = np.asarray(values, dtype=np.uint64)
+        # (NUM_PERM, shingle 总数)，再按每题的 shingle 区间取最小值
+        hashed = (_A[:, None] * x[None, :] + _B[:, None]) >> _SHIFT
+        sig[rows] = np.minimum.reduceat(hashed, np.asarray(offsets), axis=1).T
+    return sig
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, i: int, j: int):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            # 根取较小的下标，簇里最先出现的题就是代表
+            if rj < ri:
+                ri, rj = rj, ri
+            self.parent[rj] = ri
+
+
+@dataclass
+class DedupReport:
+    total: int
+    threshold: float
+    clusters: List[List[int]] = field(default_factory=list)
+    candidate_pairs: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def duplicates(self) -> int:
+        """合并后可以去掉的题数（每簇保留一道）。"""
+        return sum(len(c) - 1 for c in self.clusters)
+
+    def summary(self) -> str:
+        if not self.clusters:
+            return f"近似重复检测：{self.total} 题中未发现重复（阈值 {self.threshold:.2f}，耗时 {self.elapsed:.2f} 秒）"
+        return (
+            f"近似重复检测：{self.total} 题中发现 {len(self.clusters)} 组近似重复，"
+            f"共 {self.duplicates} 道可合并（阈值 {self.threshold:.2f}，"
+            f"候选 {self.candidate_pairs} 对，耗时 {self.elapsed:.2f} 秒）"
+        )
+
+    def describe(self, questions: Sequence[Question], labels: Optional[Sequence[str]] = None, limit: int = 10) -> List[str]:
+        """列出前 limit 组重复题（题号 + 题干开头），labels 可以给每道题加上题库名等前缀。"""
+        lines: List[str] = []
+        for n, cluster in enumerate(self.clusters[:limit], 1):
+            lines.append(f"第 {n} 组：")
+            for i in cluster:
+                q = questions[i]
+                prefix = f"{labels[i]} " if labels else ""
+                text = " ".join(q.question.split())
+                lines.append(f"  {prefix}#{q.id} {text[:40]}")
+        if len(self.clusters) > limit:
+            lines.append(f"……另有 {len(self.clusters) - limit} 组")
+        return lines
+
+
+def find_near_duplicates(questions: Sequence[Question], threshold: Optional[float] = None) -> DedupReport:
+    """在一组题目里找近似重复簇；簇内下标升序，簇按首个下标排序。"""
+    threshold = DEDUP_THRESHOLD if threshold is None else threshold
+    t0 = time.perf_counter()
+    n = len(questions)
+    report = DedupReport(total=n, threshold=threshold)
+    if n < 2:
+        report.elapsed = time.perf_counter() - t0
+        return report
+
+    sig = minhash_signatures([question_text(q) for q in questions])
+    valid = sig[:, 0] != _EMPTY
+    q_types = [q.q_type for q in questions]
+    uf = _UnionFind(n)
+    seen: set = set()
+
+    for band in range(BANDS):
+        block = sig[:, band * ROWS:(band + 1) * ROWS]
+        keys = (block * _BAND_MIX).sum(axis=1)  # uint64 溢出回绕即可，只用来分桶
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        cuts = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+        for bucket in np.split(order, cuts):
+            if len(bucket) < 2:
+                continue
+            bucket = bucket[valid[bucket]]
+            if len(bucket) < 2:
+                continue
+            bucket.sort()
+            members = bucket[1:]
+            # 每个成员只和桶首、前一个成员比较
+            pairs = [(int(bucket[0]), int(j)) for j in members]
+            pairs += [(int(i), int(j)) for i, j in zip(bucket[1:-1], bucket[2:])]
+            for i, j in pairs:
+                if (i, j) in seen or q_types[i] != q_types[j]:
+                    continue
+                seen.add((i, j))
+                if uf.find(i) == uf.find(j):
+                    continue
+                if float(np.mean(sig[i] == sig[j])) >= threshold:
+                    uf.union(i, j)
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(n):
+        groups.setdefault(uf.find(i), []).append(i)
+    report.clusters = sorted((g for g in groups.values() if len(g) > 1), key=lambda c: c[0])
+    report.candidate_pairs = len(seen)
+    report.elapsed = time.perf_counter() - t0
+    return report
+
+
+def dedup_new_bank(
+    new_questions: List[Question],
+    existing: Sequence[Question] = (),
+    mode: Optional[str] = None,
+    threshold: Optional[float] = None,
+) -> Tuple[List[Question], Optional[DedupReport]]:
+    """
+    导入时的去重：把已有题库的题放在前面一起检测。
+    mode 为 "merge" 时去掉新题库里与已有题目（或新题库里更早的题）重复的题；
+    "report" 只给出报告；"off" 直接返回。
+    """
+    mode = mode or DEDUP_ON_IMPORT
+    if mode == "off":
+        return new_questions, None
+    combined = list(existing) + list(new_questions)
+    report = find_near_duplicates(combined, threshold)
+    if mode != "merge" or not report.clusters:
+        return new_questions, report
+    offset = len(existing)
+    dropped = {i - offset for cluster in report.clusters for i in cluster[1:] if i >= offset}
+    return [q for i, q in enumerate(new_questions) if i not in dropped], report
+
+
+def main():
+    from storage import load_questions_from_file
+
+    parser = argparse.ArgumentParser(description="题库近似重复检测（MinHash + LSH）")
+    parser.add_argument("banks", nargs="+", help="题库 JSON 文件（可以多个，跨题库检测）")
+    parser.add_argument("--threshold", type=float, default=DEDUP_THRESHOLD, help="Jaccard 相似度阈值")
+    parser.add_argument("--limit", type=int, default=20, help="最多列出多少组")
+    args = parser.parse_args()
+
+    questions: List[Question] = []
+    labels: List[str] = []
+    for path in args.banks:
+        qs = load_questions_from_file(path)
+        questions.extend(qs)
+        labels.extend([path] * len(qs))
+
+    report = find_near_duplicates(questions, args.threshold)
+    print(report.summary())
+    for line in report.describe(questions, labels if len(args.banks) > 1 else None, args.limit):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+grading_queue.py
+
+刷题服务的异步判分队列：
+- 整张答题卡（以及“结束会话”请求）先进入队列，由一个后台协程统一处理；
+- 后台协程每次取出队列里已堆积的多份提交，合并成一次 grade_batch 判分，
+  全班同时交卷时，同一道题的标准答案只归一化一次；
+- 本批次里需要结束的会话，错题本和统计合并成一次读写（分组事务），
+  而不是每个学生各写一次文件；写入成功后会话才算结束，写入失败时可以重新交卷；
+- 逐题结果与单题提交接口一致，带上填空题的部分分和简答题的参考分；
+- 队列深度有上限，超过时直接拒绝（服务端返回 503 + Retry-After），形成背压。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from models import Question
+from quiz_engine import grade_batch, grade_details
+from session_store import CompactSession
+
+
+class QueueFullError(Exception):
+    """判分队列已满，调用方应稍后重试。"""
+
+
+@dataclass
+class GradingJob:
+    session: CompactSession
+    answers: List[Tuple[int, str]]
+    finish: bool
+    future: "asyncio.Future[List[Dict[str, Any]]]"
+    results: List[Dict[str, Any]] = field(default_factory=list)
+
+
+PersistCallback = Callable[[List[CompactSession]], Awaitable[None]]
+
+
+def _grade_with_details(items: List[Tuple[Question, str]]) -> List[Tuple[bool, Dict[str, Any]]]:
+    """grade_batch 判对错，再补上每题的附加字段（在线程池里执行）。"""
+    graded = grade_batch(items)
+    return [(ok, grade_details(q, raw)) for (q, raw), (ok, _, _) in zip(items, graded)]
+
+
+class GradingQueue:
+    """合并判分请求的后台队列。"""
+
+    def __init__(
+        self,
+        bank: Sequence[Question],
+        persist: PersistCallback,
+        max_depth: int = 2000,
+        max_batch: int = 256,
+        linger: float = 0.005,
+    ):
+        self.bank = bank
+        self.persist = persist
+        self.max_batch = max_batch
+        # 第一份提交到达后稍等片刻，让同一时刻的其他提交一起进入本批次
+        self.linger = linger
+        self._queue: "asyncio.Queue[GradingJob]" = asyncio.Queue(maxsize=max_depth)
+        self._task: Optional[asyncio.Task] = None
+
+        self.batches = 0
+        self.graded = 0
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def submit(
+        self, session: CompactSession, answers: List[Tuple[int, str]], finish: bool
+    ) -> "asyncio.Future[List[Dict[str, Any]]]":
+        """提交一份答题卡，返回的 Future 在判分完成后给出逐题结果。"""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait(GradingJob(session, answers, finish, future))
+        except asyncio.QueueFull:
+            raise QueueFullError("判分队列已满")
+        return future
+
+    async def _run(self):
+        while True:
+            job = await self._queue.get()
+            batch = [job]
+            if self.linger > 0:
+                await asyncio.sleep(self.linger)
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                await self._process(batch)
+            except Exception as e:
+                for j in batch:
+                    if not j.future.done():
+                        j.future.set_exception(e)
+
+    async def _process(self, batch: List[GradingJob]):
+        # 1. 收集本批次所有待判的题（跳过越界 / 已判分 / 同一份答题卡里重复的下标）
+        items: List[Tuple[Question, str]] = []
+        slots: List[Tuple[GradingJob, int, str]] = []
+        for job in batch:
+            session = job.session
+            seen = set()
+            for idx, raw in job.answers:
+                if idx < 0 or idx >= session.total:
+                    job.results.append({"index": idx, "error": "题目下标超出范围"})
+                    continue
+                if idx in seen or session.finished or session.status_of(idx) != "unanswered":
+                    job.results.append({"index": idx, "error": "本题已判分"})
+                    continue
+                seen.add(idx)
+                items.append((self.bank[session.indexes[idx]], raw))
+                slots.append((job, idx, raw))
+
+        # 2. 一次性判分（放到线程池，避免大批次阻塞事件循环）
+        graded = await asyncio.to_thread(_grade_with_details, items) if items else []
+
+        # 3. 回到事件循环里更新会话状态
+        for (job, idx, raw), (q, _), (is_correct, details) in zip(slots, items, graded):
+            session = job.session
+            if session.status_of(idx) != "unanswered":
+                # 判分期间该题已经通过单题接口提交过
+                job.results.append({"index": idx, "error": "本题已判分"})
+                continue
+            t = q.q_type
+            session.per_type_total[t] = session.per_type_total.get(t, 0) + 1
+            if is_correct:
+                session.per_type_correct[t] = session.per_type_correct.get(t, 0) + 1
+            else:
+                session.wrong.append(session.indexes[idx])
+            session.set_status(idx, "correct" if is_correct else "wrong")
+            if raw:
+                session.answers[idx] = raw
+            result = {"index": idx, "correct": is_correct, "answer": q.answer.strip() if q.answer else ""}
+            result.update(details)
+            job.results.append(result)
+
+        # 4. 需要结束的会话：错题本 / 统计合并成一次写入
+        finishing: List[CompactSession] = []
+        for job in batch:
+            if job.finish and not job.session.finished:
+                job.session.finished = True
+                finishing.append(job.session)
+        if finishing:
+            try:
+                await self.persist(finishing)
+            except BaseException:
+                # 没写进错题本 / 统计就不算结束，客户端可以重新 /finish
+                for session in finishing:
+                    session.finished = False
+                raise
+
+        self.batches += 1
+        self.graded += len(items)
+        for job in batch:
+            if not job.future.done():
+                job.future.set_result(job.results)
@@ -23,7 +23,14 @@ from storage import (
     load_stats,
 )
 from models import Question
-from quiz_engine import _check_answer, _update_stats
+from quiz_engine import (
+    _check_answer,
+    _update_stats,
+    balanced_sample,
+    grade_blank_answer,
+    load_topics,
+    short_answer_hint,
+)
 
 
 def qtype_label(q_type: str) -> str:
@@ -395,7 +402,7 @@ class QuizApp:
 
     def on_start_normal_quiz(self):
         """开始普通刷题。"""
-        all_questions = load_questions_from_file()
+        all_questions = load_topics(load_questions_from_file())
         if not all_questions:
             messagebox.showinfo(
                 "提示",
@@ -435,7 +442,7 @@ class QuizApp:
         if n > len(pool):
             n = len(pool)
 
-        questions = random.sample(pool, k=n)
+        questions = balanced_sample(pool, n)
         self.begin_quiz(questions, mode="normal")
 
     def on_start_wrong_quiz(self):
@@ -651,6 +658,10 @@ class QuizApp:
                 lines.append("")
             lines.append("参考答案：")
             lines.append(answer_text)
+            hint = short_answer_hint(q, user_raw)
+            if hint is not None:
+                lines.append("")
+                lines.append(hint.summary())
             # 简答题结果：用对话框询问会打断节奏，这里改为按钮下方提示 + 自己心里有数
             self.result_label.config(
                 text="简答题已显示参考答案，请自行判断对错。",
@@ -682,6 +693,11 @@ class QuizApp:
                 lines.append(f" - 你的规范化答案：{user_norm or '(空)'}")
                 lines.append(f" - 标准规范答案：{correct_norm or '(未知)'}")
 
+            blank_grade = grade_blank_answer(q, user_raw)
+            if blank_grade is not None and blank_grade.total > 1:
+                lines.append("")
+                lines.append(f"逐空判分：{blank_grade.summary()}")
+
         self._set_feedback_text("\n".join(lines))
 
         # 本轮统计
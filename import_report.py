@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+import_report.py
+
+题库导入的分阶段计时和吞吐统计：
+- 记录每个阶段的耗时：计算哈希、加载 docx（zip/XML）、段落提取、行分类、状态机拼题、
+  构建 Question、写入缓存 / 题库快照等；
+- 解析流水线是一串生成器，几个阶段交替执行。timed() 包住某一级生成器，
+  只把这一级自己的耗时记到它名下（上游生成器的耗时会从中扣掉），各阶段加起来等于总耗时；
+- 同时统计读取字节数、段落数、题目数，算出 段落/秒、题目/秒、MB/秒；
+- summary() 给出一张小表，导入对话框和命令行都直接显示；to_dict() 给出结构化结果；
+  log() 把报告写到 logging（logger 名为 quiz.import），默认不输出，需要时由调用方配置。
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+logger = logging.getLogger("quiz.import")
+
+# 阶段名称（也是报告里显示的文字）
+STAGE_HASH = "计算哈希"
+STAGE_CACHE_READ = "读取解析缓存"
+STAGE_LOAD = "加载 docx"
+STAGE_EXTRACT = "段落提取"
+STAGE_READ = "读取文本"
+STAGE_TOKENIZE = "行分类"
+STAGE_ROWS = "读取+分类"  # CSV 按行直接产出词法单元，读取和分类不再细分
+STAGE_ASSEMBLE = "状态机拼题"
+STAGE_BUILD = "构建 Question"
+STAGE_CACHE_WRITE = "写入解析缓存"
+STAGE_DEDUP = "近似去重"
+STAGE_SAVE = "写入题库 JSON"
+
+
+@dataclass
+class ImportReport:
+    source: str = ""
+    file_bytes: int = 0
+    paragraphs: int = 0
+    questions: int = 0
+    cache_hit: Optional[bool] = None
+    cache_note: str = ""
+    # 阶段名 → 秒（按第一次出现的顺序）
+    stages: Dict[str, float] = field(default_factory=dict)
+    _active: List[str] = field(default_factory=list, repr=False)
+
+    def begin(self, path: str):
+        """记下源文件和大小（重复调用无副作用）。"""
+        if self.source != path or not self.file_bytes:
+            self.source = path
+            try:
+                self.file_bytes = os.path.getsize(path)
+            except OSError:
+                self.file_bytes = 0
+
+    # ---------- 计时 ----------
+
+    def _charge(self, name: str, seconds: float):
+        self._active.pop()
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+        if self._active:
+            # 这段时间发生在外层阶段里面，外层只算它自己的部分
+            outer = self._active[-1]
+            self.stages[outer] = self.stages.get(outer, 0.0) - seconds
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str):
+        self._active.append(name)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._charge(name, time.perf_counter() - t0)
+
+    def timed(self, iterable: Iterable[T], name: str, counter: str = "") -> Iterator[T]:
+        """
+        包住一级生成器：每次取下一个元素的耗时记到 name 名下。
+        counter 为属性名（如 "paragraphs"）时，顺便累计产出的元素个数。
+        """
+        it = iter(iterable)
+        perf = time.perf_counter
+        active = self._active
+        n = 0
+        try:
+            while True:
+                active.append(name)
+                t0 = perf()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+                finally:
+                    self._charge(name, perf() - t0)
+                n += 1
+                yield item
+        finally:
+            if counter:
+                setattr(self, counter, getattr(self, counter) + n)
+
+    # ---------- 汇总 ----------
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.stages.values())
+
+    def rates(self) -> Dict[str, float]:
+        total = self.total_seconds
+        if total <= 0:
+            return {"paragraphs_per_sec": 0.0, "questions_per_sec": 0.0, "mb_per_sec": 0.0}
+        return {
+            "paragraphs_per_sec": self.paragraphs / total,
+            "questions_per_sec": self.questions / total,
+            "mb_per_sec": self.file_bytes / 1024 / 1024 / total,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "file_bytes": self.file_bytes,
+            "paragraphs": self.paragraphs,
+            "questions": self.questions,
+            "cache_hit": self.cache_hit,
+            "stages_ms": {name: round(sec * 1000.0, 3) for name, sec in self.stages.items()},
+            "total_ms": round(self.total_seconds * 1000.0, 3),
+            **{k: round(v, 1) for k, v in self.rates().items()},
+        }
+
+    def summary(self) -> str:
+        total = self.total_seconds
+        name = os.path.basename(self.source) or "（未知文件）"
+        lines = [f"导入耗时分解：{name}（{self.file_bytes / 1024:.0f} KB）"]
+        for stage, sec in self.stages.items():
+            share = sec * 100.0 / total if total > 0 else 0.0
+            lines.append(f"  {stage:<12}{sec * 1000.0:>9.1f} ms  {share:>5.1f}%")
+        lines.append(f"  {'合计':<12}{total * 1000.0:>9.1f} ms")
+        rates = self.rates()
+        paragraphs = (
+            f"段落 {self.paragraphs}（{rates['paragraphs_per_sec']:,.0f} 段/秒）· "
+            if self.paragraphs
+            else ""
+        )
+        lines.append(
+            f"{paragraphs}题目 {self.questions}（{rates['questions_per_sec']:,.0f} 题/秒）· "
+            f"读取 {rates['mb_per_sec']:.1f} MB/秒"
+        )
+        if self.cache_note:
+            lines.append(self.cache_note)
+        return "\n".join(lines)
+
+    def log(self, level: int = logging.INFO, log: Optional[logging.Logger] = None):
+        (log or logger).log(level, "%s", self.summary())
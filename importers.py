@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+importers.py
+
+可插拔的题库导入器：除了 Word（.docx），还支持纯文本、Markdown 和 CSV 题库。
+- 每种来源实现 iter_tokens(path)，逐行惰性读取文件，产出与 question_parser 相同的词法单元，
+  再交给同一个状态机（question_parser.assemble_questions）拼题；
+- 文本类来源只需要实现 iter_lines，行分类复用 question_parser.tokenize_lines；
+- 读取过程是流式的：几百 MB 的导出文件也只占用一行的缓冲，不会整份读进内存，
+  也不需要先转换成 Word；
+- 按扩展名选择导入器（IMPORTERS），新格式只需要注册一个子类。
+
+纯文本 / Markdown 的排版与 Word 题库相同：
+    一、单选题
+    1、题干
+    A、选项
+    正确答案：A
+Markdown 会先去掉标题井号、列表符号、引用符号，成对的加粗 / 斜体 / 行内代码标记只去掉标记本身，
+代码块整体忽略；填空题的下划线、标识符里的下划线和算式里的乘号原样保留。
+
+CSV 第一行是表头，列名可以是中文或英文（不区分大小写）：
+    题号/id, 题型/type, 题干/question, A, B, C, D, 答案/answer
+题型列可写 single / blank / tf / short 或 单选 / 填空 / 判断 / 简答；缺少题型列时按答案内容推断。
+"""
+
+from __future__ import annotations
+
+import codecs
+import csv
+import os
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+
+import config
+from import_report import STAGE_ASSEMBLE, STAGE_BUILD, STAGE_READ, STAGE_ROWS, STAGE_TOKENIZE, ImportReport
+from models import Question
+from question_parser import (
+    TOK_ANSWER,
+    TOK_OPTION,
+    TOK_QUESTION,
+    TOK_SECTION,
+    TOK_TEXT,
+    _build_questions,
+    _detect_qtype_from_section,
+    assemble_questions,
+    iter_paragraph_texts,
+    parse_docx_to_questions,
+    tokenize_lines,
+)
+
+Token = Tuple[int, Any, str, str]
+
+# 每次从磁盘读取的字节数
+READ_CHUNK = 256 * 1024
+
+
+def _sniff_encoding(path: str) -> str:
+    """导出的中文题库常见 UTF-8（可能带 BOM）和 GBK 两种编码，用文件开头判断。"""
+    with open(path, "rb") as f:
+        head = f.read(READ_CHUNK)
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        # final=False：开头这一块末尾可能截断在多字节字符中间
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "gb18030"
+
+
+class BankSource:
+    """题库来源的基类：子类实现 iter_lines 或直接实现 iter_tokens。"""
+
+    extensions: Tuple[str, ...] = ()
+    label = ""
+
+    def iter_lines(self, path: str) -> Iterator[str]:
+        raise NotImplementedError
+
+    def iter_tokens(self, path: str, report: Optional[ImportReport] = None) -> Iterator[Token]:
+        lines = self.iter_lines(path)
+        if report is None:
+            return tokenize_lines(lines)
+        lines = report.timed(lines, STAGE_READ, counter="paragraphs")
+        return report.timed(tokenize_lines(lines), STAGE_TOKENIZE)
+
+    def parse(self, path: str, report: Optional[ImportReport] = None) -> List[Question]:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"找不到题库文件：{path}")
+        if report is None:
+            return _build_questions(assemble_questions(self.iter_tokens(path)))
+        report.begin(path)
+        with report.stage(STAGE_ASSEMBLE):
+            raw_list = assemble_questions(self.iter_tokens(path, report))
+        with report.stage(STAGE_BUILD):
+            questions = _build_questions(raw_list)
+        report.questions = len(questions)
+        return questions
+
+
+class DocxSource(BankSource):
+    extensions = (".docx",)
+    label = "Word 文档"
+
+    def iter_lines(self, path: str) -> Iterator[str]:
+        from docx import Document
+
+        return iter_paragraph_texts(Document(path))
+
+    def parse(self, path: str, report: Optional[ImportReport] = None) -> List[Question]:
+        # 走 question_parser 自己的流程，报告里能把 zip/XML 加载和段落提取分开计时
+        return parse_docx_to_questions(path, report=report)
+
+
+class TextSource(BankSource):
+    extensions = (".txt",)
+    label = "纯文本"
+
+    def iter_lines(self, path: str) -> Iterator[str]:
+        encoding = _sniff_encoding(path)
+        # 文本模式的文件对象本身就是按块缓冲、逐行迭代的
+        with open(path, "r", encoding=encoding, errors="replace", newline=None) as f:
+            yield from f
+
+
+_MD_HEADING = re.compile(r"^\s{0,3}#{1,6}\s+")
+_MD_BULLET = re.compile(r"^\s*(?:[-*+]\s+|>\s?)+")
+# 成对出现的强调标记才剥掉，内容首尾不能是空白或标记字符本身，紧挨英文字母 / 数字的不算：
+# “____” 这样的填空下划线、max_len、2*3*4 都不会被误伤；行内代码里的内容原样保留
+_MD_CODE_SPAN = re.compile(r"`([^`]+)`")
+_MD_EMPHASIS = (
+    re.compile(r"\*\*(?=[^*\s])(.+?)(?<=[^*\s])\*\*"),
+    re.compile(r"(?<![A-Za-z0-9_])__(?=[^_\s])(.+?)(?<=[^_\s])__(?![A-Za-z0-9_])"),
+    re.compile(r"(?<![A-Za-z0-9*])\*(?=[^*\s])(.+?)(?<=[^*\s])\*(?![A-Za-z0-9*])"),
+    re.compile(r"(?<![A-Za-z0-9_])_(?=[^_\s])(.+?)(?<=[^_\s])_(?![A-Za-z0-9_])"),
+)
+
+
+def _strip_emphasis(line: str) -> str:
+    parts = _MD_CODE_SPAN.split(line)
+    # split 之后奇数位置是行内代码的内容
+    for i in range(0, len(parts), 2):
+        for pattern in _MD_EMPHASIS:
+            parts[i] = pattern.sub(r"\1", parts[i])
+    return "".join(parts)
+
+
+_MD_FENCE = re.compile(r"^\s*(```|~~~)")
+
+
+class MarkdownSource(TextSource):
+    extensions = (".md", ".markdown")
+    label = "Markdown"
+
+    def iter_lines(self, path: str) -> Iterator[str]:
+        in_fence = False
+        for line in super().iter_lines(path):
+            if _MD_FENCE.match(line):
+                in_fence = not in_fence
+                continue
+            if in_fence:
+                continue
+            line = _MD_HEADING.sub("", line)
+            line = _MD_BULLET.sub("", line)
+            yield _strip_emphasis(line)
+
+
+# CSV 列名别名 → 统一字段名
+_CSV_COLUMNS = {
+    "题号": "id", "编号": "id", "id": "id", "no": "id",
+    "题型": "type", "类型": "type", "type": "type", "q_type": "type",
+    "题干": "question", "题目": "question", "question": "question",
+    "答案": "answer", "正确答案": "answer", "answer": "answer",
+    "解析": "explanation", "explanation": "explanation",
+}
+_CSV_TYPES = {
+    config.QTYPE_SINGLE: config.QTYPE_SINGLE,
+    config.QTYPE_BLANK: config.QTYPE_BLANK,
+    config.QTYPE_TF: config.QTYPE_TF,
+    config.QTYPE_SHORT: config.QTYPE_SHORT,
+}
+
+
+class CsvSource(BankSource):
+    """CSV 每行就是一道题，直接产出词法单元，单元格里的换行不会被误当成新题。"""
+
+    extensions = (".csv",)
+    label = "CSV"
+
+    def __init__(self):
+        # 解析列：题号 → 解析文本
+        self._explanations: Dict[int, str] = {}
+
+    def _columns(self, header: List[str]) -> Dict[str, int]:
+        cols: Dict[str, int] = {}
+        for i, name in enumerate(header):
+            key = name.strip().lstrip("﻿")
+            upper = key.upper()
+            if len(upper) == 1 and upper in "ABCDＡＢＣＤ":
+                cols["opt_" + upper] = i
+                continue
+            field = _CSV_COLUMNS.get(key.lower()) or _CSV_COLUMNS.get(key)
+            if field and field not in cols:
+                cols[field] = i
+        if "question" not in cols or "answer" not in cols:
+            raise ValueError("CSV 表头至少需要“题干 / question”和“答案 / answer”两列")
+        return cols
+
+    @staticmethod
+    def _qtype(value: str) -> Optional[str]:
+        value = value.strip()
+        return _CSV_TYPES.get(value.lower()) or _detect_qtype_from_section(value)
+
+    def iter_tokens(self, path: str, report: Optional[ImportReport] = None) -> Iterator[Token]:
+        tokens = self._row_tokens(path, report)
+        return tokens if report is None else report.timed(tokens, STAGE_ROWS)
+
+    def _row_tokens(self, path: str, report: Optional[ImportReport]) -> Iterator[Token]:
+        encoding = _sniff_encoding(path)
+        with open(path, "r", encoding=encoding, errors="replace", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return
+            cols = self._columns(header)
+            option_cols = sorted((k[-1], i) for k, i in cols.items() if k.startswith("opt_"))
+
+            def cell(row: List[str], name: str) -> str:
+                i = cols.get(name)
+                return row[i].strip() if i is not None and i < len(row) else ""
+
+            current_type: Optional[str] = None
+            auto_id = 0
+            for row in reader:
+                if not any(c.strip() for c in row):
+                    continue
+                auto_id += 1
+                if report is not None:
+                    report.paragraphs += 1
+                q_type = self._qtype(cell(row, "type")) if "type" in cols else None
+                if q_type != current_type:
+                    # 题型变化时相当于 Word 里的一个新大标题
+                    yield TOK_SECTION, q_type, "", ""
+                    current_type = q_type
+
+                raw_id = cell(row, "id")
+                number = int(raw_id) if raw_id.isdigit() else auto_id
+                text_lines = cell(row, "question").splitlines() or [""]
+                yield TOK_QUESTION, number, text_lines[0].strip(), ""
+                for line in text_lines[1:]:
+                    if line.strip():
+                        yield TOK_TEXT, line.strip(), "", line.strip()
+                for label, i in option_cols:
+                    value = row[i].strip() if i < len(row) else ""
+                    if value:
+                        yield TOK_OPTION, {"Ａ": "A", "Ｂ": "B", "Ｃ": "C", "Ｄ": "D"}.get(label, label), value, ""
+                explanation = cell(row, "explanation")
+                if explanation:
+                    self._explanations[number] = explanation
+                answer_lines = cell(row, "answer").splitlines() or [""]
+                yield TOK_ANSWER, answer_lines[0].strip(), "", ""
+                for line in answer_lines[1:]:
+                    if line.strip():
+                        yield TOK_TEXT, line.strip(), "", line.strip()
+
+    def parse(self, path: str, report: Optional[ImportReport] = None) -> List[Question]:
+        self._explanations = {}
+        questions = super().parse(path, report)
+        # 解析列不经过状态机，读取时顺手按题号记下，拼完题再补回去
+        for q in questions:
+            q.explanation = self._explanations.get(q.id, q.explanation)
+        return questions
+
+
+IMPORTERS: Dict[str, Type[BankSource]] = {}
+
+
+def register_importer(source: Type[BankSource]):
+    for ext in source.extensions:
+        IMPORTERS[ext] = source
+
+
+for _source in (DocxSource, TextSource, MarkdownSource, CsvSource):
+    register_importer(_source)
+
+
+def supported_extensions() -> List[str]:
+    return sorted(IMPORTERS)
+
+
+def importer_for(path: str) -> BankSource:
+    ext = os.path.splitext(path)[1].lower()
+    source = IMPORTERS.get(ext)
+    if source is None:
+        raise ValueError(f"不支持的题库格式：{ext or '（无扩展名）'}，可用格式：{' '.join(supported_extensions())}")
+    return source()
+
+
+def parse_bank_file(path: str, report: Optional[ImportReport] = None) -> List[Question]:
+    """按扩展名选择导入器解析题库文件；传入 report 时记录各阶段耗时。"""
+    return importer_for(path).parse(path, report)
@@ -0,0 +1,483 @@
+# -*- coding: utf-8 -*-
+"""
+item_stats.py
+
+题目难度和区分度分析（经典测量理论 + 可选 IRT），数据来自所有学习者档案的作答历史（history.jsonl）：
+- 作答记录按列读成 NumPy 数组（题号、作答单元、对错），之后所有统计都是 bincount / 向量运算，
+  不按题目或按人循环，百万条记录几秒内算完（大部分时间花在解析 JSON 上，按批一次解析）；
+- “作答单元”相当于测验里的一名考生：同一档案里相邻两条记录间隔超过 SESSION_GAP 秒就算新的一轮，
+  每一轮是一个单元（单机使用时档案很少，按轮次划分才有足够的样本估计区分度）；
+- p 值（通过率）= 答对次数 / 作答次数，难度 = 1 - p；
+- 区分度用点二列相关：该题对错与“同一单元其余题目的正确率”（扣除本题，避免自相关）之间的相关系数；
+- 可选 IRT（config.ITEM_IRT_MODEL = "1pl" / "2pl"）：Rasch / 两参数 logistic 模型，
+  联合最大后验估计（能力、难度取 N(0, 1) 先验，区分度取以 1 为中心的先验，避免极端题发散），
+  每轮对能力、难度、区分度依次各做一次对角 Newton 更新，全部向量化，一般一二十轮收敛；
+- 结果按题库保存到 config.ITEM_STATS_DIR/<bank_id>.json，同时记下拟合时作答历史的总字节数；
+  界面上取参数（item_stats_for_bank）时立即返回保存的结果（按文件修改时间缓存在内存里），
+  作答历史比上次拟合时增长超过 ITEM_REFIT_GROWTH 才在后台线程里重算，不阻塞界面，
+  算完写回文件，下次取参数时生效；后台重算的开始 / 结束 / 失败写到 logging（logger 名为 quiz.item_stats），
+  最近一次失败的原因可以用 refresh_error 取到，界面据此提示，而不是悄悄没有结果；
+- 作答次数少于 ITEM_MIN_ATTEMPTS 的题不给难度分档（band 为空），抽题按难度筛选时不会选到。
+
+难度分档（按 p 值）：p ≥ DIFFICULTY_EASY_P 为“容易”，p < DIFFICULTY_HARD_P 为“较难”，其余为“中等”。
+
+命令行用法（重算某个题库的参数并列出最难的题）：
+    python item_stats.py --bank default --irt 2pl --top 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import config
+import profiles
+from models import Question
+
+ITEM_STATS_DIR = getattr(config, "ITEM_STATS_DIR", os.path.join(config.BASE_DIR, "data", "item_stats"))
+ITEM_MIN_ATTEMPTS = getattr(config, "ITEM_MIN_ATTEMPTS", 5)
+ITEM_IRT_MODEL = getattr(config, "ITEM_IRT_MODEL", "2pl")
+DIFFICULTY_EASY_P = getattr(config, "DIFFICULTY_EASY_P", 0.8)
+DIFFICULTY_HARD_P = getattr(config, "DIFFICULTY_HARD_P", 0.5)
+ITEM_REFIT_GROWTH = getattr(config, "ITEM_REFIT_GROWTH", 0.05)
+
+logger = logging.getLogger("quiz.item_stats")
+
+# 同一档案两条记录相隔超过这么多秒，算作新的一轮
+SESSION_GAP = 30 * 60
+# 读历史文件时每批的大约字节数（后台重算时每批解析占用 GIL 的时间不宜太长）
+_READ_CHUNK = 1024 * 1024
+IRT_MAX_ITERS = 50
+IRT_TOLERANCE = 1e-3
+# 区分度先验的标准差和取值范围
+_A_PRIOR_SD = 0.5
+_A_RANGE = (0.05, 4.0)
+
+BAND_ALL = "all"
+BAND_EASY = "easy"
+BAND_MEDIUM = "medium"
+BAND_HARD = "hard"
+BAND_LABELS = {BAND_EASY: "容易", BAND_MEDIUM: "中等", BAND_HARD: "较难"}
+
+
+@dataclass
+class ItemParams:
+    """一道题的统计参数；rpb / b / a 估计不出来时为 None。"""
+
+    qid: int
+    attempts: int
+    p_value: float
+    rpb: Optional[float] = None
+    b: Optional[float] = None
+    a: Optional[float] = None
+
+    @property
+    def difficulty(self) -> float:
+        return 1.0 - self.p_value
+
+    @property
+    def band(self) -> str:
+        if self.attempts < ITEM_MIN_ATTEMPTS:
+            return ""
+        if self.p_value >= DIFFICULTY_EASY_P:
+            return BAND_EASY
+        if self.p_value < DIFFICULTY_HARD_P:
+            return BAND_HARD
+        return BAND_MEDIUM
+
+    def label(self) -> str:
+        """给列表显示用，例如 "较难 · 通过率 42% · 区分度 0.31"。"""
+        if self.attempts < ITEM_MIN_ATTEMPTS:
+            return f"数据不足（{self.attempts} 次）"
+        text = f"{BAND_LABELS[self.band]} · 通过率 {self.p_value:.0%}"
+        if self.rpb is not None:
+            text += f" · 区分度 {self.rpb:.2f}"
+        return text
+
+    @staticmethod
+    def from_dict(data: Dict) -> "ItemParams":
+        return ItemParams(
+            qid=int(data.get("qid", 0)),
+            attempts=int(data.get("attempts", 0)),
+            p_value=float(data.get("p_value", 0.0)),
+            rpb=data.get("rpb"),
+            b=data.get("b"),
+            a=data.get("a"),
+        )
+
+
+# ---------- 读取作答历史 ----------
+
+def _decode_lines(lines: List[str]) -> List:
+    """一批 JSON 行拼成一个数组一次解析（比逐行 json.loads 快一倍）；有坏行时退回逐行解析并跳过坏行。"""
+    try:
+        return json.loads("[" + ",".join(lines) + "]")
+    except ValueError:
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # 写到一半的最后一行等
+                continue
+        return records
+
+
+def read_history_columns(paths: Sequence[str], bank_id: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    读多个档案的作答历史，返回 (题号, 作答单元, 对错) 三个等长数组。
+    bank_id 给定时只取该题库的记录（老记录没有 bank 字段，算作默认题库）。
+    """
+    qids: List[int] = []
+    source: List[int] = []
+    stamps: List[float] = []
+    correct: List[bool] = []
+    default_bank = profiles.DEFAULT_BANK_ID
+    for k, path in enumerate(paths):
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            while True:
+                lines = [line for line in f.readlines(_READ_CHUNK) if line.strip()]
+                if not lines:
+                    break
+                records = [
+                    r for r in _decode_lines(lines)
+                    if isinstance(r, dict) and "qid" in r
+                    and (bank_id is None or r.get("bank", default_bank) == bank_id)
+                ]
+                qids.extend(r["qid"] for r in records)
+                stamps.extend(r.get("ts", 0.0) for r in records)
+                correct.extend(bool(r.get("correct")) for r in records)
+                source.extend([k] * len(records))
+
+    qid_arr = np.asarray(qids, dtype=np.int64)
+    y = np.asarray(correct, dtype=np.float64)
+    units = _session_units(np.asarray(source, dtype=np.int64), np.asarray(stamps, dtype=np.float64))
+    return qid_arr, units, y
+
+
+def _session_units(source: np.ndarray, ts: np.ndarray) -> np.ndarray:
+    """按 (档案, 时间) 排序后，档案变化或间隔超过 SESSION_GAP 处切开，给每条记录编上作答单元号。"""
+    if not len(ts):
+        return np.zeros(0, dtype=np.int64)
+    order = np.lexsort((ts, source))
+    s, t = source[order], ts[order]
+    new_unit = np.empty(len(t), dtype=bool)
+    new_unit[0] = True
+    new_unit[1:] = (s[1:] != s[:-1]) | (np.diff(t) > SESSION_GAP)
+    units = np.empty(len(t), dtype=np.int64)
+    units[order] = np.cumsum(new_unit) - 1
+    return units
+
+
+# ---------- 估计 ----------
+
+def _point_biserial(item: np.ndarray, unit: np.ndarray, y: np.ndarray, n_items: int) -> np.ndarray:
+    """每道题的点二列相关（对错 vs 同一单元其余题的正确率），样本不足或无方差时为 NaN。"""
+    n_u = np.bincount(unit).astype(np.float64)
+    s_u = np.bincount(unit, weights=y)
+    others = n_u[unit] - 1
+    ok = others > 0
+    rest = np.zeros_like(y)
+    rest[ok] = (s_u[unit][ok] - y[ok]) / others[ok]
+
+    it, yy, rr = item[ok], y[ok], rest[ok]
+    n = np.bincount(it, minlength=n_items).astype(np.float64)
+    sy = np.bincount(it, weights=yy, minlength=n_items)
+    sr = np.bincount(it, weights=rr, minlength=n_items)
+    syr = np.bincount(it, weights=yy * rr, minlength=n_items)
+    srr = np.bincount(it, weights=rr * rr, minlength=n_items)
+    cov = n * syr - sy * sr
+    var_y = n * sy - sy * sy  # y 只取 0 / 1，Σy² = Σy
+    var_r = n * srr - sr * sr
+    denom = np.sqrt(var_y * var_r)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = np.where((denom > 1e-12) & (n >= 3), cov / denom, np.nan)
+    return r
+
+
+def _fit_irt(item: np.ndarray, unit: np.ndarray, y: np.ndarray, n_items: int, model: str) -> Tuple[np.ndarray, np.ndarray]:
+    """联合最大后验估计 1PL / 2PL，返回 (难度 b, 区分度 a)。"""
+    n_units = int(unit.max()) + 1
+    n_i = np.bincount(item, minlength=n_items).astype(np.float64)
+    p = (np.bincount(item, weights=y, minlength=n_items) + 0.5) / (n_i + 1.0)
+    b = -np.log(p / (1.0 - p))
+    a = np.ones(n_items)
+    theta = np.zeros(n_units)
+    a_prior = 1.0 / (_A_PRIOR_SD * _A_PRIOR_SD)
+
+    def residuals():
+        ai = a[item]
+        d = theta[unit] - b[item]
+        prob = 1.0 / (1.0 + np.exp(-ai * d))
+        return ai, d, y - prob, prob * (1.0 - prob)
+
+    for _ in range(IRT_MAX_ITERS):
+        b_old, a_old = b.copy(), a.copy()
+        ai, d, r, w = residuals()
+        theta += (np.bincount(unit, weights=ai * r, minlength=n_units) - theta) / (
+            np.bincount(unit, weights=ai * ai * w, minlength=n_units) + 1.0
+        )
+        ai, d, r, w = residuals()
+        b += (-np.bincount(item, weights=ai * r, minlength=n_items) - b) / (
+            np.bincount(item, weights=ai * ai * w, minlength=n_items) + 1.0
+        )
+        if model == "2pl":
+            ai, d, r, w = residuals()
+            a = np.clip(
+                a + (np.bincount(item, weights=r * d, minlength=n_items) - (a - 1.0) * a_prior)
+                / (np.bincount(item, weights=w * d * d, minlength=n_items) + a_prior),
+                *_A_RANGE,
+            )
+
+        # 模型只能确定 a(θ - b)：能力均值固定为 0；2PL 再把能力标准差固定为 1，否则 a 会一路漂移
+        shift = theta.mean()
+        scale = float(theta.std()) if model == "2pl" else 1.0
+        scale = scale if scale > 1e-6 else 1.0
+        theta = (theta - shift) / scale
+        b = (b - shift) / scale
+        a = np.clip(a * scale, *_A_RANGE)
+        # 极易 / 极难的题收敛得很慢，按题目参数的平均变化量判断收敛
+        if max(np.abs(b - b_old).mean(), np.abs(a - a_old).mean()) < IRT_TOLERANCE:
+            break
+    return b, a
+
+
+def fit_item_params(
+    qids: np.ndarray, units: np.ndarray, y: np.ndarray, irt: Optional[str] = None
+) -> Dict[int, ItemParams]:
+    """由作答数组估计每道题的参数；irt 为 None 时使用 config.ITEM_IRT_MODEL（"off" 不拟合 IRT）。"""
+    if not len(qids):
+        return {}
+    irt = ITEM_IRT_MODEL if irt is None else irt
+    items, item = np.unique(qids, return_inverse=True)
+    n_items = len(items)
+    attempts = np.bincount(item, minlength=n_items)
+    p = np.bincount(item, weights=y, minlength=n_items) / attempts
+    rpb = _point_biserial(item, units, y, n_items)
+    if irt in ("1pl", "2pl"):
+        b, a = _fit_irt(item, units, y, n_items, irt)
+    else:
+        b = a = None
+
+    result: Dict[int, ItemParams] = {}
+    for j, qid in enumerate(items.tolist()):
+        result[qid] = ItemParams(
+            qid=qid,
+            attempts=int(attempts[j]),
+            p_value=round(float(p[j]), 4),
+            rpb=None if math.isnan(rpb[j]) else round(float(rpb[j]), 4),
+            b=None if b is None else round(float(b[j]), 4),
+            a=None if a is None or irt != "2pl" else round(float(a[j]), 4),
+        )
+    return result
+
+
+# ---------- 保存 / 读取 ----------
+
+def _history_paths() -> List[str]:
+    return [profiles.get_profile(name).history_path for name in profiles.list_profiles()]
+
+
+def _stats_path(bank_id: str) -> str:
+    return os.path.join(ITEM_STATS_DIR, f"{bank_id}.json")
+
+
+def _history_bytes(paths: Sequence[str]) -> int:
+    return sum(os.path.getsize(p) for p in paths if os.path.exists(p))
+
+
+def save_item_stats(
+    bank_id: str, params: Dict[int, ItemParams], model: str, attempts: int, history_bytes: int = 0
+) -> None:
+    os.makedirs(ITEM_STATS_DIR, exist_ok=True)
+    data = {
+        "bank": bank_id,
+        "updated_at": time.time(),
+        "model": model,
+        "attempts": attempts,
+        "history_bytes": history_bytes,
+        "items": [asdict(p) for p in params.values()],
+    }
+    path = _stats_path(bank_id)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def _read_saved(bank_id: str) -> Tuple[Dict[int, ItemParams], Optional[int]]:
+    """读保存的参数和拟合时的作答历史字节数（没有结果文件时字节数为 None）。"""
+    try:
+        with open(_stats_path(bank_id), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}, None
+    if not isinstance(data, dict):
+        return {}, None
+    params = {p.qid: p for p in map(ItemParams.from_dict, data.get("items") or [])}
+    # 老版本的结果文件没有记字节数：当作过期，后台重算一次
+    history_bytes = data.get("history_bytes")
+    return params, history_bytes if isinstance(history_bytes, int) else None
+
+
+def load_item_stats(bank_id: str) -> Dict[int, ItemParams]:
+    return _read_saved(bank_id)[0]
+
+
+def compute_item_stats(bank_id: str, irt: Optional[str] = None) -> Dict[int, ItemParams]:
+    """从所有档案的作答历史重算某个题库的参数并保存。"""
+    irt = ITEM_IRT_MODEL if irt is None else irt
+    paths = _history_paths()
+    # 先记字节数再读：读的过程中新追加的记录留给下一次重算
+    history_bytes = _history_bytes(paths)
+    qids, units, y = read_history_columns(paths, bank_id)
+    params = fit_item_params(qids, units, y, irt)
+    save_item_stats(bank_id, params, irt, len(qids), history_bytes)
+    return params
+
+
+# 内存里的结果：bank_id → (结果文件修改时间, 参数, 拟合时的历史字节数)
+_loaded: Dict[str, Tuple[int, Dict[int, ItemParams], Optional[int]]] = {}
+_refreshing: Dict[str, threading.Thread] = {}
+# 后台重算最近一次失败的原因：bank_id → 错误说明；重算成功后清除
+_refresh_errors: Dict[str, str] = {}
+_refresh_lock = threading.Lock()
+
+
+def _saved_params(bank_id: str) -> Tuple[Dict[int, ItemParams], Optional[int]]:
+    try:
+        mtime = os.stat(_stats_path(bank_id)).st_mtime_ns
+    except OSError:
+        return {}, None
+    cached = _loaded.get(bank_id)
+    if cached is not None and cached[0] == mtime:
+        return cached[1], cached[2]
+    params, history_bytes = _read_saved(bank_id)
+    _loaded[bank_id] = (mtime, params, history_bytes)
+    return params, history_bytes
+
+
+def is_stale(saved_bytes: Optional[int], current_bytes: int) -> bool:
+    """作答历史比上次拟合时增长超过 ITEM_REFIT_GROWTH（或被清空过）时需要重算。"""
+    if saved_bytes is None or current_bytes < saved_bytes:
+        return True
+    return current_bytes > saved_bytes * (1.0 + ITEM_REFIT_GROWTH)
+
+
+def _refresh(bank_id: str):
+    logger.info("题库 %s：后台重算题目难度统计", bank_id)
+    started = time.perf_counter()
+    try:
+        params = compute_item_stats(bank_id)
+    except Exception as e:
+        logger.exception("题库 %s：题目难度统计重算失败", bank_id)
+        _refresh_errors[bank_id] = str(e) or type(e).__name__
+        return
+    _refresh_errors.pop(bank_id, None)
+    logger.info("题库 %s：题目难度统计已更新（%d 道题，%.2f 秒）", bank_id, len(params), time.perf_counter() - started)
+
+
+def refresh_in_background(bank_id: str) -> bool:
+    """在后台线程里重算（同一题库同时只有一个线程）；新开了线程时返回 True。"""
+    with _refresh_lock:
+        running = _refreshing.get(bank_id)
+        if running is not None and running.is_alive():
+            return False
+        worker = threading.Thread(target=_refresh, args=(bank_id,), name=f"item-stats-{bank_id}", daemon=True)
+        _refreshing[bank_id] = worker
+    worker.start()
+    return True
+
+
+def is_refreshing(bank_id: str) -> bool:
+    running = _refreshing.get(bank_id)
+    return running is not None and running.is_alive()
+
+
+def refresh_error(bank_id: str) -> Optional[str]:
+    """最近一次后台重算失败的原因；没有失败（或之后已经重算成功）时返回 None。"""
+    return _refresh_errors.get(bank_id)
+
+
+def item_stats_for_bank(bank_id: str, wait: bool = False) -> Dict[int, ItemParams]:
+    """
+    取某个题库的参数：立即返回保存的结果；作答历史增长超过阈值时在后台重算，
+    算完后下一次调用拿到新结果。wait=True 时改为就地重算并返回新结果（命令行 / 脚本用）。
+    """
+    params, saved_bytes = _saved_params(bank_id)
+    if is_stale(saved_bytes, _history_bytes(_history_paths())):
+        if wait:
+            return compute_item_stats(bank_id)
+        refresh_in_background(bank_id)
+    return params
+
+
+# ---------- 按难度抽题 / 排序 ----------
+
+def filter_by_band(pool: Iterable[Question], params: Dict[int, ItemParams], band: str) -> List[Question]:
+    """只保留指定难度档的题；band 为 "all" 时原样返回。"""
+    if band == BAND_ALL:
+        return list(pool)
+    return [q for q in pool if q.id in params and params[q.id].band == band]
+
+
+def sort_by_difficulty(questions: Iterable[Question], params: Dict[int, ItemParams], hardest_first: bool = True) -> List[Question]:
+    """按难度排序；有 IRT 难度时用 b，否则用 1 - p；数据不足的题排在最后。"""
+
+    def key(q: Question):
+        p = params.get(q.id)
+        if p is None or p.attempts < ITEM_MIN_ATTEMPTS:
+            return (1, 0.0, q.id)
+        d = p.b if p.b is not None else p.difficulty
+        return (0, -d if hardest_first else d, q.id)
+
+    return sorted(questions, key=key)
+
+
+def main():
+    from bank_registry import BankRegistry
+
+    parser = argparse.ArgumentParser(description="题目难度 / 区分度分析（基于所有档案的作答历史）")
+    parser.add_argument("--bank", default=None, help="题库 id（默认当前题库）")
+    parser.add_argument("--irt", choices=["off", "1pl", "2pl"], default=ITEM_IRT_MODEL, help="是否拟合 IRT 模型")
+    parser.add_argument("--top", type=int, default=20, help="列出最难的多少道题")
+    args = parser.parse_args()
+
+    registry = BankRegistry()
+    bank_id = args.bank or (registry.active.bank_id if registry.active else profiles.DEFAULT_BANK_ID)
+    t0 = time.perf_counter()
+    paths = _history_paths()
+    history_bytes = _history_bytes(paths)
+    qids, units, y = read_history_columns(paths, bank_id)
+    t1 = time.perf_counter()
+    params = fit_item_params(qids, units, y, args.irt)
+    t2 = time.perf_counter()
+    save_item_stats(bank_id, params, args.irt, len(qids), history_bytes)
+    print(
+        f"题库 {bank_id}：{len(qids)} 条作答、{len(np.unique(units))} 个作答单元、{len(params)} 道题；"
+        f"读取 {t1 - t0:.2f} 秒，估计 {t2 - t1:.2f} 秒"
+    )
+
+    by_id = {q.id: q for q in registry.questions(bank_id, topics=False)}
+    ranked = sort_by_difficulty([q for q in by_id.values() if q.id in params], params)
+    for q in ranked[: args.top]:
+        p = params[q.id]
+        irt = f" · b={p.b:+.2f}" if p.b is not None else ""
+        irt += f" · a={p.a:.2f}" if p.a is not None else ""
+        text = " ".join(q.question.split())
+        print(f"#{q.id:<5} {p.label()}{irt}  {text[:30]}")
+
+
+if __name__ == "__main__":
+    main()
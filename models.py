@@ -4,8 +4,8 @@ models.py
 定义题目等数据结构。
 """
 
-from dataclasses import dataclass, asdict
-from typing import Dict, Any
+from dataclasses import dataclass, asdict, field
+from typing import Dict, Any, List
 
 
 @dataclass
@@ -20,6 +20,9 @@ class Question:
     - source: 来源信息（例如 "questions.docx#Q15"）
     - explanation: 解析（目前没用，先留空）
     - wrong_count: 做错次数（用于错题本）
+    - blanks: 填空题每空的可接受答案（导入时由 answer 拆分、归一化好，见 blank_answers.py）
+    - short_ref: 简答题参考答案的 n-gram TF-IDF 向量和关键词（导入时算好，见 short_answer.py）
+    - topic: 自动聚类得到的话题名（载入题库时补上，见 topics.py），空串表示未分话题
     """
     id: int
     q_type: str
@@ -29,6 +32,9 @@ class Question:
     source: str = ""
     explanation: str = ""
     wrong_count: int = 0
+    blanks: List[List[str]] = field(default_factory=list)
+    short_ref: Dict[str, Any] = field(default_factory=dict)
+    topic: str = ""
 
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -55,4 +61,7 @@ class Question:
             source=data.get("source", ""),
             explanation=data.get("explanation", ""),
             wrong_count=int(data.get("wrong_count", 0) or 0),
+            blanks=data.get("blanks", []) or [],
+            short_ref=data.get("short_ref", {}) or {},
+            topic=data.get("topic", "") or "",
         )
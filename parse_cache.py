@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+parse_cache.py
+
+Word 题库的解析结果缓存（按文件内容寻址）：
+- 以 .docx 文件内容的 SHA-256 作为键，缓存 parse_docx_to_questions 的结果（Question 列表的 JSON）；
+- 同一份题库重复导入（改了文件名、重新下载）都能命中，直接读 JSON，
+  命中时连 python-docx 都不需要导入；
+- 缓存文件带上解析器版本号，解析规则更新后旧缓存自动失效；
+- 缓存目录总大小有上限，超出时按最近使用时间（文件 mtime，命中时刷新）淘汰最旧的条目；
+- 其他格式（.txt / .md / .csv）的题库同样缓存，键里额外带上扩展名，
+  同样的内容换个格式会按不同规则解析；
+- 累计的命中 / 未命中次数记在缓存目录的 stats.json 里，导入时可以给出报告；
+  各阶段耗时记入调用方传入的 ImportReport。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import config
+from import_report import STAGE_CACHE_READ, STAGE_CACHE_WRITE, STAGE_HASH, ImportReport
+from models import Question
+
+PARSE_CACHE_DIR = getattr(config, "PARSE_CACHE_DIR", os.path.join(config.BASE_DIR, "data", "parse_cache"))
+PARSE_CACHE_MAX_BYTES = getattr(config, "PARSE_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+
+# 解析规则有变化时加一，旧缓存随之失效
+PARSER_VERSION = 5
+
+_STATS_NAME = "stats.json"
+
+
+@dataclass
+class CacheReport:
+    """一次导入的缓存情况，以及缓存目录的累计统计。"""
+
+    digest: str
+    hit: bool
+    elapsed: float
+    hits: int
+    misses: int
+    entries: int
+    total_bytes: int
+
+    def summary(self) -> str:
+        state = "命中" if self.hit else "未命中"
+        return (
+            f"解析缓存{state}（耗时 {self.elapsed:.2f} 秒）· "
+            f"累计命中 {self.hits} 次 / 未命中 {self.misses} 次 · "
+            f"缓存 {self.entries} 个题库，{self.total_bytes / 1024 / 1024:.1f} MB"
+        )
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ParseCache:
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir or PARSE_CACHE_DIR
+        self.max_bytes = PARSE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    def _entry_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    # ---------- 累计统计 ----------
+
+    def _read_stats(self) -> Dict[str, int]:
+        path = os.path.join(self.cache_dir, _STATS_NAME)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return {"hits": int(data.get("hits", 0)), "misses": int(data.get("misses", 0))}
+        except Exception:
+            return {"hits": 0, "misses": 0}
+
+    def record_lookup(self, hit: bool) -> Dict[str, int]:
+        stats = self._read_stats()
+        stats["hits" if hit else "misses"] += 1
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(os.path.join(self.cache_dir, _STATS_NAME), "w", encoding="utf-8") as f:
+            json.dump(stats, f)
+        return stats
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """(mtime, 大小, 路径)，按最近使用时间从旧到新排列。"""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        items = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json") or name == _STATS_NAME:
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            items.append((st.st_mtime, st.st_size, path))
+        items.sort()
+        return items
+
+    # ---------- 读写 ----------
+
+    def get(self, digest: str) -> Optional[List[Question]]:
+        path = self._entry_path(digest)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return None
+        if not isinstance(data, dict) or data.get("parser_version") != PARSER_VERSION:
+            return None
+        # 刷新 mtime，作为 LRU 的“最近使用时间”
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return [Question.from_dict(item) for item in data.get("questions", [])]
+
+    def put(self, digest: str, questions: List[Question]):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._entry_path(digest)
+        tmp = path + ".tmp"
+        data = {
+            "parser_version": PARSER_VERSION,
+            "created_at": time.time(),
+            "questions": [q.to_dict() for q in questions],
+        }
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+        self._evict(keep=path)
+
+    def _evict(self, keep: str):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
+
+    def report(self, digest: str, hit: bool, elapsed: float, stats: Dict[str, int]) -> CacheReport:
+        entries = self._entries()
+        return CacheReport(
+            digest=digest,
+            hit=hit,
+            elapsed=elapsed,
+            hits=stats["hits"],
+            misses=stats["misses"],
+            entries=len(entries),
+            total_bytes=sum(size for _, size, _ in entries),
+        )
+
+
+def parse_with_cache(
+    docx_path: str,
+    parse: Optional[Callable[..., List[Question]]] = None,
+    cache: Optional[ParseCache] = None,
+    report: Optional[ImportReport] = None,
+) -> Tuple[List[Question], CacheReport]:
+    """
+    带缓存的解析：命中时直接返回缓存的题目列表，未命中时调用 parse 并写入缓存。
+    parse 默认是 question_parser.parse_docx_to_questions（只在未命中时才导入）。
+    传入 report 时记录哈希 / 读缓存 / 解析 / 写缓存各阶段的耗时，parse 会以 report= 关键字参数调用。
+    """
+    if not os.path.exists(docx_path):
+        raise FileNotFoundError(f"找不到题库文件：{docx_path}")
+    cache = cache or ParseCache()
+    report = report if report is not None else ImportReport()
+    report.begin(docx_path)
+    t0 = time.perf_counter()
+    with report.stage(STAGE_HASH):
+        digest = file_sha256(docx_path)
+    ext = os.path.splitext(docx_path)[1].lower()
+    if ext and ext != ".docx":
+        digest = f"{digest}-{ext[1:]}"
+
+    with report.stage(STAGE_CACHE_READ):
+        questions = cache.get(digest)
+    hit = questions is not None
+    if questions is None:
+        if parse is None:
+            from question_parser import parse_docx_to_questions as parse
+        questions = parse(docx_path, report=report)
+        with report.stage(STAGE_CACHE_WRITE):
+            cache.put(digest, questions)
+
+    stats = cache.record_lookup(hit)
+    cache_report = cache.report(digest, hit, time.perf_counter() - t0, stats)
+    report.questions = len(questions)
+    report.cache_hit = hit
+    report.cache_note = cache_report.summary()
+    return questions, cache_report
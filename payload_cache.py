@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+payload_cache.py
+
+刷题服务的不可变响应缓存：
+- 题库在两次导入之间不会变化，题库概况和题目正文的 JSON 只需要序列化一次；
+- 每个响应体在第一次请求时同时生成 gzip 压缩版，之后直接复用字节串；
+- ETag 由题库指纹（整份题库内容的 SHA-256）加上缓存键组成，
+  题库换了指纹就变，客户端带 If-None-Match 命中时服务端只回 304，不再发送正文；
+- 题目正文按题缓存，条目数有上限（LRU），大题库也只占固定内存。
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Sequence
+
+from models import Question
+
+# 小于这个大小的响应不压缩，gzip 头部开销反而更大
+GZIP_MIN_BYTES = 256
+
+
+def bank_fingerprint(bank: Sequence[Question]) -> str:
+    """
+    计算题库内容指纹。
+
+    共享内存题库（shared_bank.SharedBank）直接对整块内存做哈希；
+    普通列表按 to_dict 的规范化 JSON 计算，只在服务启动时做一次。
+    """
+    fingerprint = getattr(bank, "fingerprint", None)
+    if callable(fingerprint):
+        return fingerprint()
+    h = hashlib.sha256()
+    for q in bank:
+        h.update(json.dumps(q.to_dict(), ensure_ascii=False, sort_keys=True).encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+class CachedPayload:
+    """一份预先序列化好的响应体：原文、gzip 版本和 ETag。"""
+
+    __slots__ = ("body", "gzip_body", "etag")
+
+    def __init__(self, body: bytes, etag: str):
+        self.body = body
+        self.etag = etag
+        self.gzip_body: Optional[bytes] = None
+        if len(body) >= GZIP_MIN_BYTES:
+            packed = gzip.compress(body, compresslevel=6, mtime=0)
+            if len(packed) < len(body):
+                self.gzip_body = packed
+
+
+class PayloadCache:
+    """按键缓存不可变 JSON 响应，ETag 绑定题库指纹。"""
+
+    def __init__(self, version: str, max_entries: int = 4096):
+        self.version = version
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedPayload]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, build: Callable[[], Any]) -> CachedPayload:
+        payload = self._entries.get(key)
+        if payload is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+        self.misses += 1
+        body = json.dumps(build(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        payload = CachedPayload(body, f'"{self.version[:16]}-{key}"')
+        self._entries[key] = payload
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return payload
+
+    def etag(self, key: str) -> str:
+        """不生成正文也能得到 ETag（与 get 返回的一致）。"""
+        return f'"{self.version[:16]}-{key}"'
+
+    def clear(self, version: Optional[str] = None):
+        """题库重新导入后调用：换新指纹并清空所有缓存。"""
+        if version is not None:
+            self.version = version
+        self._entries.clear()
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """解析 If-None-Match（可能是逗号分隔的列表、带 W/ 前缀或 *）。"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            q = params.strip()
+            if not q.startswith("q="):
+                return True
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return False
+    return False
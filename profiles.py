@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+profiles.py
+
+学习者档案：多人共用一台电脑时，各自的学习数据互不覆盖。
+- 每个档案有自己的错题本、收藏夹、统计和作答历史；
+- 题库（questions.json）所有档案共用，切换档案不会重新加载或解析题库；
+- 默认档案沿用项目根目录下原有的 wrong_questions.json / stats.json / favorites.json，
+  老用户升级后数据不需要迁移；
+- 其他档案的数据放在 config.PROFILES_DIR/<档案名>/ 下；
+- 题号只在单个题库内唯一，所以错题本和收藏夹还要按题库再分一层：
+  默认题库用档案本身的文件，其他题库放在 config.PROFILES_DIR/<档案名>/banks/<bank_id>/ 下；
+  统计和作答历史按档案汇总（历史记录里带 bank 字段）；
+- 档案列表和上次使用的档案记录在 config.PROFILES_INDEX_PATH。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+import config
+import storage
+
+PROFILES_DIR = getattr(config, "PROFILES_DIR", os.path.join(config.BASE_DIR, "data", "profiles"))
+PROFILES_INDEX_PATH = getattr(
+    config, "PROFILES_INDEX_PATH", os.path.join(PROFILES_DIR, "profiles.json")
+)
+DEFAULT_PROFILE = getattr(config, "DEFAULT_PROFILE", "默认")
+DEFAULT_BANK_ID = getattr(config, "DEFAULT_BANK_ID", "default")
+
+# 档案名会用作目录名，不允许出现这些字符
+_INVALID_CHARS = set('/\\:*?"<>|')
+MAX_PROFILE_NAME = 32
+
+
+@dataclass
+class Profile:
+    name: str
+    wrong_path: str
+    stats_path: str
+    fav_path: str
+    history_path: str
+
+
+def _read_index() -> Dict[str, Any]:
+    data: Any = None
+    if os.path.exists(PROFILES_INDEX_PATH):
+        try:
+            with open(PROFILES_INDEX_PATH, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            data = None
+    if not isinstance(data, dict):
+        data = {}
+    names = [n for n in data.get("profiles", []) if isinstance(n, str) and n]
+    if DEFAULT_PROFILE not in names:
+        names.insert(0, DEFAULT_PROFILE)
+    active = data.get("active")
+    if active not in names:
+        active = DEFAULT_PROFILE
+    return {"active": active, "profiles": names}
+
+
+def _write_index(index: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(PROFILES_INDEX_PATH), exist_ok=True)
+    with open(PROFILES_INDEX_PATH, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+
+
+def list_profiles() -> List[str]:
+    return _read_index()["profiles"]
+
+
+def active_profile_name() -> str:
+    return _read_index()["active"]
+
+
+def get_profile(name: str, bank_id: str = DEFAULT_BANK_ID) -> Profile:
+    """按档案名（和当前题库）给出各数据文件的路径（不检查档案是否已登记）。"""
+    profile = _profile_paths(name)
+    if bank_id != DEFAULT_BANK_ID:
+        base = os.path.join(PROFILES_DIR, name, "banks", bank_id)
+        profile.wrong_path = os.path.join(base, "wrong_questions.json")
+        profile.fav_path = os.path.join(base, "favorites.json")
+    return profile
+
+
+def _profile_paths(name: str) -> Profile:
+    if name == DEFAULT_PROFILE:
+        return Profile(
+            name=name,
+            wrong_path=config.WRONG_JSON_PATH,
+            stats_path=config.STATS_JSON_PATH,
+            fav_path=getattr(config, "FAV_JSON_PATH", os.path.join(config.BASE_DIR, "favorites.json")),
+            history_path=getattr(
+                config, "HISTORY_JSONL_PATH", os.path.join(config.BASE_DIR, "history.jsonl")
+            ),
+        )
+    base = os.path.join(PROFILES_DIR, name)
+    return Profile(
+        name=name,
+        wrong_path=os.path.join(base, "wrong_questions.json"),
+        stats_path=os.path.join(base, "stats.json"),
+        fav_path=os.path.join(base, "favorites.json"),
+        history_path=os.path.join(base, "history.jsonl"),
+    )
+
+
+def validate_profile_name(name: str) -> str:
+    """返回去掉首尾空白后的档案名；不合法时抛出 ValueError。"""
+    name = (name or "").strip()
+    if not name:
+        raise ValueError("档案名不能为空")
+    if len(name) > MAX_PROFILE_NAME:
+        raise ValueError(f"档案名最多 {MAX_PROFILE_NAME} 个字符")
+    if name.startswith(".") or any(ch in _INVALID_CHARS for ch in name):
+        raise ValueError('档案名不能以“.”开头，也不能包含 / \\ : * ? " < > |')
+    return name
+
+
+def create_profile(name: str) -> Profile:
+    name = validate_profile_name(name)
+    index = _read_index()
+    if name in index["profiles"]:
+        raise ValueError(f"档案“{name}”已存在")
+    index["profiles"].append(name)
+    _write_index(index)
+    profile = get_profile(name)
+    os.makedirs(os.path.dirname(profile.wrong_path), exist_ok=True)
+    return profile
+
+
+def activate(name: str, bank_id: str = DEFAULT_BANK_ID) -> Profile:
+    """
+    切换当前档案（或当前题库）：改写 storage 的错题本 / 统计 / 历史默认路径，并记住本次选择。
+    只改路径，不读写题库，耗时可以忽略。
+    """
+    index = _read_index()
+    if name not in index["profiles"]:
+        raise ValueError(f"档案“{name}”不存在")
+    profile = get_profile(name, bank_id)
+    storage.use_profile_paths(profile.wrong_path, profile.stats_path, profile.history_path)
+    if index["active"] != name:
+        index["active"] = name
+        _write_index(index)
+    return profile
@@ -6,17 +6,24 @@ PySide6 窗口版刷题系统（改进版 3）：
 - 题库导入 / 删除；
 - 新窗口“题库总览”：展示所有题目，并支持实时收藏题目；
 - 收藏的是“题目”，不是“题库”，收藏信息保存在 favorites.json；
-- 答题卡改为下拉框（可用鼠标滚轮控制），解决题目过多时重叠问题；
+- 答题卡：按状态着色的网格（虚拟化列表，几千题也流畅）+ 下拉框（可用鼠标滚轮控制）；
 - 刷新统计按钮会在右侧解析区域展示最新统计信息；
-- 新增“查看收藏夹”按钮，查看所有已收藏题目。
+- 新增“查看收藏夹”按钮，查看所有已收藏题目；
+- 启动优化：Word 解析依赖（python-docx / lxml）在第一次导入题库时才加载，
+  动画 / 悬停效果在第一次用到时才创建；`--profile-startup` 可打印启动耗时分解。
 """
 
 from __future__ import annotations
 
+import time
+
+_IMPORT_T0 = time.perf_counter()
+
+import copy
 import os
 import sys
 import random
-from typing import List, Dict, Optional, Set, Callable
+from typing import TYPE_CHECKING, List, Dict, Optional, Set, Callable
 
 import html
 
@@ -37,6 +44,7 @@ from PySide6.QtWidgets import (
     QFrame,
     QSizePolicy,
     QFileDialog,
+    QInputDialog,
     QGraphicsOpacityEffect,
     QDialog,
     QTableWidget,
@@ -44,13 +52,32 @@ from PySide6.QtWidgets import (
     QHeaderView,
     QMessageBox,
     QAbstractItemView,
+    QButtonGroup,
+    QListView,
+    QStyle,
+    QStyledItemDelegate,
+)
+from PySide6.QtCore import (
+    QAbstractListModel,
+    QEasingCurve,
+    QEvent,
+    QModelIndex,
+    Qt,
+    QParallelAnimationGroup,
+    QPropertyAnimation,
+    QSize,
+    QTimer,
 )
-from PySide6.QtCore import QEasingCurve, QEvent, Qt, QParallelAnimationGroup, QPropertyAnimation
-from PySide6.QtGui import QFont, QIcon, QLinearGradient, QPainter, QPixmap, QColor, QBrush
+from PySide6.QtGui import QFont, QIcon, QLinearGradient, QPainter, QPixmap, QColor, QBrush, QPen
+
+_IMPORT_T_QT = time.perf_counter()
 
 import config
+import profiles
+from bank_registry import BankRegistry
 from storage import (
-    load_questions_from_file,
+    append_history,
+    load_history,
     load_wrong_questions,
     save_wrong_questions,
     load_stats,
@@ -58,11 +85,19 @@ from storage import (
     delete_question_bank,
 )
 from models import Question
-from quiz_engine import _check_answer, _update_stats
-from question_parser import parse_docx_and_save_to_json
+from quiz_engine import _check_answer, _update_stats, balanced_sample, grade_blank_answer, short_answer_hint
+
+if TYPE_CHECKING:
+    from item_stats import ItemParams
 
+# 注意：question_parser 会连带加载 python-docx / lxml，较慢，
+# 因此不在模块顶部导入，而是在 on_import_bank 里第一次导入题库时再导入。
 
-FAV_JSON_PATH = os.path.join(config.BASE_DIR, "favorites.json")
+_IMPORT_T_LOCAL = time.perf_counter()
+
+
+# 收藏夹路径属于当前学习者档案，切换档案时由 use_favorites_path 改写
+FAV_JSON_PATH = getattr(config, "FAV_JSON_PATH", os.path.join(config.BASE_DIR, "favorites.json"))
 
 
 def qtype_label(q_type: str) -> str:
@@ -83,6 +118,37 @@ def format_rate(correct: int, total: int) -> str:
     return f"{correct * 100.0 / total:.2f}%"
 
 
+class StartupProfiler:
+    """启动耗时分解：按阶段记录耗时，最后打印成一张小表（--profile-startup）。"""
+
+    def __init__(self):
+        self.stages: List[tuple] = []
+        self._last = time.perf_counter()
+
+    def add(self, name: str, seconds: float):
+        self.stages.append((name, seconds))
+
+    def restart(self):
+        self._last = time.perf_counter()
+
+    def mark(self, name: str):
+        now = time.perf_counter()
+        self.stages.append((name, now - self._last))
+        self._last = now
+
+    def report(self) -> str:
+        total = sum(sec for _, sec in self.stages)
+        lines = ["===== 启动耗时分解 ====="]
+        for name, sec in self.stages:
+            share = sec * 100.0 / total if total > 0 else 0.0
+            lines.append(f"{name:<24}{sec * 1000.0:>9.1f} ms  {share:>5.1f}%")
+        lines.append("-" * 44)
+        lines.append(f"{'合计':<24}{total * 1000.0:>9.1f} ms")
+        loaded = "已加载" if "question_parser" in sys.modules else "未加载（延迟到导入题库时）"
+        lines.append(f"question_parser：{loaded}")
+        return "\n".join(lines)
+
+
 def build_app_icon() -> QIcon:
     """生成一个简洁的应用图标，用于窗口标题和提示弹窗。"""
 
@@ -123,10 +189,16 @@ def load_favorite_ids() -> Set[int]:
 
 def save_favorite_ids(ids: Set[int]):
     import json
+    os.makedirs(os.path.dirname(FAV_JSON_PATH), exist_ok=True)
     with open(FAV_JSON_PATH, "w", encoding="utf-8") as f:
         json.dump(sorted(list(ids)), f, ensure_ascii=False, indent=2)
 
 
+def use_favorites_path(path: str):
+    global FAV_JSON_PATH
+    FAV_JSON_PATH = path
+
+
 def build_preview_html(q: Question, include_wrong: bool = False) -> str:
     """将题目内容渲染为统一且易读的 HTML。"""
 
@@ -190,6 +262,192 @@ def build_preview_html(q: Question, include_wrong: bool = False) -> str:
     )
 
 
+class AnswerCardModel(QAbstractListModel):
+    """
+    答题卡数据模型：每一行对应本轮的一道题。
+
+    - 作答状态变化时只对该行发出 dataChanged，不再整表重写下拉框文字；
+    - 同时维护“做对 / 做错”的累计计数，汇总文字无需每次扫描全部状态。
+    """
+
+    StatusRole = Qt.UserRole + 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._status: List[str] = []
+        self.correct_count = 0
+        self.wrong_count = 0
+
+    @property
+    def statuses(self) -> List[str]:
+        return self._status
+
+    def reset(self, count: int):
+        self.beginResetModel()
+        self._status = ["unanswered"] * max(count, 0)
+        self.correct_count = 0
+        self.wrong_count = 0
+        self.endResetModel()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._status)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if row < 0 or row >= len(self._status):
+            return None
+        status = self._status[row]
+        if role == Qt.DisplayRole:
+            prefix = ""
+            if status == "correct":
+                prefix = "✓ "
+            elif status == "wrong":
+                prefix = "✗ "
+            return f"{prefix}第 {row + 1} 题"
+        if role == Qt.UserRole:
+            # 与原先 addItem(label, i) 的 itemData 保持一致：返回题目下标
+            return row
+        if role == self.StatusRole:
+            return status
+        return None
+
+    def set_status(self, row: int, status: str):
+        if row < 0 or row >= len(self._status):
+            return
+        old = self._status[row]
+        if old == status:
+            return
+        if old == "correct":
+            self.correct_count -= 1
+        elif old == "wrong":
+            self.wrong_count -= 1
+        if status == "correct":
+            self.correct_count += 1
+        elif status == "wrong":
+            self.wrong_count += 1
+        self._status[row] = status
+        idx = self.index(row, 0)
+        self.dataChanged.emit(idx, idx, [Qt.DisplayRole, self.StatusRole])
+
+
+class AnswerSheetDelegate(QStyledItemDelegate):
+    """
+    网格答题卡的单元格绘制：只画一个圆角色块 + 题号。
+
+    颜色按作答状态区分（未答 / 答对 / 答错），当前题额外描一圈蓝色边框。
+    直接用 QPainter 绘制，不创建任何子控件，几千个格子也能流畅滚动。
+    """
+
+    CELL_SIZE = QSize(38, 30)
+
+    # 状态 -> (背景色, 边框色, 文字色)
+    COLORS = {
+        "unanswered": ("#f8fafc", "#cbd5e1", "#334155"),
+        "correct": ("#dcfce7", "#86efac", "#166534"),
+        "wrong": ("#fee2e2", "#fca5a5", "#b91c1c"),
+    }
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._colors = {
+            key: tuple(QColor(c) for c in value) for key, value in self.COLORS.items()
+        }
+        self._current_pen = QPen(QColor("#3b82f6"), 2)
+        self._font = QFont("Microsoft YaHei", 9, QFont.DemiBold)
+
+    def sizeHint(self, option, index) -> QSize:
+        return self.CELL_SIZE
+
+    def paint(self, painter: QPainter, option, index):
+        status = index.data(AnswerCardModel.StatusRole) or "unanswered"
+        bg, border, fg = self._colors.get(status, self._colors["unanswered"])
+        rect = option.rect.adjusted(2, 2, -2, -2)
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setBrush(bg)
+        if option.state & QStyle.State_Selected:
+            painter.setPen(self._current_pen)
+        else:
+            painter.setPen(border)
+        painter.drawRoundedRect(rect, 5, 5)
+        painter.setPen(fg)
+        painter.setFont(self._font)
+        painter.drawText(rect, Qt.AlignCenter, str(index.row() + 1))
+        painter.restore()
+
+
+class OptionButtonPool:
+    """
+    作答区的单选按钮池：
+    - 按钮只在第一次需要时创建，之后切题只改文字 / 显隐，不再反复新建和销毁；
+    - 样式由选项框统一设置一次，信号也只通过 QButtonGroup 连接一次；
+    - 维护“选项值 -> 按钮”映射，恢复已作答的选项时直接查表。
+    """
+
+    def __init__(self, box: QGroupBox, layout: QVBoxLayout, on_selected: Callable[[str], None]):
+        self._layout = layout
+        self._on_selected = on_selected
+        self._group = QButtonGroup(box)
+        self._group.setExclusive(True)
+        self._group.idToggled.connect(self._on_id_toggled)
+        self._buttons: List[QRadioButton] = []
+        self._values: List[str] = []
+        self._by_value: Dict[str, QRadioButton] = {}
+
+    def _ensure_capacity(self, n: int):
+        while len(self._buttons) < n:
+            btn = QRadioButton()
+            self._group.addButton(btn, len(self._buttons))
+            self._layout.addWidget(btn)
+            btn.hide()
+            self._buttons.append(btn)
+
+    def _uncheck_all(self):
+        checked = self._group.checkedButton()
+        if checked is None:
+            return
+        # 互斥模式下无法直接取消选中，临时关闭互斥
+        self._group.setExclusive(False)
+        checked.setChecked(False)
+        self._group.setExclusive(True)
+
+    def set_options(self, items: List[tuple], selected: str = ""):
+        """
+        items: [(选项值, 显示文字), ...]；selected 为需要恢复选中的选项值。
+        """
+        self._ensure_capacity(len(items))
+        self._group.blockSignals(True)
+        self._uncheck_all()
+        self._values = [value for value, _ in items]
+        self._by_value = {}
+        for i, btn in enumerate(self._buttons):
+            if i < len(items):
+                value, text = items[i]
+                if btn.text() != text:
+                    btn.setText(text)
+                if btn.isHidden():
+                    btn.show()
+                self._by_value[value] = btn
+            elif not btn.isHidden():
+                btn.hide()
+        target = self._by_value.get(selected) if selected else None
+        if target is not None:
+            target.setChecked(True)
+        self._group.blockSignals(False)
+
+    def clear(self):
+        self.set_options([])
+
+    def _on_id_toggled(self, button_id: int, checked: bool):
+        if checked and 0 <= button_id < len(self._values):
+            self._on_selected(self._values[button_id])
+
+
 class QuestionOverviewDialog(QDialog):
     """题库总览窗口：展示所有题目，并支持收藏 / 取消收藏。"""
 
@@ -199,10 +457,15 @@ class QuestionOverviewDialog(QDialog):
         questions: List[Question],
         favorite_ids: Set[int],
         app_icon: Optional[QIcon] = None,
+        item_params: Optional[Dict[int, ItemParams]] = None,
     ):
         super().__init__(parent)
         self.questions = questions
         self.favorite_ids = favorite_ids
+        # 题目难度 / 区分度（item_stats.py）；有数据时多一列“难度”，并可按难度排序
+        self.item_params = item_params or {}
+        self._base_order = list(questions)
+        self._fav_col = 4 if self.item_params else 3
         self._current_row = -1
         self._selection_guard = False
         self.setWindowTitle("题库总览 · 收藏题目")
@@ -216,8 +479,22 @@ class QuestionOverviewDialog(QDialog):
         info_label.setWordWrap(True)
         layout.addWidget(info_label)
 
-        self.table = QTableWidget(len(self.questions), 4, self)
-        self.table.setHorizontalHeaderLabels(["题号", "题型", "题干预览", "收藏"])
+        headers = ["题号", "题型", "题干预览", "收藏"]
+        if self.item_params:
+            headers.insert(3, "难度（全体作答）")
+            sort_row = QHBoxLayout()
+            sort_row.addWidget(QLabel("排序："))
+            self.sort_combo = QComboBox(self)
+            self.sort_combo.addItem("按题号", "id")
+            self.sort_combo.addItem("由难到易", "hard")
+            self.sort_combo.addItem("由易到难", "easy")
+            self.sort_combo.currentIndexChanged.connect(self._on_sort_changed)
+            sort_row.addWidget(self.sort_combo)
+            sort_row.addStretch(1)
+            layout.addLayout(sort_row)
+
+        self.table = QTableWidget(len(self.questions), len(headers), self)
+        self.table.setHorizontalHeaderLabels(headers)
         self.table.verticalHeader().setVisible(False)
         # 留出适中的行高，让收藏按钮居中但整体更紧凑
         self.table.verticalHeader().setDefaultSectionSize(30)
@@ -230,7 +507,8 @@ class QuestionOverviewDialog(QDialog):
         self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
         self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
         self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
-        self.table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeToContents)
+        for col in range(3, len(headers)):
+            self.table.horizontalHeader().setSectionResizeMode(col, QHeaderView.ResizeToContents)
         self.table.horizontalHeader().setMinimumSectionSize(82)
 
         layout.addWidget(self.table)
@@ -402,6 +680,9 @@ class QuestionOverviewDialog(QDialog):
             self.table.setItem(row, 0, item_id)
             self.table.setItem(row, 1, item_type)
             self.table.setItem(row, 2, item_q)
+            if self.item_params:
+                params = self.item_params.get(q.id)
+                self.table.setItem(row, 3, QTableWidgetItem(params.label() if params else "暂无作答"))
 
             btn = QPushButton(self)
             btn.setObjectName("favoriteBtn")
@@ -420,13 +701,27 @@ class QuestionOverviewDialog(QDialog):
             container_layout.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
             container_layout.addWidget(btn)
             container_layout.setAlignment(btn, Qt.AlignLeft | Qt.AlignVCenter)
-            self.table.setCellWidget(row, 3, container)
+            self.table.setCellWidget(row, self._fav_col, container)
 
         # 确保“收藏 / 取消收藏”按钮列足够展示完整文本且不显得过宽
-        self.table.setColumnWidth(3, max(self.table.columnWidth(3), 132))
+        self.table.setColumnWidth(self._fav_col, max(self.table.columnWidth(self._fav_col), 132))
         # 让“题型”列有更宽的空间避免文字被省略
         self.table.setColumnWidth(1, max(self.table.columnWidth(1), 92))
 
+    def _on_sort_changed(self, _index: int):
+        from item_stats import sort_by_difficulty
+
+        order = self.sort_combo.currentData()
+        if order == "id":
+            self.questions = list(self._base_order)
+        else:
+            self.questions = sort_by_difficulty(self._base_order, self.item_params, hardest_first=order == "hard")
+        self.table.clearContents()
+        self.table.setRowCount(len(self.questions))
+        self._populate_table()
+        if self.questions:
+            self._set_current_row(0, trigger_preview=True)
+
     def _update_fav_button_text(self, btn: QPushButton, qid: int):
         if qid in self.favorite_ids:
             btn.setText("★ 取消收藏")
@@ -498,10 +793,12 @@ class WrongOverviewDialog(QDialog):
         questions: List[Question],
         toggle_callback: Callable[[Question], bool],
         app_icon: Optional[QIcon] = None,
+        practice_callback: Optional[Callable[[List[Question]], bool]] = None,
     ):
         super().__init__(parent)
         self.questions = list(questions)
         self.toggle_callback = toggle_callback
+        self.practice_callback = practice_callback
         self._current_row = -1
         self._selection_guard = False
         self.setWindowTitle("错题本总览")
@@ -545,6 +842,17 @@ class WrongOverviewDialog(QDialog):
         preview_layout.addWidget(self.preview)
         layout.addWidget(preview_group)
 
+        if self.practice_callback:
+            practice_row = QHBoxLayout()
+            practice_row.addStretch(1)
+            self.btn_similar_one = QPushButton("🎯 练本题的相似题", self)
+            self.btn_similar_one.clicked.connect(self._on_practice_similar_current)
+            self.btn_similar_all = QPushButton("🎯 按全部错题练相似题", self)
+            self.btn_similar_all.clicked.connect(self._on_practice_similar_all)
+            practice_row.addWidget(self.btn_similar_one)
+            practice_row.addWidget(self.btn_similar_all)
+            layout.addLayout(practice_row)
+
         self._init_preview_animation()
         self.table.clicked.connect(self._on_row_clicked)
         self.table.selectionModel().selectionChanged.connect(self._on_selection_changed)
@@ -721,6 +1029,17 @@ class WrongOverviewDialog(QDialog):
         self._animate_button_pulse(btn)
         self._sync_info_label(in_book)
 
+    def _on_practice_similar_current(self):
+        if 0 <= self._current_row < len(self.questions):
+            self._practice_similar([self.questions[self._current_row]])
+
+    def _on_practice_similar_all(self):
+        self._practice_similar(self.questions)
+
+    def _practice_similar(self, seeds: List[Question]):
+        if seeds and self.practice_callback and self.practice_callback(seeds):
+            self.accept()
+
     def _update_button_text(self, btn: QPushButton, in_book: bool):
         if in_book:
             btn.setText("🗑 移出错题本")
@@ -773,8 +1092,9 @@ class WrongOverviewDialog(QDialog):
 
 
 class QuizWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, profiler: Optional[StartupProfiler] = None):
         super().__init__()
+        self._profiler = profiler
         self.app_icon = build_app_icon()
         self.setWindowTitle("本地刷题系统")
         self.setWindowIcon(self.app_icon)
@@ -798,10 +1118,24 @@ class QuizWindow(QMainWindow):
 
         self.current_bank_docx: Optional[str] = None
 
+        # 题库登记表（banks.json）：各题库的题目列表缓存在登记表里，所有学习者档案共用，
+        # 切换题库直接取缓存，不重新解析 Word
+        self.registry = BankRegistry()
+        active_bank = self.registry.active
+        self.bank_id: str = (
+            self.registry.activate(active_bank.bank_id).bank_id if active_bank else profiles.DEFAULT_BANK_ID
+        )
+
+        # 当前学习者档案：错题本 / 收藏 / 统计 / 作答历史按档案分开保存
+        self.profile = self._activate_profile(profiles.active_profile_name())
         self.favorite_ids: Set[int] = load_favorite_ids()
 
         # 控件占位
+        self.profile_combo: QComboBox
+        self.btn_new_profile: QPushButton
+        self.bank_combo: QComboBox
         self.qtype_combo: QComboBox
+        self.difficulty_combo: QComboBox
         self.count_spin: QSpinBox
         self.btn_start_normal: QPushButton
         self.btn_start_wrong: QPushButton
@@ -829,10 +1163,11 @@ class QuizWindow(QMainWindow):
         self.btn_next: QPushButton
         self.btn_submit: QPushButton
 
-        self.option_buttons: List[QRadioButton] = []
+        self.option_pool: OptionButtonPool
         self.current_option_value: str = ""
 
-        # 答题卡控件：下拉框 + 跳转按钮
+        # 答题卡控件：下拉框 + 跳转按钮（数据来自 AnswerCardModel）
+        self.card_model = AnswerCardModel(self)
         self.card_combo: QComboBox
         self.btn_card_jump: QPushButton
 
@@ -844,17 +1179,27 @@ class QuizWindow(QMainWindow):
         self.options_anim: Optional[QPropertyAnimation] = None
         self.question_anim_group: Optional[QParallelAnimationGroup] = None
 
+        # 悬停动画：先只登记按钮，第一次鼠标移入时再创建效果和动画
+        self._hover_buttons: Set[QPushButton] = set()
         self._hover_anims: Dict[QPushButton, QPropertyAnimation] = {}
 
+        self.stats_group: Optional[QGroupBox] = None
         self.stats_effect: Optional[QGraphicsOpacityEffect] = None
         self.stats_anim: Optional[QPropertyAnimation] = None
 
+        self._profile_mark("窗口状态初始化")
         self._build_ui()
+        self._profile_mark("构建控件 _build_ui")
         self._apply_style()
-        self._init_feedback_animation()
-        self._init_question_animation()
+        self._profile_mark("应用样式表")
         self._refresh_wrong_book_cache()
+        self._profile_mark("加载错题本")
         self.refresh_global_stats()
+        self._profile_mark("加载统计")
+
+    def _profile_mark(self, name: str):
+        if self._profiler is not None:
+            self._profiler.mark(name)
 
     # ---------- UI ----------
 
@@ -891,9 +1236,24 @@ class QuizWindow(QMainWindow):
         left_panel = QVBoxLayout()
         left_panel.setSpacing(10)
 
+        # 学习者档案
+        profile_group = QGroupBox("学习者档案")
+        profile_layout = QHBoxLayout(profile_group)
+        self.profile_combo = QComboBox()
+        self.profile_combo.setToolTip("每个档案有独立的错题本、收藏夹和统计，题库共用")
+        self.btn_new_profile = QPushButton("新建档案")
+        profile_layout.addWidget(self.profile_combo, 1)
+        profile_layout.addWidget(self.btn_new_profile)
+        left_panel.addWidget(profile_group)
+        self._reload_profile_combo()
+
         # 题库管理
         bank_group = QGroupBox("题库管理")
         bank_layout = QVBoxLayout(bank_group)
+        self.bank_combo = QComboBox()
+        self.bank_combo.setToolTip("切换已导入的题库（直接使用缓存，不重新解析 Word）")
+        bank_layout.addWidget(self.bank_combo)
+        self._reload_bank_combo()
         self.btn_import_bank = QPushButton("导入题库（Word）")
         self.btn_delete_bank = QPushButton("删除当前题库")
         self.btn_overview_bank = QPushButton("题库总览 / 收藏题目")
@@ -915,7 +1275,29 @@ class QuizWindow(QMainWindow):
         self.answer_summary_label.setObjectName("answerSummary")
         nav_layout.addWidget(self.answer_summary_label)
 
+        # 网格答题卡：与下拉框共用同一个模型，按状态着色，点击即跳题
+        self.card_grid = QListView()
+        self.card_grid.setObjectName("answerSheetGrid")
+        self.card_grid.setModel(self.card_model)
+        self.card_grid.setItemDelegate(AnswerSheetDelegate(self.card_grid))
+        self.card_grid.setViewMode(QListView.IconMode)
+        self.card_grid.setFlow(QListView.LeftToRight)
+        self.card_grid.setWrapping(True)
+        self.card_grid.setResizeMode(QListView.Adjust)
+        self.card_grid.setMovement(QListView.Static)
+        self.card_grid.setUniformItemSizes(True)
+        self.card_grid.setGridSize(AnswerSheetDelegate.CELL_SIZE)
+        # 分批布局：几千个格子时首屏不必等全部排版完成
+        self.card_grid.setLayoutMode(QListView.Batched)
+        self.card_grid.setBatchSize(200)
+        self.card_grid.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.card_grid.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.card_grid.setMinimumHeight(96)
+        self.card_grid.setMaximumHeight(190)
+        nav_layout.addWidget(self.card_grid)
+
         self.card_combo = QComboBox()
+        self.card_combo.setModel(self.card_model)
         self.card_combo.setPlaceholderText("当前没有题目")
         nav_layout.addWidget(self.card_combo)
 
@@ -950,6 +1332,18 @@ class QuizWindow(QMainWindow):
         row2.addWidget(self.count_spin)
         settings_layout.addLayout(row2)
 
+        # 难度分档来自全体档案的作答历史（item_stats.py），作答次数太少的题不参与分档
+        row3 = QHBoxLayout()
+        lbl_difficulty = QLabel("难度：")
+        self.difficulty_combo = QComboBox()
+        self.difficulty_combo.addItem("全部难度", "all")
+        self.difficulty_combo.addItem("容易", "easy")
+        self.difficulty_combo.addItem("中等", "medium")
+        self.difficulty_combo.addItem("较难", "hard")
+        row3.addWidget(lbl_difficulty)
+        row3.addWidget(self.difficulty_combo)
+        settings_layout.addLayout(row3)
+
         self.btn_start_normal = QPushButton("开始刷题")
         settings_layout.addWidget(self.btn_start_normal)
         self.btn_start_wrong = QPushButton("只刷错题")
@@ -1002,8 +1396,14 @@ class QuizWindow(QMainWindow):
         options_layout_outer.setContentsMargins(12, 10, 12, 10)
 
         self.options_box = QGroupBox("选择一个选项")
+        self.options_box.setStyleSheet(
+            "QRadioButton { font-size: 16px; padding: 6px 4px; font-weight: 500; }"
+        )
         self.options_layout = QVBoxLayout(self.options_box)
         self.options_layout.setSpacing(8)
+        self.option_pool = OptionButtonPool(
+            self.options_box, self.options_layout, self._on_option_selected
+        )
         options_layout_outer.addWidget(self.options_box)
 
         self.short_answer_edit = QPlainTextEdit()
@@ -1052,6 +1452,7 @@ class QuizWindow(QMainWindow):
         right_panel.addWidget(feedback_group)
 
         stats_group = QGroupBox("总体统计")
+        self.stats_group = stats_group
         stats_layout = QVBoxLayout(stats_group)
         self.label_stat_total = QLabel("总答题数：0")
         self.label_stat_correct = QLabel("总正确数：0")
@@ -1093,6 +1494,9 @@ class QuizWindow(QMainWindow):
         root_layout.addWidget(bottom_frame)
 
         # 信号连接
+        self.profile_combo.currentIndexChanged.connect(self.on_profile_changed)
+        self.btn_new_profile.clicked.connect(self.on_new_profile)
+        self.bank_combo.currentIndexChanged.connect(self.on_bank_changed)
         self.btn_import_bank.clicked.connect(self.on_import_bank)
         self.btn_delete_bank.clicked.connect(self.on_delete_bank)
         self.btn_overview_bank.clicked.connect(self.on_overview_bank)
@@ -1111,6 +1515,7 @@ class QuizWindow(QMainWindow):
         self.btn_star_favorite.clicked.connect(self.on_toggle_star_favorite)
 
         self.card_combo.currentIndexChanged.connect(self._on_card_combo_changed)
+        self.card_grid.clicked.connect(self._on_card_grid_clicked)
         self.btn_card_jump.clicked.connect(self._on_card_jump_clicked)
 
         # 初始化显示
@@ -1123,7 +1528,6 @@ class QuizWindow(QMainWindow):
         self._refresh_favorite_star()
         self._refresh_remove_wrong_button()
         self._init_hover_animations()
-        self._init_stats_animation(stats_group)
 
     def _apply_style(self):
         self.setStyleSheet("""
@@ -1216,6 +1620,12 @@ class QuizWindow(QMainWindow):
             color: #111827;
             font-size: 14px;
         }
+        QListView#answerSheetGrid {
+            background-color: #ffffff;
+            border: 1px solid #e2e8f0;
+            border-radius: 6px;
+            padding: 2px;
+        }
 
         QPushButton {
             padding: 6px 14px;
@@ -1356,6 +1766,7 @@ class QuizWindow(QMainWindow):
 
     def _init_hover_animations(self):
         buttons = [
+            self.btn_new_profile,
             self.btn_import_bank,
             self.btn_delete_bank,
             self.btn_overview_bank,
@@ -1371,7 +1782,8 @@ class QuizWindow(QMainWindow):
             self.btn_star_favorite,
         ]
         for btn in buttons:
-            self._attach_hover_animation(btn)
+            self._hover_buttons.add(btn)
+            btn.installEventFilter(self)
 
     def _attach_hover_animation(self, btn: QPushButton):
         effect = QGraphicsOpacityEffect(btn)
@@ -1383,9 +1795,13 @@ class QuizWindow(QMainWindow):
         anim.setEndValue(0.9)
         anim.setEasingCurve(QEasingCurve.InOutQuad)
         self._hover_anims[btn] = anim
-        btn.installEventFilter(self)
 
     def _start_hover_anim(self, btn: QPushButton, target: float):
+        if btn not in self._hover_anims:
+            if target >= 1.0:
+                # 还没有创建过效果时按钮本来就是不透明的，移出无需处理
+                return
+            self._attach_hover_animation(btn)
         anim = self._hover_anims.get(btn)
         effect = btn.graphicsEffect()
         if not anim or not isinstance(effect, QGraphicsOpacityEffect):
@@ -1396,7 +1812,7 @@ class QuizWindow(QMainWindow):
         anim.start()
 
     def eventFilter(self, obj, event):
-        if obj in self._hover_anims:
+        if obj in self._hover_buttons:
             if event.type() == QEvent.Enter:
                 self._start_hover_anim(obj, 0.86)
             elif event.type() == QEvent.Leave:
@@ -1412,6 +1828,8 @@ class QuizWindow(QMainWindow):
         self.feedback_anim.setEndValue(1.0)
 
     def animate_feedback(self):
+        if not self.feedback_anim:
+            self._init_feedback_animation()
         if not self.feedback_anim or not self.feedback_effect:
             return
         self.feedback_anim.stop()
@@ -1440,6 +1858,8 @@ class QuizWindow(QMainWindow):
         self.question_anim_group.addAnimation(self.options_anim)
 
     def animate_question(self):
+        if not self.question_anim_group:
+            self._init_question_animation()
         if not self.question_anim_group or not self.question_anim:
             return
         self.question_anim_group.stop()
@@ -1459,6 +1879,8 @@ class QuizWindow(QMainWindow):
         self.stats_anim.setEasingCurve(QEasingCurve.InOutQuad)
 
     def animate_stats(self):
+        if not self.stats_anim and self.stats_group is not None:
+            self._init_stats_animation(self.stats_group)
         if not self.stats_anim or not self.stats_effect:
             return
         self.stats_anim.stop()
@@ -1538,15 +1960,8 @@ class QuizWindow(QMainWindow):
             self.short_answer_edit.clear()
 
     def clear_options(self):
-        for btn in self.option_buttons:
-            btn.setParent(None)
-        self.option_buttons.clear()
+        self.option_pool.clear()
         self.current_option_value = ""
-        while self.options_layout.count():
-            item = self.options_layout.takeAt(0)
-            w = item.widget()
-            if w is not None:
-                w.setParent(None)
 
     def _apply_stats_to_labels(self, stats: Dict[str, int]):
         total_answered = stats.get("total_answered", 0)
@@ -1628,8 +2043,8 @@ class QuizWindow(QMainWindow):
         return in_book
 
     def _update_answer_summary(self):
-        correct = sum(1 for s in self.index_status if s == "correct")
-        wrong = sum(1 for s in self.index_status if s == "wrong")
+        correct = self.card_model.correct_count
+        wrong = self.card_model.wrong_count
         self.answer_summary_label.setText(f"做对 {correct} · 做错 {wrong}")
 
     def _cache_current_answer(self):
@@ -1650,48 +2065,39 @@ class QuizWindow(QMainWindow):
 
     def _clear_answer_card(self):
         self.card_combo.blockSignals(True)
-        self.card_combo.clear()
+        self.card_model.reset(0)
         self.card_combo.blockSignals(False)
+        self.index_status = self.card_model.statuses
 
     def _setup_navigation(self, count: int):
-        self.index_status = ["unanswered"] * count
         self.user_answers = [""] * count
         self.current_option_value = ""
         self.short_answer_edit.clear()
 
-        self._clear_answer_card()
-        if count <= 0:
-            self._update_answer_summary()
-            return
-
         self.card_combo.blockSignals(True)
-        for i in range(count):
-            label = f"第 {i + 1} 题 · 未作答"
-            self.card_combo.addItem(label, i)
+        self.card_model.reset(count)
         self.card_combo.blockSignals(False)
-        self.card_combo.setCurrentIndex(0)
+        # index_status 与模型共用同一个列表，写入统一走 _set_index_status
+        self.index_status = self.card_model.statuses
+        if count > 0:
+            self.card_combo.setCurrentIndex(0)
         self._update_answer_summary()
 
+    def _set_index_status(self, idx: int, status: str):
+        """更新单题状态：模型只刷新这一行，计数器同步增减。"""
+        self.card_model.set_status(idx, status)
+
     def _refresh_answer_card(self):
-        self.card_combo.blockSignals(True)
-        for i in range(self.card_combo.count()):
-            idx = self.card_combo.itemData(i)
-            if idx is None:
-                continue
-            idx = int(idx)
-            status = "unanswered"
-            if 0 <= idx < len(self.index_status):
-                status = self.index_status[idx]
-            prefix = ""
-            if status == "correct":
-                prefix = "✓ "
-            elif status == "wrong":
-                prefix = "✗ "
-            text = f"{prefix}第 {idx + 1} 题"
-            self.card_combo.setItemText(i, text)
-        if 0 <= self.current_index < self.card_combo.count():
-            self.card_combo.setCurrentIndex(self.current_index)
-        self.card_combo.blockSignals(False)
+        # 文字和颜色由模型按行提供，这里只需同步下拉框 / 网格的当前选中项
+        if 0 <= self.current_index < self.card_model.rowCount():
+            if self.card_combo.currentIndex() != self.current_index:
+                self.card_combo.blockSignals(True)
+                self.card_combo.setCurrentIndex(self.current_index)
+                self.card_combo.blockSignals(False)
+            model_index = self.card_model.index(self.current_index, 0)
+            if self.card_grid.currentIndex() != model_index:
+                self.card_grid.setCurrentIndex(model_index)
+                self.card_grid.scrollTo(model_index)
 
     def _update_status_for_current_question(self):
         if not self.current_questions or self.current_index < 0:
@@ -1716,6 +2122,13 @@ class QuizWindow(QMainWindow):
             return
         self._goto_question_idx(int(idx))
 
+    def _on_card_grid_clicked(self, model_index: QModelIndex):
+        if not self.current_questions or not model_index.isValid():
+            return
+        if model_index.row() == self.current_index:
+            return
+        self._goto_question_idx(model_index.row())
+
     def _on_card_jump_clicked(self):
         idx = self.card_combo.currentIndex()
         if idx < 0:
@@ -1727,21 +2140,122 @@ class QuizWindow(QMainWindow):
 
     # ---------- 题库管理 & 收藏 ----------
 
+    # ---------- 学习者档案 / 共用题库 ----------
+
+    def _get_bank(self) -> List[Question]:
+        if self.registry.get(self.bank_id) is None:
+            return []
+        return self.registry.questions(self.bank_id)
+
+    def _activate_profile(self, name: str) -> profiles.Profile:
+        try:
+            profile = profiles.activate(name, self.bank_id)
+        except ValueError:
+            profile = profiles.activate(profiles.DEFAULT_PROFILE, self.bank_id)
+        use_favorites_path(profile.fav_path)
+        return profile
+
+    def _reload_profile_data(self):
+        """档案或题库变化后，重新读取当前档案在当前题库下的小文件。"""
+        self.favorite_ids = load_favorite_ids()
+        self._refresh_wrong_book_cache()
+        self.refresh_global_stats()
+        self._refresh_favorite_star()
+        self._refresh_remove_wrong_button()
+
+    def _reload_bank_combo(self):
+        self.bank_combo.blockSignals(True)
+        self.bank_combo.clear()
+        for entry in self.registry.entries:
+            label = f"{entry.name}（{entry.count} 题）" if entry.count else entry.name
+            self.bank_combo.addItem(label, entry.bank_id)
+        pos = self.bank_combo.findData(self.bank_id)
+        if pos >= 0:
+            self.bank_combo.setCurrentIndex(pos)
+        self.bank_combo.setEnabled(self.bank_combo.count() > 0)
+        self.bank_combo.blockSignals(False)
+
+    def switch_bank(self, bank_id: str):
+        """切换当前题库：题目取自登记表缓存，错题本 / 收藏切到该题库对应的文件。"""
+        if self.current_questions:
+            self._finish_session()
+        entry = self.registry.activate(bank_id)
+        self.bank_id = entry.bank_id
+        self.profile = self._activate_profile(self.profile.name)
+        self._reload_profile_data()
+        self._reload_bank_combo()
+        count = len(self._get_bank())
+        self.set_status(f"已切换到题库“{entry.name}”，共 {count} 题。")
+
+    def on_bank_changed(self, combo_index: int):
+        bank_id = self.bank_combo.itemData(combo_index)
+        if bank_id and bank_id != self.bank_id:
+            self.switch_bank(bank_id)
+
+    def _reload_profile_combo(self):
+        self.profile_combo.blockSignals(True)
+        self.profile_combo.clear()
+        names = profiles.list_profiles()
+        self.profile_combo.addItems(names)
+        if self.profile.name in names:
+            self.profile_combo.setCurrentIndex(names.index(self.profile.name))
+        self.profile_combo.blockSignals(False)
+
+    def switch_profile(self, name: str):
+        """切换档案：只重新读取该档案的小文件，题库保持不动。"""
+        if name == self.profile.name:
+            return
+        if self.current_questions:
+            # 本轮结果记到原来的档案里
+            self._finish_session()
+        self.profile = self._activate_profile(name)
+        self._reload_profile_data()
+        self._reload_profile_combo()
+        self.set_status(f"已切换到档案“{self.profile.name}”。")
+
+    def on_profile_changed(self, combo_index: int):
+        name = self.profile_combo.itemText(combo_index)
+        if name:
+            self.switch_profile(name)
+
+    def on_new_profile(self):
+        name, ok = QInputDialog.getText(self, "新建学习者档案", "档案名：")
+        if not ok:
+            return
+        try:
+            profile = profiles.create_profile(name)
+        except ValueError as e:
+            self._show_result_dialog("新建档案失败", str(e), success=False)
+            return
+        self.switch_profile(profile.name)
+
     def on_import_bank(self):
         file_path, _ = QFileDialog.getOpenFileName(
             self,
-            "选择题库 Word 文件",
+            "选择题库文件",
             "",
-            "Word 文件 (*.docx)",
+            "题库文件 (*.docx *.txt *.md *.csv);;Word 文件 (*.docx);;文本 / Markdown (*.txt *.md);;CSV 表格 (*.csv)",
         )
         if not file_path:
             return
 
         try:
-            count = parse_docx_and_save_to_json(file_path)
+            # 先查解析缓存（按文件内容），未命中时才按扩展名选导入器解析
+            from import_report import STAGE_SAVE, ImportReport
+            from importers import parse_bank_file
+            from parse_cache import parse_with_cache
+
+            report = ImportReport()
+            parsed, _ = parse_with_cache(file_path, parse=parse_bank_file, report=report)
+            parsed, dedup_note = self._dedup_imported(file_path, parsed, report)
             self.current_bank_docx = file_path
 
-            qs = load_questions_from_file()
+            # 每个题库文件登记成独立的题库，不再覆盖其他题库
+            with report.stage(STAGE_SAVE):
+                entry = self.registry.register(file_path, parsed)
+            report.log()
+            self.switch_bank(entry.bank_id)
+            qs = self._get_bank()
             c_total = len(qs)
             c_single = sum(1 for q in qs if q.q_type == config.QTYPE_SINGLE)
             c_blank = sum(1 for q in qs if q.q_type == config.QTYPE_BLANK)
@@ -1758,7 +2272,11 @@ class QuizWindow(QMainWindow):
                 f"判断题：{c_tf}  简答题：{c_short}",
                 "",
                 "可以使用左侧“题库总览 / 收藏题目”查看全部题目并收藏。",
+                "",
+                report.summary(),
             ]
+            if dedup_note:
+                overview_lines += ["", dedup_note]
             self.set_feedback_text("\n".join(overview_lines))
             self.animate_feedback()
 
@@ -1768,16 +2286,51 @@ class QuizWindow(QMainWindow):
             success_msg = (
                 f"共 {c_total} 道题（单选 {c_single} · 填空 {c_blank} · 判断 {c_tf} · 简答 {c_short}）。"
                 "\n可以使用“题库总览 / 收藏题目”查看全部题目并收藏。"
+                f"\n\n{report.summary()}"
             )
+            if dedup_note:
+                success_msg += f"\n\n{dedup_note}"
             self._show_result_dialog("题库导入成功", success_msg, success=True)
         except Exception as e:
             self.set_status(f"题库导入失败：{e}")
-            self.set_feedback_text("导入失败，请检查题库格式是否为标准 .docx。")
+            self.set_feedback_text("导入失败，请检查题库格式（.docx / .txt / .md / .csv）。")
             self.animate_feedback()
 
-            fail_msg = f"导入失败：{e}\n请检查文件是否为可读取的 .docx 题库。"
+            fail_msg = f"导入失败：{e}\n请检查文件是否为可读取的 .docx / .txt / .md / .csv 题库。"
             self._show_result_dialog("题库导入失败", fail_msg, success=False)
 
+    def _dedup_imported(self, file_path: str, parsed: List[Question], report) -> tuple:
+        """
+        导入时的近似重复检测（config.DEDUP_ON_IMPORT）：与其他已登记题库一起检测，
+        merge 模式下去掉新题库里的重复题。返回 (题目列表, 要显示的说明文字)。
+        """
+        from import_report import STAGE_DEDUP
+
+        try:
+            from dedup import DEDUP_ON_IMPORT, dedup_new_bank
+        except ImportError:
+            # 近似去重依赖 NumPy，没装时跳过
+            return parsed, ""
+        if DEDUP_ON_IMPORT == "off":
+            return parsed, ""
+
+        existing: List[Question] = []
+        for e in self.registry.entries:
+            if e.path and os.path.abspath(e.path) == os.path.abspath(file_path):
+                continue
+            # 只比对题目内容：不算话题，也不把其他题库挤进 LRU
+            existing.extend(self.registry.questions(e.bank_id, topics=False))
+        with report.stage(STAGE_DEDUP):
+            kept, dedup_report = dedup_new_bank(parsed, existing)
+        if dedup_report is None:
+            return parsed, ""
+        note = dedup_report.summary()
+        if len(kept) < len(parsed):
+            note += f"\n已在导入时合并，去掉 {len(parsed) - len(kept)} 道重复题。"
+        elif dedup_report.clusters:
+            note += "\n（config.DEDUP_ON_IMPORT = \"merge\" 时会在导入时自动合并）"
+        return kept, note
+
     def on_delete_bank(self):
         if not self._ask_delete_bank():
             self.set_status("已取消删除题库。")
@@ -1785,13 +2338,21 @@ class QuizWindow(QMainWindow):
 
         delete_question_bank()
         self.current_bank_docx = None
+        self.registry.remove(self.bank_id)
+        active_bank = self.registry.active
+        if active_bank is not None:
+            self.bank_id = self.registry.activate(active_bank.bank_id).bank_id
+        else:
+            self.bank_id = profiles.DEFAULT_BANK_ID
+        self.profile = self._activate_profile(self.profile.name)
+        self.favorite_ids = load_favorite_ids()
+        self._reload_bank_combo()
 
         self.mode = None
         self.current_questions = []
         self.current_index = -1
         self.current_question = None
         self.waiting_answer = False
-        self.index_status = []
         self.user_answers = []
 
         self._clear_answer_card()
@@ -1812,14 +2373,14 @@ class QuizWindow(QMainWindow):
         self._refresh_remove_wrong_button()
 
     def on_overview_bank(self):
-        qs = load_questions_from_file()
+        qs = self._get_bank()
         if not qs:
             self.set_status("当前题库为空，请先导入 Word 题库。")
             self.set_feedback_text("题库总览：当前没有可用题目。")
             self.animate_feedback()
             return
 
-        dlg = QuestionOverviewDialog(self, qs, self.favorite_ids, self.app_icon)
+        dlg = QuestionOverviewDialog(self, qs, self.favorite_ids, self.app_icon, item_params=self._item_params())
         dlg.exec()
         self.set_status("题库总览窗口已关闭，可以继续刷题。")
 
@@ -1831,11 +2392,18 @@ class QuizWindow(QMainWindow):
             self.animate_feedback()
             return
 
-        dlg = WrongOverviewDialog(self, wrong_all, self._toggle_wrong_book_entry, self.app_icon)
-        dlg.exec()
+        dlg = WrongOverviewDialog(
+            self,
+            wrong_all,
+            self._toggle_wrong_book_entry,
+            self.app_icon,
+            practice_callback=self._start_similar_practice,
+        )
+        started = dlg.exec() == QDialog.Accepted
         self._refresh_wrong_book_cache()
         self._refresh_remove_wrong_button()
-        self.set_status("错题本总览窗口已关闭，可以继续刷题。")
+        if not started:
+            self.set_status("错题本总览窗口已关闭，可以继续刷题。")
 
     def _toggle_favorite_state(self, qid: int) -> bool:
         if qid in self.favorite_ids:
@@ -1866,7 +2434,7 @@ class QuizWindow(QMainWindow):
         self.animate_feedback()
 
     def on_view_favorites(self):
-        qs = load_questions_from_file()
+        qs = self._get_bank()
         if not qs:
             self.set_status("当前题库为空，无法查看收藏题目。")
             self.set_feedback_text("收藏夹为空或题库未加载。")
@@ -1951,11 +2519,28 @@ class QuizWindow(QMainWindow):
                 lines.append(
                     f"- {qtype_label(qtype)}：{corr}/{tot}，正确率 {format_rate(corr, tot)}"
                 )
+        lines.extend(self._topic_stat_lines())
 
         self.set_feedback_text("\n".join(lines))
         self.set_status(status)
         self.animate_feedback()
 
+    def _topic_stat_lines(self, limit: int = 8) -> List[str]:
+        """当前题库按话题的正确率（来自作答历史），正确率低的排前面。"""
+        try:
+            from topics import topic_stats
+        except ImportError:
+            return []
+        answered = [s for s in topic_stats(self._get_bank(), load_history(), self.bank_id) if s.answered]
+        if not answered:
+            return []
+        lines = ["", "各话题表现（正确率从低到高）："]
+        for s in answered[:limit]:
+            lines.append(f"- {s.topic}（{s.questions} 题）：{s.correct}/{s.answered}，正确率 {format_rate(s.correct, s.answered)}")
+        if len(answered) > limit:
+            lines.append(f"……另有 {len(answered) - limit} 个话题")
+        return lines
+
     def _ask_refresh_stats(self) -> bool:
         """自定义弹窗询问是否重置统计，不再播放提示音。"""
 
@@ -2207,7 +2792,7 @@ class QuizWindow(QMainWindow):
     # ---------- 开始刷题 ----------
 
     def on_start_normal(self):
-        all_questions = load_questions_from_file()
+        all_questions = self._get_bank()
         if not all_questions:
             self.set_status("题库为空：请先导入 Word 题库并解析。")
             self.set_progress("当前未在刷题。")
@@ -2228,11 +2813,36 @@ class QuizWindow(QMainWindow):
             self.animate_feedback()
             return
 
+        band = self.difficulty_combo.currentData()
+        if band != "all":
+            try:
+                from item_stats import ITEM_MIN_ATTEMPTS, filter_by_band, is_refreshing, refresh_error
+            except ImportError:
+                self.set_status("按难度抽题需要安装 NumPy（pip install numpy）。")
+                return
+            pool = filter_by_band(pool, self._item_params(), band)
+            if not pool and is_refreshing(self.bank_id):
+                self.set_status("题目难度正在后台根据作答历史计算，请稍后再试。")
+                self.animate_feedback()
+                return
+            if not pool and refresh_error(self.bank_id):
+                self.set_status(f"题目难度统计计算失败：{refresh_error(self.bank_id)}")
+                self.animate_feedback()
+                return
+            if not pool:
+                self.set_status(
+                    f"还没有“{self.difficulty_combo.currentText()}”的题：每道题至少作答 {ITEM_MIN_ATTEMPTS} 次才会分档，"
+                    "可以先按“全部难度”刷几轮。"
+                )
+                self.animate_feedback()
+                return
+
         n = int(self.count_spin.value())
         if n > len(pool):
             n = len(pool)
 
-        questions = random.sample(pool, k=n)
+        # 题库对象是共用的，刷题过程会改写 wrong_count，因此抽出的题各复制一份
+        questions = [copy.copy(q) for q in balanced_sample(pool, n)]
         self._begin_quiz(questions, mode="normal")
 
     def on_start_wrong(self):
@@ -2245,8 +2855,8 @@ class QuizWindow(QMainWindow):
             self.current_questions = []
             self.current_index = -1
             self.current_question = None
-            self.index_status.clear()
             self.user_answers.clear()
+            self._clear_answer_card()
             self.clear_options()
             self.show_short_answer(False)
             self.btn_submit.setText("提交答案")
@@ -2263,6 +2873,49 @@ class QuizWindow(QMainWindow):
         questions = random.sample(wrong_all, k=n)
         self._begin_quiz(questions, mode="wrong")
 
+    def _item_params(self) -> Dict[int, ItemParams]:
+        """
+        当前题库各题的难度 / 区分度：立即返回上次保存的结果，作答历史明显增多时在后台线程重算
+        （见 item_stats.py），不阻塞界面；没装 NumPy 时为空。
+        """
+        try:
+            from item_stats import item_stats_for_bank
+        except ImportError:
+            return {}
+        return item_stats_for_bank(self.bank_id)
+
+    def _start_similar_practice(self, seeds: List[Question]) -> bool:
+        """以错题为种子，从当前题库里取最相似的题开一轮“练相似题”；开始了返回 True。"""
+        try:
+            from similar_index import index_for_bank
+        except ImportError:
+            # 相似题索引依赖 NumPy
+            self.set_status("练相似题需要安装 NumPy（pip install numpy）。")
+            return False
+
+        bank = self._get_bank()
+        entry = self.registry.get(self.bank_id)
+        if not bank or entry is None:
+            self.set_status("当前题库为空，无法推荐相似题。")
+            return False
+
+        t0 = time.perf_counter()
+        index = index_for_bank(self.bank_id, bank, entry.snapshot)
+        n = int(self.count_spin.value())
+        hits = index.similar_to([q.id for q in seeds], k=n)
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        if not hits:
+            self.set_status("当前题库里没有找到这些错题的相似题（错题可能来自其他题库）。")
+            return False
+
+        by_id = {q.id: q for q in bank}
+        questions = [copy.copy(by_id[qid]) for qid, _ in hits if qid in by_id]
+        self._begin_quiz(questions, mode="similar")
+        self.set_status(
+            f"练相似题：根据 {len(seeds)} 道错题选出 {len(questions)} 道相似题（检索 {elapsed_ms:.0f} 毫秒）。"
+        )
+        return True
+
     def _begin_quiz(self, questions: List[Question], mode: str):
         self.mode = mode
         self._refresh_wrong_book_cache()
@@ -2319,63 +2972,41 @@ class QuizWindow(QMainWindow):
         )
         self.set_question_text(q.question.strip())
 
-        self.clear_options()
+        # 选项按钮由按钮池复用：这里不整体清空，只在各分支里重新贴标签
+        self.current_option_value = ""
         self.show_short_answer(False)
         self.set_feedback_text("这里会显示你本题是否答对，以及参考答案。")
 
+        saved = (
+            self.user_answers[self.current_index]
+            if self.current_index < len(self.user_answers)
+            else ""
+        )
+
         if q.q_type == config.QTYPE_SINGLE:
             if q.options:
                 self.options_box.setTitle("选择一个选项")
-                for label in sorted(q.options.keys()):
-                    text = q.options.get(label, "")
-                    btn = QRadioButton(f"{label}.  {text}")
-                    btn.setStyleSheet("font-size: 16px; padding: 6px 4px; font-weight: 500;")
-                    btn.toggled.connect(self._make_option_handler(label))
-                    self.options_layout.addWidget(btn)
-                    self.option_buttons.append(btn)
-                saved = (
-                    self.user_answers[self.current_index]
-                    if self.current_index < len(self.user_answers)
-                    else ""
-                )
+                items = [
+                    (label, f"{label}.  {q.options.get(label, '')}")
+                    for label in sorted(q.options.keys())
+                ]
+                self.option_pool.set_options(items, saved)
                 if saved:
                     self.current_option_value = saved
-                    for b in self.option_buttons:
-                        if b.text().startswith(f"{saved}."):
-                            b.setChecked(True)
-                            break
             else:
                 self.options_box.setTitle("本题未解析出选项，请在下方输入答案")
+                self.option_pool.clear()
                 self.show_short_answer(True)
 
         elif q.q_type == config.QTYPE_TF:
-            texts = ["正确", "错误"]
             self.options_box.setTitle("选择“正确”或“错误”")
-            for txt in texts:
-                btn = QRadioButton(txt)
-                btn.setStyleSheet("font-size: 17px; padding: 6px 4px; font-weight: 500;")
-                btn.toggled.connect(self._make_option_handler(txt))
-                self.options_layout.addWidget(btn)
-                self.option_buttons.append(btn)
-            saved = (
-                self.user_answers[self.current_index]
-                if self.current_index < len(self.user_answers)
-                else ""
-            )
+            self.option_pool.set_options([("正确", "正确"), ("错误", "错误")], saved)
             if saved:
                 self.current_option_value = saved
-                for b in self.option_buttons:
-                    if b.text() == saved:
-                        b.setChecked(True)
-                        break
         else:
             self.options_box.setTitle("本题没有选项，在下方输入你的答案")
+            self.option_pool.clear()
             self.show_short_answer(True)
-            saved = (
-                self.user_answers[self.current_index]
-                if self.current_index < len(self.user_answers)
-                else ""
-            )
             if saved:
                 self.short_answer_edit.setPlainText(saved)
 
@@ -2385,13 +3016,10 @@ class QuizWindow(QMainWindow):
         self._refresh_favorite_star()
         self._refresh_remove_wrong_button()
 
-    def _make_option_handler(self, value: str):
-        def handler(checked: bool):
-            if checked:
-                self.current_option_value = value
-                if 0 <= self.current_index < len(self.user_answers):
-                    self.user_answers[self.current_index] = value
-        return handler
+    def _on_option_selected(self, value: str):
+        self.current_option_value = value
+        if 0 <= self.current_index < len(self.user_answers):
+            self.user_answers[self.current_index] = value
 
     # ---------- 提交 / 上一题 / 下一题 ----------
 
@@ -2433,6 +3061,12 @@ class QuizWindow(QMainWindow):
             f"你的答案：{user_raw or '(空)'}",
             f"参考答案：{answer_text or '(题库中未设置答案)'}",
         ]
+        blank_grade = grade_blank_answer(q, user_raw)
+        if blank_grade is not None and blank_grade.total > 1:
+            lines.append(f"逐空判分：{blank_grade.summary()}")
+        hint = short_answer_hint(q, user_raw)
+        if hint is not None:
+            lines.append(hint.summary())
         self.set_feedback_text("\n".join(lines))
         self.set_status("本题已判分，查看反馈后可点击“下一题”，或用左侧答题卡快速跳题。")
         self.animate_feedback()
@@ -2446,8 +3080,7 @@ class QuizWindow(QMainWindow):
             self._save_wrong_question_immediately(q)
 
         idx = self.current_index
-        if 0 <= idx < len(self.index_status):
-            self.index_status[idx] = "correct" if is_correct else "wrong"
+        self._set_index_status(idx, "correct" if is_correct else "wrong")
         if 0 <= idx < len(self.user_answers):
             self.user_answers[idx] = user_raw
 
@@ -2457,6 +3090,18 @@ class QuizWindow(QMainWindow):
         per_correct_once = {t: 1 if is_correct else 0}
         _update_stats(per_total_once, per_correct_once)
         self.refresh_global_stats()
+        append_history(
+            [
+                {
+                    "ts": time.time(),
+                    "bank": self.bank_id,
+                    "qid": q.id,
+                    "q_type": t,
+                    "correct": is_correct,
+                    "mode": self.mode,
+                }
+            ]
+        )
 
         self._refresh_answer_card()
 
@@ -2571,6 +3216,12 @@ class QuizWindow(QMainWindow):
             f"你的答案：{user_raw or '(空)'}",
             f"参考答案：{answer_text or '(题库中未设置答案)'}",
         ]
+        blank_grade = grade_blank_answer(q, user_raw)
+        if blank_grade is not None and blank_grade.total > 1:
+            lines.append(f"逐空判分：{blank_grade.summary()}")
+        hint = short_answer_hint(q, user_raw)
+        if hint is not None:
+            lines.append(hint.summary())
         self.set_feedback_text("\n".join(lines))
         self.animate_feedback()
 
@@ -2586,7 +3237,7 @@ class QuizWindow(QMainWindow):
         total_questions = len(self.current_questions)
         unanswered = max(total_questions - answered, 0)
 
-        if self.mode in {"normal", "wrong"}:
+        if self.mode in {"normal", "wrong", "similar"}:
             existing = load_wrong_questions()
             by_id = {q.id: q for q in existing}
             for q in self.wrong_in_session.values():
@@ -2642,12 +3293,33 @@ class QuizWindow(QMainWindow):
 
 
 def main():
-    app = QApplication(sys.argv)
+    argv = list(sys.argv)
+    profiler: Optional[StartupProfiler] = None
+    if "--profile-startup" in argv:
+        argv.remove("--profile-startup")
+        profiler = StartupProfiler()
+        profiler.add("导入 PySide6", _IMPORT_T_QT - _IMPORT_T0)
+        profiler.add("导入本地模块", _IMPORT_T_LOCAL - _IMPORT_T_QT)
+        profiler.restart()
+
+    app = QApplication(argv)
     base_font = QFont("Microsoft YaHei", 12)
     app.setFont(base_font)
+    if profiler:
+        profiler.mark("创建 QApplication")
 
-    win = QuizWindow()
+    win = QuizWindow(profiler=profiler)
     win.show()
+
+    if profiler:
+        profiler.mark("首次 show()")
+
+        def _print_profile():
+            profiler.mark("首轮事件循环（首帧）")
+            print(profiler.report())
+
+        QTimer.singleShot(0, _print_profile)
+
     sys.exit(app.exec())
 
 
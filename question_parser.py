@@ -8,21 +8,29 @@ question_parser.py
 - 不按题号硬编码题型；
 - 优先根据“大标题”识别题型（包含：单选/选择、填空、判断、简答/问答）；
 - 没有标题时，会根据选项/答案内容做简单推断；
-- 解析完会打印各题型数量，方便检查当前题库是否“长得正常”。
+- 解析完会打印各题型数量，方便检查当前题库是否“长得正常”；
+- 行分类（tokenize_lines）和状态机（assemble_questions）与文件格式无关，
+  纯文本 / Markdown / CSV 题库由 importers.py 复用；python-docx 只在解析 .docx 时才导入；
+- 传入 ImportReport 时记录各阶段耗时和段落 / 题目数（见 import_report.py）。
 """
 
 from __future__ import annotations
 
 import os
 import re
-from typing import List, Dict, Any
-
-from docx import Document
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Tuple
 
 import config
+from blank_answers import split_blank_answer
 from models import Question
+from short_answer import attach_short_refs
 from storage import save_questions_to_file
 
+if TYPE_CHECKING:
+    from docx.document import Document
+
+    from import_report import ImportReport
+
 # 匹配题目开始：例如 “1、xxx” “2. xxx”
 QUESTION_START_RE = re.compile(r"^(\d+)[、\.．]\s*(.*)")
 # 匹配选项：例如 “A、 xxx” “B. xxx”
@@ -52,9 +60,92 @@ def _detect_qtype_from_section(title_text: str) -> str | None:
     return None
 
 
-def _parse_document(document: Document) -> List[Dict[str, Any]]:
+# ===== 单遍分类：每个段落只跑一次正则 =====
+#
+# 四种特殊行的首字符互不相同（中文数字 / 数字 / “正” / 选项字母），
+# 合成一个分支正则后，一次 match 就能判断行的类别并取出各部分内容，
+# 与原来依次尝试 SECTION_RE / QUESTION_START_RE / startswith / OPTION_RE 的结果一致。
+LINE_RE = re.compile(
+    r"(?P<sec>[一二三四五六七八九十]+)[、\.．]\s*(?P<sec_body>.*)"
+    r"|(?P<num>\d+)[、\.．]\s*(?P<q_body>.*)"
+    r"|(?P<ans>正确答案)"
+    r"|(?P<opt>[A-DＡ-Ｄ])[、,，\.．]\s*(?P<opt_body>.*)"
+)
+
+# 词法单元：(类型, 值, 附加值, 去掉首尾空白后的原文)
+TOK_SECTION = 0   # 值 = 标题识别出的题型（可能为 None）
+TOK_QUESTION = 1  # 值 = 题号，附加值 = 题干首行
+TOK_ANSWER = 2    # 值 = “正确答案：”之后的内容
+TOK_OPTION = 3    # 值 = 选项字母（已转半角），附加值 = 选项内容
+TOK_TEXT = 4      # 普通文本
+
+
+def iter_paragraph_texts(document: Document) -> Iterator[str]:
+    """
+    逐段给出正文段落文本。
+
+    直接遍历 body 下的 <w:p> 元素，只拼接 run 里的 <w:t> / <w:tab> / <w:br>，
+    避免 python-docx 为每个段落和 run 创建代理对象（Paragraph.text 的主要开销）。
+    对普通文字段落，结果与 paragraph.text 相同。
+    """
+    from docx.oxml.ns import qn
+
+    body = document.element.body
+    tag_p = qn("w:p")
+    tag_r = qn("w:r")
+    tag_t = qn("w:t")
+    tag_tab = qn("w:tab")
+    tag_br = qn("w:br")
+    tag_cr = qn("w:cr")
+    for p in body.iterchildren(tag_p):
+        parts = []
+        for r in p.iter(tag_r):
+            for child in r:
+                tag = child.tag
+                if tag == tag_t:
+                    if child.text:
+                        parts.append(child.text)
+                elif tag == tag_tab:
+                    parts.append("\t")
+                elif tag == tag_br or tag == tag_cr:
+                    parts.append("\n")
+        yield "".join(parts)
+
+
+def tokenize_lines(lines: Iterable[str]) -> Iterator[Tuple[int, Any, str, str]]:
+    """
+    把段落文本流分类成词法单元（生成器，不缓存整份文档）。
+    空行直接跳过；选项行是否真的算选项由状态机根据上下文决定。
+    """
+    match = LINE_RE.match
+    for raw in lines:
+        text = raw.strip()
+        if not text:
+            continue
+        m = match(text)
+        if m is None:
+            yield TOK_TEXT, text, "", text
+            continue
+        # lastgroup 就是命中分支的最后一个命名组，用它分派，不必逐个判断
+        kind = m.lastgroup
+        if kind == "q_body":
+            yield TOK_QUESTION, int(m.group("num")), m.group("q_body").strip(), text
+        elif kind == "opt_body":
+            label = m.group("opt")
+            yield TOK_OPTION, CN_OPTION_MAP.get(label, label), m.group("opt_body").strip(), text
+        elif kind == "ans":
+            # 去掉“正确答案：”前缀，剩下的就是第一部分答案
+            part = text.split("：", 1)
+            if len(part) == 1:
+                part = text.split(":", 1)
+            yield TOK_ANSWER, part[1].strip() if len(part) > 1 else "", "", text
+        else:
+            yield TOK_SECTION, _detect_qtype_from_section(m.group("sec_body")), "", text
+
+
+def assemble_questions(tokens: Iterable[Tuple[int, Any, str, str]]) -> List[Dict[str, Any]]:
     """
-    低层解析：把 docx 的段落按“题目→选项→答案”拆成原始结构。
+    状态机：把词法单元按“题目→选项→答案”拼成原始结构。
     这里会记录：题号、当前章节的题型、题干、选项、答案文本。
     """
     questions_raw: List[Dict[str, Any]] = []
@@ -63,40 +154,27 @@ def _parse_document(document: Document) -> List[Dict[str, Any]]:
     state: str | None = None  # None / "question" / "options" / "answer"
     current_section_type: str | None = None  # 来自标题的题型
 
-    for para in document.paragraphs:
-        text = para.text.strip()
-        if not text:
-            continue
-
+    for kind, a, b, text in tokens:
         # 1. 大标题（“一、 单选题 …”）
-        m_sec = SECTION_RE.match(text)
-        if m_sec:
-            title_body = m_sec.group(1)
-            qtype = _detect_qtype_from_section(title_body)
-            if qtype:
-                current_section_type = qtype
+        if kind == TOK_SECTION:
+            if a:
+                current_section_type = a
             continue
 
         # 2. 题目开始：例如 “123、xxxx”
-        m_q = QUESTION_START_RE.match(text)
-        if m_q:
+        if kind == TOK_QUESTION:
             # 先收尾上一题
             if current is not None:
                 questions_raw.append(current)
-
-            number = int(m_q.group(1))
-            body = m_q.group(2).strip()
-
             current = {
-                "number": number,                # 题号
+                "number": a,                     # 题号
                 "q_type": current_section_type,  # 当前章节推断的题型（可能为 None）
                 "text_lines": [],                # 题干多行文本
                 "options": {},                   # 选项 dict: { 'A': 'xxx', ... }
                 "answer_lines": [],              # 答案多行文本
             }
-            if body:
-                current["text_lines"].append(body)
-
+            if b:
+                current["text_lines"].append(b)
             state = "question"
             continue
 
@@ -105,28 +183,19 @@ def _parse_document(document: Document) -> List[Dict[str, Any]]:
             continue
 
         # 3. 正确答案开头：例如 “正确答案： A”
-        if text.startswith("正确答案"):
-            # 去掉“正确答案：”前缀，剩下的就是第一部分答案
-            part = text.split("：", 1)
-            if len(part) == 1:
-                part = text.split(":", 1)
-            ans = part[1].strip() if len(part) > 1 else ""
-            if ans:
-                current["answer_lines"].append(ans)
+        if kind == TOK_ANSWER:
+            if a:
+                current["answer_lines"].append(a)
             state = "answer"
             continue
 
-        # 4. 选项行：例如 “A、 队列”
-        m_opt = OPTION_RE.match(text)
-        if m_opt and state in ("question", "options"):
-            label = m_opt.group(1)
-            label = CN_OPTION_MAP.get(label, label)
-            content = m_opt.group(2).strip()
-            current["options"][label] = content
+        # 4. 选项行：例如 “A、 队列”（只在题干 / 选项之后才算选项）
+        if kind == TOK_OPTION and state in ("question", "options"):
+            current["options"][a] = b
             state = "options"
             continue
 
-        # 5. 其余内容：根据当前状态归类
+        # 5. 其余内容（包括不在题干之后的“选项行”）：根据当前状态归类
         if state == "answer":
             # 答案可能拆成很多行（第1空 / 第2空 / 解析等），统统收进来
             current["answer_lines"].append(text)
@@ -141,6 +210,13 @@ def _parse_document(document: Document) -> List[Dict[str, Any]]:
     return questions_raw
 
 
+def _parse_document(document: Document) -> List[Dict[str, Any]]:
+    """
+    低层解析：段落文本 → 词法单元 → 状态机，全程流式，每段只分类一次。
+    """
+    return assemble_questions(tokenize_lines(iter_paragraph_texts(document)))
+
+
 def _guess_qtype_for_raw(raw: Dict[str, Any]) -> str:
     """
     为没有标题信息的题目做“兜底题型猜测”：
@@ -193,24 +269,31 @@ def _build_questions(raw_list: List[Dict[str, Any]]) -> List[Question]:
         else:
             answer_text = "\n".join(raw["answer_lines"]).strip()
 
-        # 这里只传当前 Question 支持的字段：id / q_type / question / options / answer
+        # 填空题在导入时就拆成每空的归一化答案，判分时不用再处理原文
         q = Question(
             id=number,
             q_type=qtype,
             question=question_text,
             options=options,
             answer=answer_text,
+            blanks=split_blank_answer(answer_text) if qtype == config.QTYPE_BLANK else [],
         )
         questions.append(q)
 
     # 按题号排序，保证 1~N 依次排列
     questions.sort(key=lambda x: x.id)
+    # 简答题参考向量要用整个题库算 IDF，所以放在最后统一算
+    attach_short_refs(questions)
     return questions
 
 
-def parse_docx_to_questions(docx_path: str | None = None) -> List[Question]:
+def parse_docx_to_questions(
+    docx_path: str | None = None,
+    report: ImportReport | None = None,
+) -> List[Question]:
     """
     对外函数：从 .docx 解析为 Question 列表。
+    传入 report 时分阶段计时（加载 / 段落提取 / 行分类 / 拼题 / 构建）。
     """
     if docx_path is None:
         docx_path = config.DEFAULT_DOCX_PATH
@@ -218,9 +301,23 @@ def parse_docx_to_questions(docx_path: str | None = None) -> List[Question]:
     if not os.path.exists(docx_path):
         raise FileNotFoundError(f"找不到题库文件：{docx_path}")
 
-    document = Document(docx_path)
-    raw_list = _parse_document(document)
-    questions = _build_questions(raw_list)
+    from docx import Document
+
+    if report is None:
+        return _build_questions(_parse_document(Document(docx_path)))
+
+    from import_report import STAGE_ASSEMBLE, STAGE_BUILD, STAGE_EXTRACT, STAGE_LOAD, STAGE_TOKENIZE
+
+    report.begin(docx_path)
+    with report.stage(STAGE_LOAD):
+        document = Document(docx_path)
+    texts = report.timed(iter_paragraph_texts(document), STAGE_EXTRACT, counter="paragraphs")
+    tokens = report.timed(tokenize_lines(texts), STAGE_TOKENIZE)
+    with report.stage(STAGE_ASSEMBLE):
+        raw_list = assemble_questions(tokens)
+    with report.stage(STAGE_BUILD):
+        questions = _build_questions(raw_list)
+    report.questions = len(questions)
     return questions
 
 
@@ -237,8 +334,15 @@ def parse_docx_and_save_to_json(
     if json_path is None:
         json_path = config.DEFAULT_JSON_PATH
 
-    questions = parse_docx_to_questions(docx_path)
-    save_questions_to_file(questions, json_path)
+    # 同一份文件再次导入时直接取解析缓存
+    from import_report import STAGE_SAVE, ImportReport
+    from parse_cache import parse_with_cache
+
+    report = ImportReport()
+    questions, _ = parse_with_cache(docx_path, parse=parse_docx_to_questions, report=report)
+    with report.stage(STAGE_SAVE):
+        save_questions_to_file(questions, json_path)
+    report.log()
 
     # 打印一下各题型数量，方便你在终端确认是否“识别正常”
     count_single = sum(1 for q in questions if q.q_type == config.QTYPE_SINGLE)
@@ -252,6 +356,7 @@ def parse_docx_and_save_to_json(
         f"单选题：{count_single}  填空题：{count_blank}  "
         f"判断题：{count_tf}  简答题：{count_short}"
     )
+    print(report.summary())
     print("=======================")
 
     return len(questions)
@@ -6,15 +6,20 @@ quiz_engine.py
 - 支持按题型随机抽题
 - 命令行交互刷题，立即判对错
 - 记录错题，维护错题本
-- 对简答题采用“自评模式”：系统不自动判分，由你自己根据参考答案判断是否算对
+- 填空题按空判分（每空的可接受答案在导入时已拆好），多空题可以得部分分
+- 对简答题采用“自评模式”（可选给出 n-gram 相似度参考分，见 short_answer.py）：系统不自动判分，由你自己根据参考答案判断是否算对
 - 每一轮刷题结束后，更新全局做题统计（存到 stats.json）
+- 抽题时可以按话题轮流抽（题目的话题在载入题库时自动聚类并按题库缓存，见 topics.py）
 """
 
 import random
-from typing import List, Tuple, Dict
+from typing import Any, Callable, Dict, List, Sequence, Tuple, TypeVar
 
 import config
+import storage
+from blank_answers import BLANK_JOINER, BlankGrade, blank_keys, format_blank_keys, grade_blanks
 from models import Question
+from short_answer import SHORT_AUTO_SCORE, ShortScore, score_short_answer
 from storage import (
     load_questions_from_file,
     load_wrong_questions,
@@ -23,6 +28,11 @@ from storage import (
     save_stats,
 )
 
+TOPIC_BALANCED_SAMPLING = getattr(config, "TOPIC_BALANCED_SAMPLING", True)
+
+T = TypeVar("T")
+
+
 # ==================== 辅助函数：类型、显示 ====================
 
 def _get_qtype_label(q_type: str) -> str:
@@ -196,58 +206,183 @@ def _normalize_text_answer(ans: str) -> str:
     return ans
 
 
-def _check_answer(question: Question, user_raw: str) -> Tuple[bool, str, str]:
+def _normalize_correct_answer(question: Question) -> str:
     """
-    判定用户答案是否正确（自动判分部分）。
-
-    返回：(是否正确, 规范化后的用户答案, 规范化后的正确答案)
-
-    注意：
-    - 对于简答题（QTYPE_SHORT），这里的“是否正确”一律返回 False，
-      只提供规范化后的文本，真正的判分交给用户自评。
+    按题型把题库里的正确答案归一化（判分用的“标准键”）。
     """
     q_type = question.q_type
+    if q_type == config.QTYPE_SINGLE:
+        return _normalize_single_correct_answer(question.answer)
+    if q_type == config.QTYPE_TF:
+        return _normalize_tf_correct_answer(question.answer)
+    if q_type == config.QTYPE_BLANK:
+        keys = blank_keys(question)
+        if keys:
+            return format_blank_keys(keys)
+    return _normalize_text_answer(question.answer)
+
 
+def _grade_with_key(
+    q_type: str,
+    correct_norm: str,
+    user_raw: str,
+    blanks: List[List[str]] | None = None,
+) -> Tuple[bool, str, str]:
+    """
+    用已经归一化好的正确答案判分，返回值与 _check_answer 相同。
+    填空题传入 blanks（每空的可接受答案）时逐空比较，全部空都对才算对。
+    """
     # 单选题
     if q_type == config.QTYPE_SINGLE:
-        correct_norm = _normalize_single_correct_answer(question.answer)
         user_norm = _normalize_single_user_answer(user_raw)
         return user_norm == correct_norm and correct_norm != "", user_norm, correct_norm
 
     # 判断题
     if q_type == config.QTYPE_TF:
-        correct_norm = _normalize_tf_correct_answer(question.answer)
         user_norm = _normalize_tf_user_answer(user_raw)
         return user_norm == correct_norm and correct_norm in {"T", "F"}, user_norm, correct_norm
 
-    # 填空题：严格字符串比较（可以后续再改宽松）
+    # 填空题：逐空比较预先拆好的答案；没有拆分结果时整段严格比较
     if q_type == config.QTYPE_BLANK:
-        correct_norm = _normalize_text_answer(question.answer)
+        if blanks:
+            grade = grade_blanks(blanks, user_raw)
+            return grade.all_correct, BLANK_JOINER.join(grade.user_keys), correct_norm
         user_norm = _normalize_text_answer(user_raw)
         return user_norm == correct_norm and correct_norm != "", user_norm, correct_norm
 
     # 简答题：不自动判分，只做规范化，返回 False
-    if q_type == config.QTYPE_SHORT:
-        correct_norm = _normalize_text_answer(question.answer)
-        user_norm = _normalize_text_answer(user_raw)
-        return False, user_norm, correct_norm
-
-    # 理论上不会走到这里
-    correct_norm = _normalize_text_answer(question.answer)
+    # （未知题型同样不判分）
     user_norm = _normalize_text_answer(user_raw)
     return False, user_norm, correct_norm
 
 
+def _check_answer(question: Question, user_raw: str) -> Tuple[bool, str, str]:
+    """
+    判定用户答案是否正确（自动判分部分）。
+
+    返回：(是否正确, 规范化后的用户答案, 规范化后的正确答案)
+
+    注意：
+    - 对于简答题（QTYPE_SHORT），这里的“是否正确”一律返回 False，
+      只提供规范化后的文本，真正的判分交给用户自评。
+    """
+    blanks = blank_keys(question) if question.q_type == config.QTYPE_BLANK else None
+    return _grade_with_key(question.q_type, _normalize_correct_answer(question), user_raw, blanks)
+
+
+def grade_blank_answer(question: Question, user_raw: str) -> BlankGrade | None:
+    """
+    填空题的逐空判分结果（用于显示每空对错和部分分）；不是填空题或答案无法拆分时返回 None。
+    """
+    if question.q_type != config.QTYPE_BLANK:
+        return None
+    keys = blank_keys(question)
+    return grade_blanks(keys, user_raw) if keys else None
+
+
+def short_answer_hint(question: Question, user_raw: str) -> ShortScore | None:
+    """
+    简答题的参考分（config.SHORT_AUTO_SCORE 关闭时返回 None）；只用于提示，不改变判分结果。
+    """
+    if not SHORT_AUTO_SCORE:
+        return None
+    return score_short_answer(question, user_raw)
+
+
+def grade_details(question: Question, user_raw: str) -> Dict[str, Any]:
+    """
+    单题判分结果里除对错之外的附加字段：填空题的每空对错 blanks 和得分比例 score，
+    简答题的参考分 score 和建议 suggested（不影响 correct，只供前端提示）。
+    单题提交和整张答题卡返回的字段保持一致。
+    """
+    details: Dict[str, Any] = {}
+    blank_grade = grade_blank_answer(question, user_raw)
+    if blank_grade is not None:
+        details["blanks"] = blank_grade.correct
+        details["score"] = round(blank_grade.score, 4)
+    hint = short_answer_hint(question, user_raw)
+    if hint is not None:
+        details["score"] = round(hint.score, 4)
+        details["suggested"] = hint.passed
+    return details
+
+
+def grade_batch(items: List[Tuple[Question, str]]) -> List[Tuple[bool, str, str]]:
+    """
+    批量判分：items 为 [(题目, 用户原始答案), ...]，返回与 items 一一对应的判分结果。
+
+    整张答题卡 / 整个班级一起提交时，同一道题的正确答案只归一化一次。
+    """
+    keys: Dict[int, str] = {}
+    results: List[Tuple[bool, str, str]] = []
+    for q, user_raw in items:
+        key = keys.get(id(q))
+        if key is None:
+            key = _normalize_correct_answer(q)
+            keys[id(q)] = key
+        blanks = blank_keys(q) if q.q_type == config.QTYPE_BLANK else None
+        results.append(_grade_with_key(q.q_type, key, user_raw, blanks))
+    return results
+
+
+# ==================== 抽题 ====================
+
+def load_topics(questions: List[Question], json_path: str | None = None) -> List[Question]:
+    """
+    给刚载入的题库补上话题（topics.ensure_topics，按快照路径缓存话题模型），原样返回列表。
+    json_path 默认是当前题库快照；没装 NumPy 时不分话题。
+    """
+    try:
+        from topics import ensure_topics
+    except ImportError:
+        return questions
+    ensure_topics(questions, json_path or storage.DEFAULT_JSON_PATH)
+    return questions
+
+
+def balanced_sample(pool: Sequence[T], k: int, topic_of: Callable[[T], str] | None = None) -> List[T]:
+    """
+    按话题均衡抽 k 道题：各话题的题各自打乱，话题顺序也打乱，然后轮流每个话题取一道，
+    题少的话题取完就跳过。没有话题信息（或关闭了 TOPIC_BALANCED_SAMPLING）时等同 random.sample。
+    topic_of 用来从 pool 的元素取话题，默认取 Question.topic。
+    """
+    k = min(k, len(pool))
+    topic_of = topic_of or (lambda q: q.topic)
+    groups: Dict[str, List[T]] = {}
+    if TOPIC_BALANCED_SAMPLING:
+        for item in pool:
+            groups.setdefault(topic_of(item), []).append(item)
+    if len(groups) <= 1 or "" in groups:
+        return random.sample(list(pool), k=k)
+
+    queues = list(groups.values())
+    for q in queues:
+        random.shuffle(q)
+    random.shuffle(queues)
+    picked: List[T] = []
+    depth = 0
+    while len(picked) < k:
+        for q in queues:
+            if depth < len(q):
+                picked.append(q[depth])
+                if len(picked) == k:
+                    break
+        depth += 1
+    return picked
+
+
 # ==================== 统计更新 ====================
 
-def _update_stats(per_type_total: Dict[str, int], per_type_correct: Dict[str, int]) -> None:
+def _update_stats(
+    per_type_total: Dict[str, int], per_type_correct: Dict[str, int], path: str | None = None
+) -> None:
     """
-    把本轮刷题的统计，累加到全局 stats.json 里。
+    把本轮刷题的统计，累加到全局 stats.json 里（path 给定时写到该文件，例如某个档案的统计）。
     """
     if not per_type_total:
         return
 
-    stats = load_stats()
+    stats = load_stats(path)
 
     # 总量
     total_answered_round = sum(per_type_total.values())
@@ -265,7 +400,7 @@ def _update_stats(per_type_total: Dict[str, int], per_type_correct: Dict[str, in
     for q_type, n in per_type_correct.items():
         pc[q_type] = pc.get(q_type, 0) + n
 
-    save_stats(stats)
+    save_stats(stats, path)
 
 
 # ==================== 核心：出题 + 做题 ====================
@@ -347,6 +482,9 @@ def _do_quiz_session(questions: List[Question]) -> Tuple[int, int, List[Question
         # 简答题：不自动判分，交给你自己决定
         if q.q_type == config.QTYPE_SHORT:
             print("【提示】简答题不自动判分，请自己对照参考答案。")
+            hint = short_answer_hint(q, user_raw)
+            if hint is not None:
+                print(f"【参考得分】{hint.summary()}")
             is_correct = _ask_self_judge_for_short()
         else:
             # 对于单选 / 判断 / 填空题，使用自动判分结果
@@ -359,6 +497,11 @@ def _do_quiz_session(questions: List[Question]) -> Tuple[int, int, List[Question
         if q.q_type in (config.QTYPE_SINGLE, config.QTYPE_TF):
             print(f"【规范化对比】你的答案：{user_norm or '(空)'}，标准答案：{correct_norm or '(未知)'}")
 
+        # 多空填空题：逐空对错和部分分
+        blank_grade = grade_blank_answer(q, user_raw)
+        if blank_grade is not None and blank_grade.total > 1:
+            print(f"【逐空判分】{blank_grade.summary()}")
+
         # 统计：按题型累加
         t = q.q_type
         per_type_total[t] = per_type_total.get(t, 0) + 1
@@ -389,7 +532,7 @@ def run_normal_quiz():
     """
     普通模式刷题。
     """
-    all_questions = load_questions_from_file()
+    all_questions = load_topics(load_questions_from_file())
     if not all_questions:
         print("\n【提示】当前题库为空。")
         print("请先在主菜单中选择：1. 从 Word 解析题库（生成 JSON）。")
@@ -406,7 +549,7 @@ def run_normal_quiz():
         return
 
     num = _ask_question_count(len(selected_pool))
-    questions = random.sample(selected_pool, k=num)
+    questions = balanced_sample(selected_pool, num)
 
     _, _, wrong_list = _do_quiz_session(questions)
 
@@ -0,0 +1,751 @@
+# -*- coding: utf-8 -*-
+"""
+quiz_server.py
+
+局域网多人刷题服务（基于 asyncio 的 HTTP 服务，无第三方依赖）：
+- 启动时只加载一次题库（storage.load_questions_from_file），所有学生共用同一份内存题库；
+- 会话逻辑与窗口版 QuizWindow._begin_quiz / _finish_session 保持一致：
+  按题型随机抽题（普通模式按话题均衡，见 quiz_engine.balanced_sample）并打乱、逐题判分（quiz_engine._check_answer）、
+  结束时汇总本轮结果，并一次性写入错题本和统计；
+- 所有学生的结果集中保存在服务端，老师可以通过 /results 查看；
+- 错题本和统计写到服务端所用档案（--profile，默认当前档案）在当前题库下的文件里
+  （profiles.get_profile(档案名, bank_id)），不同题库的同号题目不会写进同一个错题本；
+- 会话状态由 session_store.SessionStore 管理：紧凑存储 + LRU / TTL 淘汰 + 磁盘检查点；
+- --workers N 时主进程把题库导出到共享内存（shared_bank），
+  N 个工作进程分别监听 port、port+1、…，只读共享同一份题库，不再各自解析 JSON。
+  会话保存在各自进程内，需要由前置代理按端口（或会话）保持粘性；
+- 整张答题卡提交和结束会话都经过 grading_queue.GradingQueue：
+  同时到达的提交合并判分，错题本 / 统计按批次一次写入，队列过深时返回 503；
+- 题库概况和题目正文在两次导入之间不变：响应体预先序列化并 gzip 压缩后缓存
+  （payload_cache.PayloadCache），ETag 由题库指纹派生，支持 If-None-Match 返回 304；
+- /broadcast 升级为 WebSocket 后进入课堂广播模式（broadcast.BroadcastRoom）：
+  老师推送同一道题给所有学生，作答分布实时回传给老师端。老师端能看到答案、控制推题，
+  握手时必须带上老师口令（config.BROADCAST_TEACHER_TOKEN，为空时启动时随机生成并打印），否则返回 403。
+
+接口（请求 / 响应均为 JSON）：
+    GET  /bank                              题库概况（各题型数量、题库版本），支持 ETag
+    GET  /questions/<id>                    按题号获取题目正文（不含答案），支持 ETag
+    POST /sessions                          创建会话 {"learner", "q_type", "count", "mode"}
+    GET  /sessions/<sid>                    会话进度
+    GET  /sessions/<sid>/questions/<idx>    获取第 idx 题（不含答案）
+    POST /sessions/<sid>/answers            提交答案 {"index", "answer"}；多空填空题额外返回 blanks / score（部分分），简答题返回参考分 score / suggested
+    POST /sessions/<sid>/answer-sheet       整张答题卡 {"answers": [{"index", "answer"}, ...], "finish": true}
+    POST /sessions/<sid>/finish             结束会话，返回本轮汇总
+    GET  /results                           已结束会话的汇总列表
+    GET  /broadcast                         广播模式当前状态（题目、作答分布、在线人数）
+    WS   /broadcast?role=student&name=...   广播模式的 WebSocket 连接，消息格式见 broadcast.py
+    WS   /broadcast?role=teacher&token=...  老师端连接，token 为启动时打印的老师口令
+
+用法：
+    python quiz_server.py --host 0.0.0.0 --port 8765
+    python quiz_server.py --host 0.0.0.0 --port 8765 --workers 4
+    python quiz_server.py --teacher-token 自定义口令
+    python quiz_server.py --profile 三班 --bank data/banks/b1a2b3c4d5.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import re
+import secrets
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import config
+import profiles
+from bank_registry import BankRegistry
+from broadcast import BroadcastRoom, handshake_response
+from models import Question
+from payload_cache import PayloadCache, accepts_gzip, bank_fingerprint, etag_matches
+from quiz_engine import _check_answer, _update_stats, balanced_sample, grade_details, load_topics
+from grading_queue import GradingQueue, QueueFullError
+from session_store import CompactSession, SessionStore
+from shared_bank import SharedBank
+from storage import load_questions_from_file, load_wrong_questions, save_wrong_questions
+
+# 单个请求头 / 请求体的大小上限，防止异常客户端占满内存
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+
+# 单个会话最多抽多少题（与窗口版题量上限一致）
+MAX_SESSION_QUESTIONS = 999
+
+# 空闲会话检查 / 淘汰的周期（秒）
+SWEEP_INTERVAL = 30.0
+
+BROADCAST_TEACHER_TOKEN = getattr(config, "BROADCAST_TEACHER_TOKEN", "")
+
+_REASONS = {
+    200: "OK",
+    201: "Created",
+    204: "No Content",
+    304: "Not Modified",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class HttpError(Exception):
+    """处理请求时的业务错误，会被转换成对应状态码的 JSON 响应。"""
+
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+    def to_response(self) -> "Response":
+        resp = Response.json({"error": self.message}, status=self.status)
+        resp.headers.update(self.headers)
+        return resp
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: Dict[str, List[str]]
+    headers: Dict[str, str]
+    body: bytes = b""
+
+    def json(self) -> Dict[str, Any]:
+        if not self.body:
+            return {}
+        try:
+            data = json.loads(self.body.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise HttpError(400, "请求体不是合法的 JSON")
+        if not isinstance(data, dict):
+            raise HttpError(400, "请求体必须是 JSON 对象")
+        return data
+
+
+@dataclass
+class Response:
+    status: int = 200
+    body: bytes = b""
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    @staticmethod
+    def json(data: Any, status: int = 200) -> "Response":
+        body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return Response(status, body, {"Content-Type": "application/json; charset=utf-8"})
+
+    def encode(self, keep_alive: bool) -> bytes:
+        reason = _REASONS.get(self.status, "OK")
+        lines = [f"HTTP/1.1 {self.status} {reason}"]
+        headers = dict(self.headers)
+        headers["Content-Length"] = str(len(self.body))
+        headers["Connection"] = "keep-alive" if keep_alive else "close"
+        for k, v in headers.items():
+            lines.append(f"{k}: {v}")
+        head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+        return head + self.body
+
+
+def _internal_error(exc: Exception, req: Optional[Request] = None) -> Response:
+    where = f"{req.method} {req.path}" if req is not None else "读取请求"
+    print(f"【警告】{where} 处理出错：{exc!r}")
+    return Response.json({"error": "服务器内部错误"}, status=500)
+
+
+def question_public_dict(q: Question) -> Dict[str, Any]:
+    """发给学生端的题目内容：不包含答案和解析。"""
+    return {
+        "id": q.id,
+        "q_type": q.q_type,
+        "question": q.question,
+        "options": q.options,
+    }
+
+
+def _bank_meta(bank: Sequence[Question]) -> Iterable[Tuple[int, str, str]]:
+    """逐题给出 (题号, 题型, 话题)；共享内存题库只解码这三个字段。"""
+    if isinstance(bank, SharedBank):
+        return bank.iter_meta()
+    return ((q.id, q.q_type, q.topic) for q in bank)
+
+
+Handler = Callable[[Request, "re.Match[str]"], Awaitable[Response]]
+
+
+class QuizServer:
+    """共享题库的多人刷题服务。"""
+
+    def __init__(
+        self,
+        questions: Sequence[Question],
+        store: Optional[SessionStore] = None,
+        teacher_token: Optional[str] = None,
+        bank_id: str = profiles.DEFAULT_BANK_ID,
+        profile: Optional[str] = None,
+    ):
+        # 题库只加载一次，会话里只保存下标；共享内存题库直接引用，不做复制
+        self.questions: Sequence[Question] = questions
+        self.bank_id = bank_id
+        # 错题本按题库分文件，统计按档案汇总
+        self.profile = profiles.get_profile(profile or profiles.DEFAULT_PROFILE, bank_id)
+        self._index_by_id: Dict[int, int] = {}
+        self._indexes_by_type: Dict[str, List[int]] = {}
+        # 各题的话题（按下标），抽题时按话题均衡
+        self._topics: List[str] = []
+        for i, (qid, q_type, topic) in enumerate(_bank_meta(questions)):
+            self._index_by_id[qid] = i
+            self._indexes_by_type.setdefault(q_type, []).append(i)
+            self._topics.append(topic)
+
+        self.sessions = store if store is not None else SessionStore()
+        # 不可变响应（题库概况 / 题目正文）的预序列化缓存
+        self.payloads = PayloadCache(bank_fingerprint(questions))
+        self.results: List[Dict[str, Any]] = []
+        self._sweep_task: Optional[asyncio.Task] = None
+        self._checkpoint_task: Optional[asyncio.Task] = None
+
+        # 错题本 / 统计写文件串行化，避免多个会话同时结束时互相覆盖
+        self._write_lock = asyncio.Lock()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.grading = GradingQueue(self.questions, self._persist_sessions)
+        self.broadcast = BroadcastRoom(self.questions, self._index_by_id, self._indexes_by_type)
+        # 广播模式老师端口令：学生拿不到它就不能以老师身份看答案、推题
+        self.teacher_token = teacher_token or BROADCAST_TEACHER_TOKEN or new_teacher_token()
+
+        self._routes: List[Tuple[str, "re.Pattern[str]", Handler]] = [
+            ("GET", re.compile(r"^/bank$"), self._h_bank),
+            ("GET", re.compile(r"^/questions/(?P<qid>-?\d+)$"), self._h_question_body),
+            ("POST", re.compile(r"^/sessions$"), self._h_create_session),
+            ("GET", re.compile(r"^/sessions/(?P<sid>\w+)$"), self._h_session_info),
+            ("GET", re.compile(r"^/sessions/(?P<sid>\w+)/questions/(?P<idx>\d+)$"), self._h_question),
+            ("POST", re.compile(r"^/sessions/(?P<sid>\w+)/answers$"), self._h_submit),
+            ("POST", re.compile(r"^/sessions/(?P<sid>\w+)/answer-sheet$"), self._h_answer_sheet),
+            ("POST", re.compile(r"^/sessions/(?P<sid>\w+)/finish$"), self._h_finish),
+            ("GET", re.compile(r"^/results$"), self._h_results),
+            ("GET", re.compile(r"^/broadcast$"), self._h_broadcast_state),
+        ]
+
+    # ---------- 启动 / 关闭 ----------
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.AbstractServer:
+        self._server = await asyncio.start_server(
+            self._handle_connection, host, port, limit=MAX_HEADER_BYTES
+        )
+        self._sweep_task = asyncio.create_task(self._sweep_loop())
+        self.grading.start()
+        return self._server
+
+    @property
+    def port(self) -> int:
+        if self._server is None or not self._server.sockets:
+            return 0
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        await self.grading.stop()
+        self.broadcast.close()
+        if self._sweep_task is not None:
+            self._sweep_task.cancel()
+            self._sweep_task = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    # ---------- HTTP 连接处理 ----------
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            raise HttpError(413, "请求头过大")
+
+        lines = head.decode("latin-1").split("\r\n")
+        parts = lines[0].split(" ")
+        if len(parts) != 3:
+            raise HttpError(400, "请求行格式错误")
+        method, target, _version = parts
+
+        headers: Dict[str, str] = {}
+        for line in lines[1:]:
+            if not line:
+                continue
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", "0") or 0)
+        except ValueError:
+            raise HttpError(400, "Content-Length 格式错误")
+        if length < 0:
+            raise HttpError(400, "Content-Length 格式错误")
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, "请求体过大")
+        body = await reader.readexactly(length) if length > 0 else b""
+
+        url = urlsplit(target)
+        return Request(method.upper(), url.path, parse_qs(url.query), headers, body)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                keep_alive = True
+                try:
+                    req = await self._read_request(reader)
+                    if req is None:
+                        break
+                    keep_alive = req.headers.get("connection", "").lower() != "close"
+                    if req.headers.get("upgrade", "").lower() == "websocket":
+                        # 升级后这条连接归广播模式所有，直到断开
+                        await self._upgrade_broadcast(req, reader, writer)
+                        break
+                    resp = await self._dispatch(req)
+                except HttpError as e:
+                    keep_alive = False
+                    resp = e.to_response()
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception as e:
+                    # 读请求或广播连接里的意外错误：能回复时回 500，然后断开这条连接
+                    if writer.transport.is_closing():
+                        break
+                    keep_alive = False
+                    resp = _internal_error(e)
+                writer.write(resp.encode(keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, req: Request) -> Response:
+        path_matched = False
+        for method, pattern, handler in self._routes:
+            m = pattern.match(req.path)
+            if not m:
+                continue
+            path_matched = True
+            if method == req.method:
+                try:
+                    return await handler(req, m)
+                except HttpError as e:
+                    return e.to_response()
+                except Exception as e:
+                    # 处理函数的意外错误不能带垮连接：返回 500，服务继续可用
+                    return _internal_error(e, req)
+        if path_matched:
+            return Response.json({"error": "不支持的请求方法"}, status=405)
+        return Response.json({"error": "接口不存在"}, status=404)
+
+    async def _upgrade_broadcast(self, req: Request, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if req.path != "/broadcast":
+            raise HttpError(404, "接口不存在")
+        if req.method != "GET":
+            raise HttpError(405, "不支持的请求方法")
+        key = req.headers.get("sec-websocket-key", "")
+        if not key or req.headers.get("sec-websocket-version", "") != "13":
+            raise HttpError(400, "WebSocket 握手参数错误")
+        role = (req.query.get("role") or ["student"])[0]
+        if role not in ("teacher", "student"):
+            raise HttpError(400, "role 只能是 teacher 或 student")
+        if role == "teacher":
+            token = (req.query.get("token") or [""])[0]
+            if not secrets.compare_digest(token.encode("utf-8"), self.teacher_token.encode("utf-8")):
+                raise HttpError(403, "老师口令错误")
+        name = (req.query.get("name") or ["匿名"])[0][:64]
+
+        writer.write(handshake_response(key))
+        await writer.drain()
+        await self.broadcast.serve(reader, writer, role, name)
+
+    # ---------- 会话存储：淘汰与检查点 ----------
+
+    async def _flush_evictions(self):
+        evicted = self.sessions.collect_evictions()
+        if not evicted:
+            return
+        await asyncio.to_thread(self.sessions.write_checkpoints, evicted)
+        self.sessions.release_pending(evicted)
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL)
+            try:
+                await self._flush_evictions()
+                await asyncio.to_thread(self.sessions.purge_checkpoints)
+            except Exception as e:
+                print(f"【警告】会话检查点写入失败：{e}")
+
+    def _schedule_checkpoint(self):
+        """超出内存预算时立即把被淘汰的会话写盘，而不是等下一轮定时清理。"""
+        if not self.sessions.has_pending_evictions():
+            return
+        if self._checkpoint_task is not None and not self._checkpoint_task.done():
+            return
+        self._checkpoint_task = asyncio.create_task(self._flush_evictions())
+
+    # ---------- 会话逻辑 ----------
+
+    def _get_session(self, sid: str) -> CompactSession:
+        session = self.sessions.get(sid)
+        if session is None:
+            raise HttpError(404, "会话不存在或已过期")
+        self._schedule_checkpoint()
+        return session
+
+    def _pick_questions(self, mode: str, q_type: str, count: int) -> List[int]:
+        """对应 on_start_normal / on_start_wrong 的抽题逻辑，返回题库下标。"""
+        if mode == "wrong":
+            pool = [
+                self._index_by_id[q.id]
+                for q in load_wrong_questions(self.profile.wrong_path)
+                if q.id in self._index_by_id
+            ]
+        elif q_type == "all":
+            pool = list(range(len(self.questions)))
+        else:
+            pool = list(self._indexes_by_type.get(q_type, []))
+
+        n = max(1, min(count, len(pool), MAX_SESSION_QUESTIONS))
+        if not pool:
+            return []
+        if mode == "wrong":
+            picked = random.sample(pool, k=n)
+        else:
+            picked = balanced_sample(pool, n, topic_of=self._topics.__getitem__)
+        # 与 _begin_quiz 一致：抽完再整体打乱一次
+        random.shuffle(picked)
+        return picked
+
+    def _session_summary(self, session: CompactSession) -> Dict[str, Any]:
+        answered = sum(session.per_type_total.values())
+        correct = sum(session.per_type_correct.values())
+        total = session.total
+        return {
+            "session_id": session.session_id,
+            "learner": session.learner,
+            "mode": session.mode,
+            "total": total,
+            "answered": answered,
+            "correct": correct,
+            "wrong": answered - correct,
+            "unanswered": max(total - answered, 0),
+            "per_type_total": dict(session.per_type_total),
+            "per_type_correct": dict(session.per_type_correct),
+            "finished": session.finished,
+        }
+
+    def _write_session_results(self, sessions: List[CompactSession]):
+        """
+        对应 _finish_session：把一批会话的错题合并进本题库的错题本（每错一次，错题次数 +1），
+        再把各题型统计累加进档案的 stats.json。整批只读写一次文件，运行在线程池里。
+        """
+        wrong_times: Dict[int, int] = {}
+        per_type_total: Dict[str, int] = {}
+        per_type_correct: Dict[str, int] = {}
+        for session in sessions:
+            for bank_idx in session.wrong:
+                wrong_times[bank_idx] = wrong_times.get(bank_idx, 0) + 1
+            for t, n in session.per_type_total.items():
+                per_type_total[t] = per_type_total.get(t, 0) + n
+            for t, n in session.per_type_correct.items():
+                per_type_correct[t] = per_type_correct.get(t, 0) + n
+
+        if wrong_times:
+            by_id = {q.id: q for q in load_wrong_questions(self.profile.wrong_path)}
+            for bank_idx, times in wrong_times.items():
+                # 复制一份再改错题次数，不能改动共享题库里的对象
+                q = Question.from_dict(self.questions[bank_idx].to_dict())
+                prev = by_id.get(q.id)
+                q.wrong_count = (getattr(prev, "wrong_count", 0) if prev else 0) + times
+                by_id[q.id] = q
+            save_wrong_questions(list(by_id.values()), self.profile.wrong_path)
+        _update_stats(per_type_total, per_type_correct, self.profile.stats_path)
+
+    async def _persist_sessions(self, sessions: List[CompactSession]):
+        """判分队列的回调：一批结束的会话做一次分组写入，并登记结果。"""
+        async with self._write_lock:
+            await asyncio.to_thread(self._write_session_results, sessions)
+        now = time.time()
+        for session in sessions:
+            summary = self._session_summary(session)
+            summary["finished_at"] = now
+            self.results.append(summary)
+            self.sessions.touch(session)
+            # 结果已入库，淘汰前留下的检查点不能再把它恢复成未结束
+            self.sessions.drop_checkpoint(session.session_id)
+
+    async def _enqueue(self, session: CompactSession, answers: List[Tuple[int, str]], finish: bool):
+        try:
+            future = self.grading.submit(session, answers, finish)
+        except QueueFullError:
+            raise HttpError(503, "服务器繁忙，请稍后重试", {"Retry-After": "1"})
+        return await future
+
+    def _cached_response(self, req: Request, key: str, build: Callable[[], Any]) -> Response:
+        """不可变响应：先比对 ETag（命中时连正文都不用取），再按需返回 gzip 版本。"""
+        headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        etag = self.payloads.etag(key)
+        if etag_matches(req.headers.get("if-none-match", ""), etag):
+            headers["ETag"] = etag
+            return Response(304, b"", headers)
+
+        payload = self.payloads.get(key, build)
+        headers["ETag"] = payload.etag
+        headers["Content-Type"] = "application/json; charset=utf-8"
+        if payload.gzip_body is not None and accepts_gzip(req.headers.get("accept-encoding", "")):
+            headers["Content-Encoding"] = "gzip"
+            return Response(200, payload.gzip_body, headers)
+        return Response(200, payload.body, headers)
+
+    # ---------- 接口实现 ----------
+
+    async def _h_bank(self, req: Request, m) -> Response:
+        def build():
+            per_type = {t: len(v) for t, v in self._indexes_by_type.items()}
+            return {"total": len(self.questions), "per_type": per_type, "version": self.payloads.version}
+
+        return self._cached_response(req, "bank", build)
+
+    async def _h_question_body(self, req: Request, m) -> Response:
+        idx = self._index_by_id.get(int(m.group("qid")))
+        if idx is None:
+            raise HttpError(404, "题目不存在")
+        return self._cached_response(req, f"q{m.group('qid')}", lambda: question_public_dict(self.questions[idx]))
+
+    async def _h_create_session(self, req: Request, m) -> Response:
+        data = req.json()
+        learner = str(data.get("learner") or "匿名")[:64]
+        mode = data.get("mode") or "normal"
+        q_type = data.get("q_type") or "all"
+        if not isinstance(mode, str) or mode not in ("normal", "wrong"):
+            raise HttpError(400, "mode 只能是 normal 或 wrong")
+        if not isinstance(q_type, str):
+            raise HttpError(400, "q_type 必须是字符串")
+        try:
+            count = int(data.get("count", 10))
+        except (TypeError, ValueError):
+            raise HttpError(400, "count 必须是整数")
+
+        indexes = self._pick_questions(mode, q_type, count)
+        if not indexes:
+            raise HttpError(409, "题库中没有符合条件的题目")
+
+        sid = secrets.token_hex(8)
+        self.sessions.put(CompactSession(sid, learner, mode, indexes))
+        self._schedule_checkpoint()
+        return Response.json({"session_id": sid, "total": len(indexes)}, status=201)
+
+    async def _h_session_info(self, req: Request, m) -> Response:
+        session = self._get_session(m.group("sid"))
+        data = self._session_summary(session)
+        data["index_status"] = session.status_list()
+        return Response.json(data)
+
+    async def _h_question(self, req: Request, m) -> Response:
+        session = self._get_session(m.group("sid"))
+        idx = int(m.group("idx"))
+        if idx < 0 or idx >= session.total:
+            raise HttpError(404, "题目下标超出范围")
+        q = self.questions[session.indexes[idx]]
+        return Response.json(
+            {
+                "index": idx,
+                "total": session.total,
+                "status": session.status_of(idx),
+                "saved_answer": session.answer_of(idx),
+                "question": question_public_dict(q),
+                # 客户端可以用它向 /questions/<id> 做条件请求，复用本地缓存的题目正文
+                "question_etag": self.payloads.etag(f"q{q.id}"),
+            }
+        )
+
+    async def _h_submit(self, req: Request, m) -> Response:
+        session = self._get_session(m.group("sid"))
+        if session.finished:
+            raise HttpError(409, "会话已结束")
+        data = req.json()
+        try:
+            idx = int(data.get("index"))
+        except (TypeError, ValueError):
+            raise HttpError(400, "index 必须是整数")
+        if idx < 0 or idx >= session.total:
+            raise HttpError(404, "题目下标超出范围")
+        if session.status_of(idx) != "unanswered":
+            raise HttpError(409, "本题已判分")
+
+        user_raw = str(data.get("answer") or "").strip()
+        q = self.questions[session.indexes[idx]]
+        is_correct, _, _ = _check_answer(q, user_raw)
+
+        t = q.q_type
+        session.per_type_total[t] = session.per_type_total.get(t, 0) + 1
+        if is_correct:
+            session.per_type_correct[t] = session.per_type_correct.get(t, 0) + 1
+        else:
+            session.wrong.append(session.indexes[idx])
+        session.set_status(idx, "correct" if is_correct else "wrong")
+        if user_raw:
+            session.answers[idx] = user_raw
+        self.sessions.touch(session)
+
+        payload = {
+            "index": idx,
+            "correct": is_correct,
+            "answer": q.answer.strip() if q.answer else "",
+        }
+        # 多空填空题的部分分、简答题参考分
+        payload.update(grade_details(q, user_raw))
+        return Response.json(payload)
+
+    async def _h_answer_sheet(self, req: Request, m) -> Response:
+        session = self._get_session(m.group("sid"))
+        if session.finished:
+            raise HttpError(409, "会话已结束")
+        data = req.json()
+        raw_answers = data.get("answers")
+        if not isinstance(raw_answers, list):
+            raise HttpError(400, "answers 必须是列表")
+        answers: List[Tuple[int, str]] = []
+        for item in raw_answers:
+            if not isinstance(item, dict):
+                raise HttpError(400, "answers 的每一项必须是对象")
+            try:
+                idx = int(item.get("index"))
+            except (TypeError, ValueError):
+                raise HttpError(400, "index 必须是整数")
+            answers.append((idx, str(item.get("answer") or "").strip()))
+
+        results = await self._enqueue(session, answers, bool(data.get("finish", True)))
+        summary = self._session_summary(session)
+        summary["results"] = results
+        return Response.json(summary)
+
+    async def _h_finish(self, req: Request, m) -> Response:
+        session = self._get_session(m.group("sid"))
+        if not session.finished:
+            # 结束请求也走判分队列，同一时刻交卷的会话合并写入错题本 / 统计
+            await self._enqueue(session, [], True)
+        return Response.json(self._session_summary(session))
+
+    async def _h_results(self, req: Request, m) -> Response:
+        return Response.json({"results": self.results})
+
+    async def _h_broadcast_state(self, req: Request, m) -> Response:
+        return Response.json(self.broadcast.state(with_answer=False))
+
+
+def new_teacher_token() -> str:
+    return secrets.token_urlsafe(6)
+
+
+def _load_bank(json_path: Optional[str]) -> List[Question]:
+    """读题库 JSON 并补上话题（按快照缓存话题模型，需要 NumPy，没装时跳过）。"""
+    return load_topics(load_questions_from_file(json_path), json_path)
+
+
+async def serve(
+    host: str,
+    port: int,
+    json_path: Optional[str] = None,
+    bank: Optional[Sequence[Question]] = None,
+    teacher_token: Optional[str] = None,
+    bank_id: str = profiles.DEFAULT_BANK_ID,
+    profile: Optional[str] = None,
+):
+    questions = bank if bank is not None else _load_bank(json_path)
+    server = QuizServer(questions, teacher_token=teacher_token, bank_id=bank_id, profile=profile)
+    srv = await server.start(host, port)
+    print(f"刷题服务已启动：http://{host}:{server.port}  （题库 {len(questions)} 题）")
+    if teacher_token is None:
+        print(f"广播模式老师口令：{server.teacher_token}")
+    async with srv:
+        await srv.serve_forever()
+
+
+def _worker_main(shm_name: str, host: str, port: int, teacher_token: str, bank_id: str, profile: Optional[str]):
+    """工作进程入口：连接共享题库后启动一个独立的服务实例。"""
+    bank = SharedBank.attach(shm_name)
+    try:
+        asyncio.run(serve(host, port, bank=bank, teacher_token=teacher_token, bank_id=bank_id, profile=profile))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        bank.close()
+
+
+def serve_workers(
+    host: str,
+    port: int,
+    workers: int,
+    json_path: Optional[str] = None,
+    teacher_token: Optional[str] = None,
+    bank_id: str = profiles.DEFAULT_BANK_ID,
+    profile: Optional[str] = None,
+):
+    """主进程只解析一次题库，导出到共享内存后拉起多个工作进程（老师口令各进程相同）。"""
+    questions = _load_bank(json_path)
+    bank = SharedBank.create(questions)
+    print(f"题库已导出到共享内存 {bank.name}（{bank.nbytes} 字节，{len(bank)} 题）")
+    token = teacher_token or BROADCAST_TEACHER_TOKEN or new_teacher_token()
+    print(f"广播模式老师口令：{token}")
+    ctx = multiprocessing.get_context("spawn")
+    procs = [
+        ctx.Process(target=_worker_main, args=(bank.name, host, port + i, token, bank_id, profile), daemon=True)
+        for i in range(workers)
+    ]
+    try:
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+    finally:
+        bank.close()
+        bank.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="局域网多人刷题服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--bank", default=None, help="题库 JSON 路径，默认使用 banks.json 中的当前题库")
+    parser.add_argument("--workers", type=int, default=1, help="工作进程数；大于 1 时共享内存题库")
+    parser.add_argument("--teacher-token", default=None, help="广播模式老师口令，默认取配置或随机生成")
+    parser.add_argument("--profile", default=None, help="错题本 / 统计写入哪个学习者档案，默认当前档案")
+    args = parser.parse_args()
+    registry = BankRegistry()
+    active_bank = registry.active
+    json_path = args.bank or (active_bank.snapshot if active_bank else config.DEFAULT_JSON_PATH)
+    bank_id = registry.bank_id_for_snapshot(json_path)
+    profile = args.profile or profiles.active_profile_name()
+    print(f"题库 {bank_id}，错题本 / 统计写入档案“{profile}”")
+    try:
+        if args.workers > 1:
+            serve_workers(args.host, args.port, args.workers, json_path, args.teacher_token, bank_id, profile)
+        else:
+            asyncio.run(
+                serve(args.host, args.port, json_path, teacher_token=args.teacher_token, bank_id=bank_id, profile=profile)
+            )
+    except KeyboardInterrupt:
+        print("刷题服务已停止。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+"""
+session_store.py
+
+刷题服务端的会话存储：
+- 每个会话用紧凑结构保存：抽到的题目用 array('I') 存题库下标，
+  作答状态用 bytearray（每题 1 字节），作答内容只记录答过的题（稀疏字典）；
+- 常驻内存的会话数量 / 估算字节数有上限，超出时按 LRU 淘汰；
+- 长时间没有访问的会话（TTL）也会被淘汰；
+- 被淘汰的未结束会话会先写入磁盘检查点（JSON），学生再次访问时自动恢复，
+  因此几千名同时在线的学生也只占用固定大小的内存；
+- 会话回到常驻区（从检查点恢复）或已经结束时删除它的检查点：常驻的那份才是最新的，
+  留着旧检查点会让已结束的会话以“未结束”的状态复活，再交一次卷就会重复写入错题本和统计。
+
+淘汰流程分两步，方便服务端把写磁盘放到线程池：
+    evicted = store.collect_evictions()   # 事件循环里：从常驻区移到“待写入”区
+    store.write_checkpoints(evicted)      # 线程池里：写 JSON 文件
+    store.release_pending(evicted)        # 事件循环里：从“待写入”区移除
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import config
+
+SESSION_CHECKPOINT_DIR = getattr(
+    config, "SESSION_CHECKPOINT_DIR", os.path.join(config.BASE_DIR, "data", "sessions")
+)
+
+# 作答状态编码：bytearray 里每题 1 字节
+STATUS_UNANSWERED = 0
+STATUS_CORRECT = 1
+STATUS_WRONG = 2
+
+_STATUS_NAMES = ("unanswered", "correct", "wrong")
+_STATUS_CODES = {name: code for code, name in enumerate(_STATUS_NAMES)}
+
+
+class CompactSession:
+    """
+    单个学生的刷题会话（对应 QuizWindow 的 current_questions / index_status /
+    user_answers / per_type_total / per_type_correct / wrong_in_session）。
+    """
+
+    __slots__ = (
+        "session_id",
+        "learner",
+        "mode",
+        "indexes",
+        "status",
+        "answers",
+        "per_type_total",
+        "per_type_correct",
+        "wrong",
+        "created_at",
+        "last_access",
+        "finished",
+    )
+
+    def __init__(self, session_id: str, learner: str, mode: str, indexes: List[int]):
+        self.session_id = session_id
+        self.learner = learner
+        self.mode = mode
+        self.indexes = array("I", indexes)
+        self.status = bytearray(len(indexes))
+        self.answers: Dict[int, str] = {}
+        self.per_type_total: Dict[str, int] = {}
+        self.per_type_correct: Dict[str, int] = {}
+        self.wrong = array("I")
+        self.created_at = time.time()
+        self.last_access = self.created_at
+        self.finished = False
+
+    @property
+    def total(self) -> int:
+        return len(self.indexes)
+
+    def status_of(self, idx: int) -> str:
+        return _STATUS_NAMES[self.status[idx]]
+
+    def status_list(self) -> List[str]:
+        return [_STATUS_NAMES[c] for c in self.status]
+
+    def set_status(self, idx: int, status: str):
+        self.status[idx] = _STATUS_CODES[status]
+
+    def answer_of(self, idx: int) -> str:
+        return self.answers.get(idx, "")
+
+    def approx_bytes(self) -> int:
+        """粗略估算常驻内存占用，用于内存预算控制。"""
+        answers = sum(len(a) * 2 + 64 for a in self.answers.values())
+        return 256 + len(self.indexes) * 5 + len(self.wrong) * 4 + answers
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "learner": self.learner,
+            "mode": self.mode,
+            "indexes": self.indexes.tolist(),
+            "status": bytes(self.status).hex(),
+            "answers": {str(k): v for k, v in self.answers.items()},
+            "per_type_total": self.per_type_total,
+            "per_type_correct": self.per_type_correct,
+            "wrong": self.wrong.tolist(),
+            "created_at": self.created_at,
+            "last_access": self.last_access,
+            "finished": self.finished,
+        }
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> "CompactSession":
+        s = CompactSession(
+            data["session_id"], data.get("learner", ""), data.get("mode", "normal"),
+            data.get("indexes", []),
+        )
+        status = bytes.fromhex(data.get("status", ""))
+        if len(status) == len(s.indexes):
+            s.status = bytearray(status)
+        s.answers = {int(k): v for k, v in (data.get("answers") or {}).items()}
+        s.per_type_total = dict(data.get("per_type_total") or {})
+        s.per_type_correct = dict(data.get("per_type_correct") or {})
+        s.wrong = array("I", data.get("wrong") or [])
+        s.created_at = float(data.get("created_at", s.created_at))
+        s.last_access = float(data.get("last_access", s.last_access))
+        s.finished = bool(data.get("finished", False))
+        return s
+
+
+class SessionStore:
+    """带 LRU / TTL 淘汰和磁盘检查点的会话存储。"""
+
+    def __init__(
+        self,
+        checkpoint_dir: Optional[str] = None,
+        max_resident: int = 2000,
+        max_resident_bytes: int = 64 * 1024 * 1024,
+        idle_ttl: float = 15 * 60,
+        checkpoint_ttl: float = 24 * 3600,
+    ):
+        self.checkpoint_dir = checkpoint_dir or SESSION_CHECKPOINT_DIR
+        self.max_resident = max_resident
+        self.max_resident_bytes = max_resident_bytes
+        self.idle_ttl = idle_ttl
+        self.checkpoint_ttl = checkpoint_ttl
+
+        # 常驻区：按最近访问排序，最久未访问的在最前面
+        self._resident: "OrderedDict[str, CompactSession]" = OrderedDict()
+        # 记录每个会话放入常驻区时的估算大小，会话内容变化后也能准确扣减
+        self._sizes: Dict[str, int] = {}
+        self._resident_bytes = 0
+        # 待写入区：已被淘汰、检查点还没写完的会话，仍然可以被访问
+        self._pending: Dict[str, CompactSession] = {}
+        # 淘汰但还没交给 collect_evictions 的会话
+        self._evict_queue: List[CompactSession] = []
+
+        self.hits = 0
+        self.restores = 0
+        self.evictions = 0
+
+    # ---------- 基本操作 ----------
+
+    def __len__(self) -> int:
+        return len(self._resident)
+
+    @property
+    def resident_bytes(self) -> int:
+        return self._resident_bytes
+
+    def _checkpoint_path(self, sid: str) -> str:
+        return os.path.join(self.checkpoint_dir, f"{sid}.json")
+
+    def put(self, session: CompactSession):
+        sid = session.session_id
+        if self._resident.pop(sid, None) is not None:
+            self._resident_bytes -= self._sizes.pop(sid, 0)
+        size = session.approx_bytes()
+        self._resident[sid] = session
+        self._sizes[sid] = size
+        self._resident_bytes += size
+        self._enforce_budget()
+
+    def get(self, sid: str) -> Optional[CompactSession]:
+        now = time.time()
+        session = self._resident.get(sid)
+        if session is not None:
+            self._resident.move_to_end(sid)
+            session.last_access = now
+            self.hits += 1
+            return session
+
+        # 正在写检查点的会话：直接放回常驻区
+        session = self._pending.pop(sid, None)
+        if session is None:
+            session = self._load_checkpoint(sid)
+            if session is None:
+                return None
+            self.restores += 1
+            self.drop_checkpoint(sid)
+        session.last_access = now
+        self.put(session)
+        return session
+
+    def touch(self, session: CompactSession):
+        """会话内容变化后调用，更新 LRU 顺序和内存估算。"""
+        sid = session.session_id
+        if sid in self._resident:
+            self.put(session)
+
+    def discard(self, sid: str):
+        if self._resident.pop(sid, None) is not None:
+            self._resident_bytes -= self._sizes.pop(sid, 0)
+        self._pending.pop(sid, None)
+        self.drop_checkpoint(sid)
+
+    def drop_checkpoint(self, sid: str):
+        """删除会话的检查点（没有时忽略）；会话结束入库后也要调用。"""
+        try:
+            os.remove(self._checkpoint_path(sid))
+        except OSError:
+            pass
+
+    # ---------- 淘汰 ----------
+
+    def _evict(self, sid: str):
+        session = self._resident.pop(sid)
+        self._resident_bytes -= self._sizes.pop(sid, 0)
+        self.evictions += 1
+        # 已结束的会话结果已经入库，淘汰时直接丢弃，连同以前留下的检查点
+        if session.finished:
+            self.drop_checkpoint(sid)
+        else:
+            self._pending[sid] = session
+            self._evict_queue.append(session)
+
+    def _enforce_budget(self):
+        while self._resident and (
+            len(self._resident) > self.max_resident
+            or self._resident_bytes > self.max_resident_bytes
+        ):
+            sid = next(iter(self._resident))
+            self._evict(sid)
+
+    def collect_evictions(self, now: Optional[float] = None) -> List[CompactSession]:
+        """淘汰所有空闲超时的会话，返回需要写检查点的会话列表。"""
+        now = time.time() if now is None else now
+        deadline = now - self.idle_ttl
+        while self._resident:
+            sid, session = next(iter(self._resident.items()))
+            if session.last_access > deadline:
+                break
+            self._evict(sid)
+        evicted, self._evict_queue = self._evict_queue, []
+        return evicted
+
+    def has_pending_evictions(self) -> bool:
+        return bool(self._evict_queue)
+
+    def write_checkpoints(self, sessions: List[CompactSession]):
+        """把会话写成 JSON 检查点（可在线程池中执行）。"""
+        if not sessions:
+            return
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        for session in sessions:
+            path = self._checkpoint_path(session.session_id)
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(session.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, path)
+
+    def release_pending(self, sessions: List[CompactSession]):
+        for session in sessions:
+            sid = session.session_id
+            if self._pending.get(sid) is session:
+                del self._pending[sid]
+            else:
+                # 写检查点期间会话又被访问、回到了常驻区：刚写的检查点已经过时
+                self.drop_checkpoint(sid)
+
+    def _load_checkpoint(self, sid: str) -> Optional[CompactSession]:
+        path = self._checkpoint_path(sid)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return CompactSession.from_dict(json.load(f))
+        except Exception:
+            # 检查点坏了就当会话已过期
+            return None
+
+    def purge_checkpoints(self, now: Optional[float] = None) -> int:
+        """删除超过 checkpoint_ttl 的检查点文件，返回删除数量。"""
+        if not os.path.isdir(self.checkpoint_dir):
+            return 0
+        now = time.time() if now is None else now
+        removed = 0
+        for name in os.listdir(self.checkpoint_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.checkpoint_dir, name)
+            try:
+                if now - os.path.getmtime(path) > self.checkpoint_ttl:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+shared_bank.py
+
+把题库导出到 multiprocessing.shared_memory，供多个服务进程只读共享：
+- 主进程只解析一次 JSON，把所有字符串写进一块“字符串区”（UTF-8），
+  每道题对应一条定长记录，记录里存各字段在字符串区中的偏移和长度；
+- 工作进程按名字 attach 同一块共享内存，不再调用 load_questions_from_file，
+  也不复制整份题库，内存占用不随进程数增长；
+- 访问某道题时才从共享内存解码成 Question，并在进程内保留一个小的 LRU 缓存；
+- 导入时算好的填空题拆空结果（blanks）和简答题参考向量（short_ref）也一起导出，
+  工作进程不用现算，判分、参考分与单进程完全一致（现算的 short_ref 拿不到全库 IDF）。
+
+内存布局：
+    [头部] magic(8) | 题目数 u32 | 字符串区起始偏移 u64
+    [记录区] 每题一条：id i64 | 9 个字符串字段的 (偏移 u32, 长度 u32) | wrong_count i32
+    [字符串区] 所有字段的 UTF-8 字节，选项字典、blanks、short_ref 以 JSON 文本保存（空值存空串）
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import struct
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from models import Question
+
+_MAGIC = b"QSBANK03"
+_HEADER = struct.Struct("<8sIQ")
+# id, (q_type, question, options, answer, source, explanation, topic, blanks, short_ref) 的 offset/length, wrong_count
+_RECORD = struct.Struct("<q18Ii")
+
+(
+    _F_QTYPE, _F_QUESTION, _F_OPTIONS, _F_ANSWER, _F_SOURCE, _F_EXPLANATION, _F_TOPIC,
+    _F_BLANKS, _F_SHORT_REF,
+) = range(9)
+_WRONG_COUNT = 1 + 9 * 2
+
+
+def _json_text(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")) if value else ""
+
+
+def _attach_shm(name: str) -> shared_memory.SharedMemory:
+    """
+    以“非所有者”身份打开共享内存。
+
+    Python 3.13+ 可以直接关闭 resource_tracker 登记；更早的版本里，
+    由本进程 multiprocessing 拉起的工作进程与主进程共用同一个 tracker，
+    重复登记不会产生副作用，共享内存仍由主进程负责 unlink。
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, create=False, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name, create=False)
+
+
+class SharedBank(Sequence):
+    """共享内存中的只读题库，按下标访问得到 Question。"""
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool = False, cache_size: int = 1024):
+        self._shm = shm
+        self._owner = owner
+        self._buf = shm.buf.toreadonly()
+        magic, count, arena_start = _HEADER.unpack_from(self._buf, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"共享内存 {shm.name} 不是题库数据")
+        self._count = count
+        self._arena_start = arena_start
+        self._cache: "OrderedDict[int, Question]" = OrderedDict()
+        self._cache_size = cache_size
+        self._fingerprint: Optional[str] = None
+
+    # ---------- 创建 / 连接 ----------
+
+    @classmethod
+    def create(cls, questions: List[Question], name: Optional[str] = None) -> "SharedBank":
+        """把题库写入一块新的共享内存，返回所有者实例（负责最终 unlink）。"""
+        arena = bytearray()
+        records = []
+        for q in questions:
+            fields = (
+                q.q_type or "",
+                q.question or "",
+                json.dumps(q.options or {}, ensure_ascii=False, separators=(",", ":")),
+                q.answer or "",
+                q.source or "",
+                q.explanation or "",
+                q.topic or "",
+                _json_text(q.blanks),
+                _json_text(q.short_ref),
+            )
+            spans = []
+            for text in fields:
+                data = text.encode("utf-8")
+                spans.extend((len(arena), len(data)))
+                arena += data
+            records.append((int(q.id), *spans, int(getattr(q, "wrong_count", 0) or 0)))
+
+        arena_start = _HEADER.size + _RECORD.size * len(records)
+        total = max(arena_start + len(arena), 1)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=total)
+        _HEADER.pack_into(shm.buf, 0, _MAGIC, len(records), arena_start)
+        for i, rec in enumerate(records):
+            _RECORD.pack_into(shm.buf, _HEADER.size + i * _RECORD.size, *rec)
+        shm.buf[arena_start:arena_start + len(arena)] = arena
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, cache_size: int = 1024) -> "SharedBank":
+        """工作进程按名字连接已有的共享题库（只读、零复制）。"""
+        return cls(_attach_shm(name), owner=False, cache_size=cache_size)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def nbytes(self) -> int:
+        return self._shm.size
+
+    def close(self):
+        self._cache.clear()
+        self._buf.release()
+        self._shm.close()
+
+    def fingerprint(self) -> str:
+        """整块共享内存的 SHA-256，用作题库版本（ETag）。"""
+        if self._fingerprint is None:
+            self._fingerprint = hashlib.sha256(self._buf).hexdigest()
+        return self._fingerprint
+
+    def unlink(self):
+        """只有创建者需要调用：删除共享内存。"""
+        if self._owner:
+            self._shm.unlink()
+
+    # ---------- 读取 ----------
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _record(self, i: int) -> tuple:
+        if i < 0:
+            i += self._count
+        if i < 0 or i >= self._count:
+            raise IndexError(i)
+        return _RECORD.unpack_from(self._buf, _HEADER.size + i * _RECORD.size)
+
+    def _text(self, rec: tuple, field: int) -> str:
+        off = self._arena_start + rec[1 + field * 2]
+        length = rec[2 + field * 2]
+        return str(self._buf[off:off + length], "utf-8")
+
+    def id_of(self, i: int) -> int:
+        return self._record(i)[0]
+
+    def qtype_of(self, i: int) -> str:
+        return self._text(self._record(i), _F_QTYPE)
+
+    def iter_meta(self) -> Iterator[Tuple[int, str, str]]:
+        """只解码 (题号, 题型, 话题)，用于建立索引，不构造完整的 Question。"""
+        for i in range(self._count):
+            rec = self._record(i)
+            yield rec[0], self._text(rec, _F_QTYPE), self._text(rec, _F_TOPIC)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        if i < 0:
+            i += self._count
+        cached = self._cache.get(i)
+        if cached is not None:
+            self._cache.move_to_end(i)
+            return cached
+
+        rec = self._record(i)
+        q = Question(
+            id=rec[0],
+            q_type=self._text(rec, _F_QTYPE),
+            question=self._text(rec, _F_QUESTION),
+            options=json.loads(self._text(rec, _F_OPTIONS) or "{}"),
+            answer=self._text(rec, _F_ANSWER),
+            source=self._text(rec, _F_SOURCE),
+            explanation=self._text(rec, _F_EXPLANATION),
+            wrong_count=rec[_WRONG_COUNT],
+            topic=self._text(rec, _F_TOPIC),
+            blanks=json.loads(self._text(rec, _F_BLANKS) or "[]"),
+            short_ref=json.loads(self._text(rec, _F_SHORT_REF) or "{}"),
+        )
+        self._cache[i] = q
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return q
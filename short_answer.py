@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+short_answer.py
+
+简答题的自动评分（可选，只作为参考分，不替代自评）：
+- 文本先做与填空题宽松模式相同的归一化（NFKC、大小写折叠、去掉空白和句读标点），
+  再切成字符 1-gram + 2-gram，中文不需要分词；
+- 以整个题库所有简答题的参考答案为语料计算 IDF，参考答案的 TF-IDF 向量（已单位化）
+  和关键词在导入时算好，存进 Question.short_ref，随题库快照保存；
+- 评分 = 0.6 × 余弦相似度 + 0.4 × 关键词覆盖率；关键词取参考答案里 TF-IDF 最高的几个 2-gram；
+- 评一份作答只需要对作答文本切 n-gram、查两张小字典，几十微秒；
+  score_batch 可以一次给全班同一道题的作答打分；
+- 老版本快照没有 short_ref 时现算一次，此时拿不到全库语料，IDF 一律按 1 计；
+  共享内存题库（多进程服务）连同 short_ref 一起导出，工作进程的评分与单进程一致。
+
+short_ref 的结构（为了快照小一些，权重保留 4 位小数）：
+    {"w": {gram: 权重}, "idf": {gram: idf}, "oov": 未登录 gram 的 idf, "kw": [关键词, ...]}
+"""
+
+from __future__ import annotations
+
+import math
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import config
+from blank_answers import fuzzy_key
+from models import Question
+
+SHORT_AUTO_SCORE = getattr(config, "SHORT_AUTO_SCORE", True)
+SHORT_PASS_SCORE = getattr(config, "SHORT_PASS_SCORE", 0.5)
+
+# 评分权重
+SIMILARITY_WEIGHT = 0.6
+COVERAGE_WEIGHT = 0.4
+# 每道题最多取几个关键词
+MAX_KEYWORDS = 8
+
+
+def char_ngrams(text: str) -> Counter:
+    """归一化后的字符 1-gram 和 2-gram 计数。"""
+    s = fuzzy_key(text)
+    grams = Counter(s)
+    grams.update(s[i:i + 2] for i in range(len(s) - 1))
+    return grams
+
+
+def _build_ref(tf: Counter, idf: Dict[str, float], oov: float) -> Dict[str, Any]:
+    weights = {g: n * idf.get(g, oov) for g, n in tf.items()}
+    norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+    bigrams = sorted((g for g in weights if len(g) == 2), key=lambda g: (-weights[g], g))
+    return {
+        "w": {g: round(w / norm, 4) for g, w in weights.items()},
+        "idf": {g: round(idf.get(g, oov), 4) for g in tf},
+        "oov": round(oov, 4),
+        "kw": bigrams[:MAX_KEYWORDS],
+    }
+
+
+def attach_short_refs(questions: Iterable[Question]) -> int:
+    """
+    为题库里所有有参考答案的简答题计算参考向量（写入 q.short_ref），返回处理的题数。
+    IDF 用整个题库的简答题参考答案作语料：idf = ln((1 + N) / (1 + df)) + 1。
+    """
+    shorts = [q for q in questions if q.q_type == config.QTYPE_SHORT and q.answer.strip()]
+    if not shorts:
+        return 0
+    tfs = [char_ngrams(q.answer) for q in shorts]
+    df: Counter = Counter()
+    for tf in tfs:
+        df.update(tf.keys())
+    n = len(shorts)
+    idf = {g: math.log((1 + n) / (1 + c)) + 1.0 for g, c in df.items()}
+    oov = math.log(1 + n) + 1.0
+    for q, tf in zip(shorts, tfs):
+        q.short_ref = _build_ref(tf, idf, oov)
+    return n
+
+
+def short_ref_of(question: Question) -> Dict[str, Any]:
+    """取题目的参考向量；没有预先算好时按 IDF = 1 现算一次并缓存在题目上。"""
+    if not question.short_ref and question.answer.strip():
+        tf = char_ngrams(question.answer)
+        question.short_ref = _build_ref(tf, {}, 1.0)
+    return question.short_ref
+
+
+@dataclass
+class ShortScore:
+    similarity: float
+    coverage: float
+    score: float
+    passed: bool
+
+    def summary(self) -> str:
+        verdict = "基本答到要点" if self.passed else "与参考答案差距较大"
+        return (
+            f"参考得分 {self.score * 100:.0f} 分（相似度 {self.similarity:.2f} · "
+            f"要点覆盖 {self.coverage:.0%}）：{verdict}，仅供自评参考"
+        )
+
+
+def score_with_ref(ref: Dict[str, Any], user_raw: str, pass_score: Optional[float] = None) -> ShortScore:
+    weights: Dict[str, float] = ref.get("w") or {}
+    tf = char_ngrams(user_raw or "")
+    if not weights or not tf:
+        return ShortScore(0.0, 0.0, 0.0, False)
+
+    idf: Dict[str, float] = ref.get("idf") or {}
+    oov = float(ref.get("oov", 1.0))
+    dot = 0.0
+    norm_sq = 0.0
+    for g, n in tf.items():
+        u = n * idf.get(g, oov)
+        norm_sq += u * u
+        w = weights.get(g)
+        if w is not None:
+            dot += u * w
+    similarity = dot / math.sqrt(norm_sq) if norm_sq > 0 else 0.0
+
+    keywords: List[str] = ref.get("kw") or []
+    coverage = sum(1 for k in keywords if k in tf) / len(keywords) if keywords else similarity
+
+    score = SIMILARITY_WEIGHT * similarity + COVERAGE_WEIGHT * coverage
+    threshold = SHORT_PASS_SCORE if pass_score is None else pass_score
+    return ShortScore(similarity, coverage, score, score >= threshold)
+
+
+def score_short_answer(question: Question, user_raw: str) -> Optional[ShortScore]:
+    """简答题的参考分；不是简答题、没有参考答案或作答为空时返回 None。"""
+    if question.q_type != config.QTYPE_SHORT or not (user_raw or "").strip():
+        return None
+    ref = short_ref_of(question)
+    if not ref:
+        return None
+    return score_with_ref(ref, user_raw)
+
+
+def score_batch(items: List[Tuple[Question, str]]) -> List[Optional[ShortScore]]:
+    """批量评分（例如全班同一道简答题），结果与 items 一一对应。"""
+    return [score_short_answer(q, raw) for q, raw in items]
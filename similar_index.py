@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+similar_index.py
+
+相似题索引：做错一道题后，找出题库里和它最相近的题目来专项练习（“练相似题”）。
+- 每道题取 题干 + 选项 的文本，做与宽松判分相同的归一化，切成字符 1-gram + 2-gram，
+  用 crc32 哈希到 SIMILAR_DIM 维（哈希技巧，不需要维护词表）；
+- 词频取 1 + ln(tf)，再乘以按整个题库算的 IDF，每行单位化，得到 (题数, SIMILAR_DIM) 的
+  float32 矩阵；相似度就是点积（余弦），一次查询是一次矩阵-向量乘法 + argpartition，
+  上万题的题库也只要几毫秒；
+- 以若干道错题为种子时，每道候选题取与各种子相似度的最大值，再取前 k 个；
+- 每个题库（按快照文件的修改时间和大小区分版本）建一次索引：内存里缓存最近用过的几个，
+  磁盘上以 float16 存在 config.SIMILAR_INDEX_DIR/<bank_id>.npz，快照变了自动重建。
+"""
+
+from __future__ import annotations
+
+import os
+import zlib
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import config
+from blank_answers import fuzzy_key
+from dedup import question_text
+from models import Question
+
+SIMILAR_DIM = getattr(config, "SIMILAR_DIM", 512)
+SIMILAR_INDEX_DIR = getattr(
+    config, "SIMILAR_INDEX_DIR", os.path.join(config.BASE_DIR, "data", "similar")
+)
+
+# 内存里最多缓存几个题库的索引
+INDEX_CACHE_SIZE = 4
+
+
+def _feature_ids(text: str, dim: int, orders: Tuple[int, ...]) -> List[int]:
+    s = fuzzy_key(text)
+    grams = [s[i:i + n] for n in orders for i in range(len(s) - n + 1)]
+    return [zlib.crc32(g.encode("utf-8")) % dim for g in grams]
+
+
+def tf_matrix(texts: Sequence[str], dim: int = SIMILAR_DIM, orders: Tuple[int, ...] = (1, 2)) -> np.ndarray:
+    """哈希 n-gram（orders 指定取几元）→ 1 + ln(tf)，返回 float32 矩阵（未乘 IDF、未单位化）。"""
+    n = len(texts)
+    flat: List[int] = []
+    for row, text in enumerate(texts):
+        base = row * dim
+        flat.extend(base + c for c in _feature_ids(text, dim, orders))
+    counts = np.bincount(np.asarray(flat, dtype=np.int64), minlength=n * dim).astype(np.float32)
+    matrix = counts.reshape(n, dim)
+    nz = matrix > 0
+    matrix[nz] = 1.0 + np.log(matrix[nz])
+    return matrix
+
+
+def idf_weights(tf: np.ndarray) -> np.ndarray:
+    """按 tf_matrix 的结果算平滑 IDF。"""
+    n = len(tf)
+    df = (tf > 0).sum(axis=0)
+    return (np.log((1.0 + n) / (1.0 + df)) + 1.0).astype(np.float32)
+
+
+def build_matrix(
+    texts: Sequence[str],
+    dim: int = SIMILAR_DIM,
+    orders: Tuple[int, ...] = (1, 2),
+    idf: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    tf_matrix → 乘 IDF → 行单位化，返回 float32 矩阵。
+    idf 默认按 texts 自身计算；给定时沿用（例如把新题放进已有话题模型的向量空间）。
+    """
+    matrix = tf_matrix(texts, dim, orders)
+    matrix *= idf_weights(matrix) if idf is None else idf
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+class SimilarIndex:
+    def __init__(self, ids: np.ndarray, matrix: np.ndarray, version: Tuple[int, int] = (0, 0)):
+        self.ids = ids
+        self.matrix = matrix
+        self.version = version
+        self._row_of = {int(qid): row for row, qid in enumerate(ids.tolist())}
+
+    @classmethod
+    def build(cls, questions: Sequence[Question], version: Tuple[int, int] = (0, 0)) -> "SimilarIndex":
+        ids = np.asarray([q.id for q in questions], dtype=np.int64)
+        matrix = build_matrix([question_text(q) for q in questions])
+        return cls(ids, matrix, version)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _top_k(self, scores: np.ndarray, k: int, exclude: Iterable[int]) -> List[Tuple[int, float]]:
+        for qid in exclude:
+            row = self._row_of.get(int(qid))
+            if row is not None:
+                scores[row] = -np.inf
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(self.ids[i]), float(scores[i])) for i in top]
+
+    def similar(self, qid: int, k: int = 10) -> List[Tuple[int, float]]:
+        """与某道题最相似的 k 道题：[(题号, 相似度), ...]，不含它自己。"""
+        row = self._row_of.get(int(qid))
+        if row is None:
+            return []
+        scores = self.matrix @ self.matrix[row].astype(np.float32)
+        return self._top_k(scores, k, [qid])
+
+    def similar_to(self, qids: Sequence[int], k: int = 10, exclude: Iterable[int] = ()) -> List[Tuple[int, float]]:
+        """以多道题为种子：每道候选题取与各种子相似度的最大值，返回前 k 个（不含种子本身）。"""
+        rows = [self._row_of[int(q)] for q in qids if int(q) in self._row_of]
+        if not rows:
+            return []
+        scores = (self.matrix[rows] @ self.matrix.T).max(axis=0).astype(np.float32)
+        return self._top_k(scores, k, list(qids) + list(exclude))
+
+    # ---------- 磁盘缓存 ----------
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez(
+            tmp,
+            ids=self.ids,
+            matrix=self.matrix.astype(np.float16),
+            version=np.asarray(self.version, dtype=np.int64),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["SimilarIndex"]:
+        try:
+            with np.load(path) as data:
+                version = tuple(int(v) for v in data["version"])
+                matrix = data["matrix"].astype(np.float32)
+                ids = data["ids"]
+        except (OSError, KeyError, ValueError):
+            return None
+        if matrix.ndim != 2 or matrix.shape[1] != SIMILAR_DIM:
+            return None
+        return cls(ids, matrix, version)  # type: ignore[arg-type]
+
+
+_cache: "OrderedDict[str, SimilarIndex]" = OrderedDict()
+
+
+def _snapshot_version(snapshot_path: Optional[str]) -> Tuple[int, int]:
+    try:
+        st = os.stat(snapshot_path) if snapshot_path else None
+    except OSError:
+        st = None
+    return (st.st_mtime_ns, st.st_size) if st else (0, 0)
+
+
+def index_for_bank(bank_id: str, questions: Sequence[Question], snapshot_path: Optional[str] = None) -> SimilarIndex:
+    """取某个题库的相似题索引：内存缓存 → 磁盘缓存 → 重新构建（并写回磁盘）。"""
+    version = _snapshot_version(snapshot_path)
+    cached = _cache.get(bank_id)
+    if cached is not None and cached.version == version and len(cached) == len(questions):
+        _cache.move_to_end(bank_id)
+        return cached
+
+    path = os.path.join(SIMILAR_INDEX_DIR, f"{bank_id}.npz")
+    index = SimilarIndex.load(path) if version != (0, 0) else None
+    if index is None or index.version != version or len(index) != len(questions):
+        index = SimilarIndex.build(questions, version)
+        if version != (0, 0):
+            try:
+                index.save(path)
+            except OSError:
+                pass
+
+    _cache[bank_id] = index
+    _cache.move_to_end(bank_id)
+    while len(_cache) > INDEX_CACHE_SIZE:
+        _cache.popitem(last=False)
+    return index
@@ -1,13 +1,14 @@
 # -*- coding: utf-8 -*-
 """
 stats_view.py
-负责展示刷题统计信息（从 stats.json 读取）。
+负责展示刷题统计信息（从 stats.json 读取），以及按话题的正确率（从作答历史汇总，见 topics.py）。
 """
 
 from typing import Dict
 
 import config
-from storage import load_stats
+import storage
+from storage import load_history, load_questions_from_file, load_stats
 
 
 def _qtype_label(q_type: str) -> str:
@@ -64,4 +65,23 @@ def show_stats():
             f"正确率：{_format_rate(correct, total)}"
         )
     print("-" * 40)
+    _show_topic_stats()
     print("说明：统计数据是累积的，每次刷题都会叠加。")
+
+
+def _show_topic_stats(limit: int = 10):
+    """当前题库各话题的正确率，正确率低的排前面；没装 NumPy 或没有话题时不显示。"""
+    try:
+        from topics import ensure_topics, topic_stats
+    except ImportError:
+        return
+    questions = load_questions_from_file()
+    ensure_topics(questions, storage.DEFAULT_JSON_PATH)
+    answered = [s for s in topic_stats(questions, load_history()) if s.answered]
+    if not answered:
+        return
+    print("各话题统计（正确率从低到高）：")
+    print("-" * 40)
+    for s in answered[:limit]:
+        print(f"{s.topic:<16} 答题数：{s.answered:<4} 正确数：{s.correct:<4} 正确率：{_format_rate(s.correct, s.answered)}")
+    print("-" * 40)
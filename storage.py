@@ -6,11 +6,17 @@ storage.py
 - 题库：questions.json
 - 错题本：wrong_questions.json
 - 统计信息：stats.json
+- 作答历史：history.jsonl（每答一题追加一行）
+
+错题本 / 统计 / 作答历史的路径属于当前学习者档案，切换档案时由
+profiles.activate 调用 use_profile_paths 改写；题库路径与档案无关。
 
 提供：
 - save_questions_to_file / load_questions_from_file
 - save_wrong_questions / load_wrong_questions
 - load_stats / save_stats / reset_stats
+- append_history / load_history
+- use_profile_paths：切换当前档案的存储路径
 - delete_question_bank：删除题库 + 错题本，并重置统计
 """
 
@@ -34,6 +40,17 @@ WRONG_JSON_PATH = getattr(
 STATS_JSON_PATH = getattr(
     config, "STATS_JSON_PATH", os.path.join(BASE_DIR, "stats.json")
 )
+HISTORY_JSONL_PATH = getattr(
+    config, "HISTORY_JSONL_PATH", os.path.join(BASE_DIR, "history.jsonl")
+)
+
+
+def use_profile_paths(wrong_path: str, stats_path: str, history_path: str) -> None:
+    """切换错题本 / 统计 / 作答历史的默认路径（题库本身不受影响）。"""
+    global WRONG_JSON_PATH, STATS_JSON_PATH, HISTORY_JSONL_PATH
+    WRONG_JSON_PATH = wrong_path
+    STATS_JSON_PATH = stats_path
+    HISTORY_JSONL_PATH = history_path
 
 
 # ========== 通用 JSON 读写 ==========
@@ -145,6 +162,45 @@ def reset_stats(path: str | None = None) -> Dict[str, Any]:
     return stats
 
 
+# ========== 作答历史 ==========
+
+def append_history(records: List[Dict[str, Any]], path: str | None = None) -> None:
+    """
+    追加作答记录，每条一行 JSON，例如：
+    {"ts": 1700000000.0, "qid": 12, "q_type": "single", "correct": true, "mode": "normal"}
+    只追加不重写，答题时的开销与历史长度无关。
+    """
+    if not records:
+        return
+    if path is None:
+        path = HISTORY_JSONL_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for rec in records:
+            f.write(json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def load_history(path: str | None = None) -> List[Dict[str, Any]]:
+    if path is None:
+        path = HISTORY_JSONL_PATH
+    if not os.path.exists(path):
+        return []
+    records: List[Dict[str, Any]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                # 写到一半的最后一行直接跳过
+                continue
+            if isinstance(rec, dict):
+                records.append(rec)
+    return records
+
+
 # ========== 删除题库 ==========
 
 def delete_question_bank() -> None:
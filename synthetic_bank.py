@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+synthetic_bank.py
+
+生成“合成题库”，用于性能基准和压力测试：
+- 不依赖 Word 文件，直接构造 Question 列表；
+- 四种题型按比例混合（单选 / 填空 / 判断 / 简答）；
+- 固定随机种子，保证每次生成的题库完全一致，方便前后对比；
+- synthetic_bank_lines 把题目排成 Word 题库的段落格式（大标题 / 题号 / 选项 / 正确答案），
+  用于解析器基准。
+"""
+
+from __future__ import annotations
+
+import random
+from typing import Iterator, List
+
+import config
+from models import Question
+
+# 题干 / 选项里用到的词汇，拼起来大致像真实题目的长度
+_WORDS = [
+    "线性表", "队列", "栈", "二叉树", "图", "哈希表", "排序", "查找",
+    "时间复杂度", "空间复杂度", "数据元素", "数据项", "存储结构", "逻辑结构",
+    "递归", "链表", "数组", "指针", "结点", "算法",
+]
+
+# 题型比例：单选最多，简答最少（与常见题库分布接近）
+_TYPE_WEIGHTS = [
+    (config.QTYPE_SINGLE, 5),
+    (config.QTYPE_BLANK, 2),
+    (config.QTYPE_TF, 2),
+    (config.QTYPE_SHORT, 1),
+]
+
+
+def _sentence(rng: random.Random, min_words: int, max_words: int) -> str:
+    n = rng.randint(min_words, max_words)
+    return "".join(rng.choice(_WORDS) for _ in range(n))
+
+
+def make_synthetic_questions(count: int, seed: int = 2024) -> List[Question]:
+    """
+    生成 count 道合成题目，题号从 1 开始连续编号。
+    """
+    rng = random.Random(seed)
+    types = [t for t, w in _TYPE_WEIGHTS for _ in range(w)]
+    questions: List[Question] = []
+
+    for i in range(1, count + 1):
+        q_type = rng.choice(types)
+        text = f"{_sentence(rng, 4, 12)}的说法正确的是( )"
+        options = {}
+        answer = ""
+
+        if q_type == config.QTYPE_SINGLE:
+            options = {label: _sentence(rng, 1, 4) for label in "ABCD"}
+            answer = rng.choice("ABCD")
+        elif q_type == config.QTYPE_TF:
+            answer = rng.choice(["正确", "错误"])
+        elif q_type == config.QTYPE_BLANK:
+            answer = _sentence(rng, 1, 2)
+        else:
+            answer = _sentence(rng, 8, 20)
+
+        questions.append(
+            Question(
+                id=i,
+                q_type=q_type,
+                question=text,
+                options=options,
+                answer=answer,
+                source=f"synthetic#Q{i}",
+            )
+        )
+
+    return questions
+
+
+_SECTION_TITLES = [
+    (config.QTYPE_SINGLE, "一、单选题"),
+    (config.QTYPE_BLANK, "二、填空题"),
+    (config.QTYPE_TF, "三、判断题"),
+    (config.QTYPE_SHORT, "四、简答题"),
+]
+
+
+def synthetic_bank_lines(questions: List[Question]) -> Iterator[str]:
+    """
+    按 Word 题库的排版逐行输出（每行对应一个段落），题目按题型分节：
+        一、单选题
+        1、题干
+        A、选项
+        正确答案：A
+    """
+    for q_type, title in _SECTION_TITLES:
+        section = [q for q in questions if q.q_type == q_type]
+        if not section:
+            continue
+        yield f"{title}（共{len(section)}题）"
+        for q in section:
+            yield f"{q.id}、{q.question}"
+            for label, text in q.options.items():
+                yield f"{label}、{text}"
+            yield f"正确答案：{q.answer}"
+            yield ""
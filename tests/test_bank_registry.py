@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""题库登记表：话题每份缓存只补一次，只读题目内容时不算话题、不动 LRU。"""
+
+import sys
+import types
+
+import pytest
+
+from bank_registry import BankRegistry
+from models import Question
+
+
+def _questions(n=3):
+    return [Question(i, "tf", f"第{i}题", {}, "对") for i in range(1, n + 1)]
+
+
+@pytest.fixture
+def topic_calls(monkeypatch):
+    """把 topics 模块换成只记录调用的替身，话题名故意留空串。"""
+    calls = []
+
+    def ensure_topics(questions, source=None):
+        calls.append(source)
+        for q in questions:
+            q.topic = ""
+
+    monkeypatch.setitem(sys.modules, "topics", types.SimpleNamespace(ensure_topics=ensure_topics))
+    return calls
+
+
+@pytest.fixture
+def registry(tmp_path):
+    reg = BankRegistry(json_path=str(tmp_path / "banks.json"), snapshot_dir=str(tmp_path / "banks"), cache_size=1)
+    reg.register(str(tmp_path / "a.docx"), _questions())
+    reg.register(str(tmp_path / "b.docx"), _questions())
+    return reg
+
+
+def test_topics_are_attached_once_per_cached_bank(registry, topic_calls):
+    a, b = (e.bank_id for e in registry.entries)
+    first = registry.questions(b)
+    assert registry.questions(b) is first
+    # 话题名全是空串也不会每次重算
+    assert topic_calls == [registry.get(b).snapshot]
+
+
+def test_raw_reads_skip_topics_and_keep_the_cache(registry, topic_calls):
+    a, b = (e.bank_id for e in registry.entries)
+    cached = registry.questions(b)
+    raw = registry.questions(a, topics=False)
+    assert [q.id for q in raw] == [1, 2, 3]
+    assert topic_calls == [registry.get(b).snapshot]
+    # 读 a 的原始快照没有挤掉缓存里的 b
+    assert registry.questions(b) is cached
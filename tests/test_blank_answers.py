@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""填空题拆空与逐空判分；答案原文取自 questions.docx 里的题目。"""
+
+import pytest
+
+import blank_answers
+from blank_answers import MODE_STRICT, grade_blanks, split_blank_answer, split_user_answer
+from models import Question
+from quiz_engine import _check_answer
+
+# 第 104 题、第 102 题、第 101 题的答案原文
+FIVE_BLANKS = "第1空:确定性 \n第2空:有限性 \n第3空:输入 \n第4空:输出 \n第5空:可行性"
+COMPLEXITY = "第1空:时间复杂度 \n第2空:空间复杂度"
+MAPPING = "第1空:\n顺序映像\n第2空:\n非顺序映像\n第3空:\n顺序存储结构\n第4空:\n链式存储结构"
+
+
+@pytest.mark.parametrize(
+    "answer, user, correct",
+    [
+        (FIVE_BLANKS, "确定性，有限性，输入，输出", [True, True, True, True, False]),
+        (FIVE_BLANKS, "确定性 有限性 输入 输出 可行性", [True] * 5),
+        (FIVE_BLANKS, "确定性、有限性、输出", [True, True, False, False, False]),
+        (COMPLEXITY, "时间复杂度；空间复杂度", [True, True]),
+        (COMPLEXITY, "空间复杂度；时间复杂度", [False, False]),
+        (MAPPING, "顺序映像\n非顺序映像", [True, True, False, False]),
+        (MAPPING, "第1空:顺序映像 第2空:非顺序映像 第3空:顺序存储结构 第4空:链式存储结构", [True] * 4),
+    ],
+)
+def test_partial_credit_is_positional(answer, user, correct):
+    grade = grade_blanks(split_blank_answer(answer), user, mode=MODE_STRICT)
+    assert grade.correct == correct
+    assert grade.score == pytest.approx(sum(correct) / len(correct))
+
+
+def test_split_prefers_closest_count():
+    assert split_user_answer("确定性，有限性，输入，输出", 5) == ["确定性", "有限性", "输入", "输出"]
+    # 两种拆法一样接近时保留强分隔符（分号）的拆法，空格留在空内
+    assert split_user_answer("O(n log n)；O(1)", 3) == ["O(n log n)", "O(1)"]
+    assert split_user_answer("栈", 1) == ["栈"]
+
+
+def _blank(answer):
+    return Question(1, "blank", "____", {}, answer)
+
+
+@pytest.fixture
+def tolerant(monkeypatch):
+    monkeypatch.setattr(blank_answers, "BLANK_MATCH_MODE", blank_answers.MODE_TOLERANT)
+
+
+@pytest.mark.parametrize(
+    "answer, user",
+    [("0.5", "０．５"), ("ABC", "ａｂｃ")],
+)
+def test_strict_mode_is_the_default(answer, user):
+    assert blank_answers.BLANK_MATCH_MODE == MODE_STRICT
+    assert _check_answer(_blank(answer), user)[0] is False
+
+
+@pytest.mark.parametrize(
+    "answer, user",
+    [
+        ("时间复杂度", "空间复杂度"),
+        ("非线性结构", "线性结构"),
+        ("顺序映像", "逆序映像"),
+        ("第1空:顺序映像 第2空:非顺序映像", "非顺序映像；顺序映像"),
+        ("0.5", "05"),
+        ("192.168.1.1", "19216811"),
+        ("1:2", "12"),
+    ],
+)
+def test_tolerant_mode_rejects_meaning_changes(tolerant, answer, user):
+    assert _check_answer(_blank(answer), user)[0] is False
+
+
+@pytest.mark.parametrize(
+    "answer, user",
+    [
+        ("0.5", "０．５"),
+        ("192.168.1.1", "192.168.1.1。"),
+        ("ABC", "ａｂｃ"),
+        ("顺序映像", "顺序映像。"),
+        ("第1空:时间复杂度 第2空:空间复杂度", "时间复杂度，空间复杂度"),
+    ],
+)
+def test_tolerant_mode_folds_width_case_and_punctuation(tolerant, answer, user):
+    assert _check_answer(_blank(answer), user)[0] is True
+
+
+def test_typos_are_not_tolerated_by_default(tolerant):
+    assert _check_answer(_blank("链式存储结构"), "链式存贮结构")[0] is False
+
+
+@pytest.fixture
+def typo_tolerance(tolerant, monkeypatch):
+    monkeypatch.setattr(blank_answers, "BLANK_TYPO_TOLERANCE", True)
+    blank_answers._fuzzy_keys.cache_clear()
+    yield
+    blank_answers._fuzzy_keys.cache_clear()
+
+
+@pytest.mark.parametrize(
+    "answer, user, ok",
+    [
+        ("链式存储结构", "链式存贮结构", True),
+        ("链式存储结构", "非链式存储结构", False),
+        ("时间复杂度分析", "空间复杂度分析", False),
+        ("非顺序存储结构", "顺序存储结构", False),
+        # 太短的答案不容忍笔误
+        ("时间复杂度", "时问复杂度", False),
+        ("第1空:顺序存储结构 第2空:链式存储结构", "顺序存储结构；链式存贮结构", True),
+    ],
+)
+def test_opt_in_typo_tolerance_guards_polarity(typo_tolerance, answer, user, ok):
+    assert _check_answer(_blank(answer), user)[0] is ok
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""判分队列：答题卡结果带部分分；写入失败时会话不算结束，可以重新交卷。"""
+
+import asyncio
+
+import pytest
+
+from grading_queue import GradingQueue
+from models import Question
+from session_store import CompactSession
+
+COMPLEXITY = "第1空:时间复杂度 \n第2空:空间复杂度"
+
+
+def _bank():
+    return [
+        Question(1, "blank", "算法分析主要分析____和____", {}, COMPLEXITY),
+        Question(2, "tf", "队列是先进先出的", {}, "对"),
+    ]
+
+
+def _grade(persist, answers, finish=True):
+    async def main():
+        queue = GradingQueue(_bank(), persist, linger=0)
+        queue.start()
+        try:
+            session = CompactSession("s", "甲", "normal", [0, 1])
+            try:
+                results = await queue.submit(session, answers, finish)
+            except RuntimeError:
+                results = None
+            return session, results
+        finally:
+            await queue.stop()
+
+    return asyncio.run(main())
+
+
+def test_answer_sheet_keeps_blank_partial_credit():
+    async def persist(sessions):
+        pass
+
+    session, results = _grade(persist, [(0, "时间复杂度；瞎写"), (1, "对")])
+    blank, tf = results
+    assert blank["correct"] is False
+    assert blank["blanks"] == [True, False] and blank["score"] == pytest.approx(0.5)
+    assert tf["correct"] is True and "blanks" not in tf
+    assert session.finished
+
+
+def test_failed_persist_leaves_session_unfinished():
+    async def persist(sessions):
+        raise RuntimeError("磁盘满了")
+
+    session, results = _grade(persist, [(1, "对")])
+    assert results is None
+    # 错题本 / 统计没写进去：会话仍未结束，客户端可以重新 /finish
+    assert not session.finished
+    assert session.status_of(1) == "correct"
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""Markdown 题库与同一份纯文本题库解析结果一致：只剥 Markdown 排版，不动题目内容。"""
+
+from importers import parse_bank_file
+
+TEXT = """一、单选题
+1、表达式 2*3*4 的值是
+A、24
+B、234
+正确答案：A
+二、填空题
+2、变量 max_len 保存顺序表的____
+正确答案：最大长度
+三、判断题
+3、栈是后进先出的线性表
+正确答案：对
+"""
+
+MARKDOWN = """# 一、单选题
+1、表达式 2*3*4 的值是
+- A、24
+- B、234
+**正确答案：A**
+## 二、填空题
+> 2、变量 max_len 保存顺序表的____
+正确答案：`最大长度`
+```
+代码块里的内容整体忽略
+```
+### 三、判断题
+3、*栈*是__后进先出__的线性表
+正确答案：对
+"""
+
+
+def _parse(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(content, encoding="utf-8")
+    return [q.to_dict() for q in parse_bank_file(str(path))]
+
+
+def test_markdown_matches_plain_text(tmp_path):
+    plain = _parse(tmp_path, "bank.txt", TEXT)
+    md = _parse(tmp_path, "bank.md", MARKDOWN)
+    assert len(plain) == 3
+    assert md == plain
+    assert "2*3*4" in plain[0]["question"]
+    assert "max_len" in plain[1]["question"] and "____" in plain[1]["question"]
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""题目难度统计的后台重算：失败写进 quiz.item_stats 日志并记下原因，成功后清除。"""
+
+import logging
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import item_stats
+
+
+def test_background_refresh_failure_is_logged(monkeypatch, caplog):
+    def broken(bank_id):
+        raise OSError("历史文件读不了")
+
+    monkeypatch.setattr(item_stats, "compute_item_stats", broken)
+    with caplog.at_level(logging.INFO, logger="quiz.item_stats"):
+        assert item_stats.refresh_in_background("b_fail")
+        item_stats._refreshing["b_fail"].join(timeout=5)
+
+    assert item_stats.refresh_error("b_fail") == "历史文件读不了"
+    assert any(r.levelno == logging.ERROR and r.exc_info for r in caplog.records)
+
+    monkeypatch.setattr(item_stats, "compute_item_stats", lambda bank_id: {})
+    item_stats._refresh("b_fail")
+    assert item_stats.refresh_error("b_fail") is None
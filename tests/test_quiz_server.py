@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""quiz_server 的回环测试：在 127.0.0.1 的随机端口上起服务，用原始 HTTP 请求走完整流程。"""
+
+import asyncio
+import json
+
+import pytest
+
+import profiles
+import storage
+from models import Question
+from quiz_server import QuizServer
+from session_store import SessionStore
+
+
+def _bank():
+    return [
+        Question(1, "single", "栈的特点是", {"A": "先进先出", "B": "后进先出"}, "B"),
+        Question(2, "tf", "队列是先进先出的", {}, "对"),
+        Question(3, "blank", "顺序表的存储结构是____", {}, "顺序映像"),
+    ]
+
+
+PROFILE = "测试"
+BANK_ID = "b0000000001"
+
+
+@pytest.fixture
+def data_paths(tmp_path, monkeypatch):
+    """档案目录指到临时目录，错题本 / 统计不碰项目里的真实文件。"""
+    monkeypatch.setattr(profiles, "PROFILES_DIR", str(tmp_path / "profiles"))
+    return tmp_path
+
+
+def _server(data_paths, bank_id=BANK_ID, **kwargs):
+    store = SessionStore(checkpoint_dir=str(data_paths / "sessions"))
+    return QuizServer(_bank(), store, bank_id=bank_id, profile=PROFILE, **kwargs)
+
+
+async def _raw(port, data: bytes) -> bytes:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(data)
+    await writer.drain()
+    reply = await asyncio.wait_for(reader.read(), timeout=5)
+    writer.close()
+    return reply
+
+
+async def _request(port, method, path, body=None):
+    payload = b"" if body is None else json.dumps(body).encode("utf-8")
+    head = (
+        f"{method} {path} HTTP/1.1\r\nHost: test\r\nConnection: close\r\n"
+        f"Content-Length: {len(payload)}\r\n\r\n"
+    ).encode("latin-1")
+    reply = await _raw(port, head + payload)
+    head, _, body = reply.partition(b"\r\n\r\n")
+    status = int(head.split(b" ")[1]) if head else 0
+    return status, (json.loads(body) if body else None)
+
+
+def _run(data_paths, scenario, bank_id=BANK_ID):
+    async def main():
+        server = _server(data_paths, bank_id)
+        await server.start("127.0.0.1", 0)
+        try:
+            return await scenario(server.port)
+        finally:
+            await server.close()
+
+    return asyncio.run(main())
+
+
+def test_session_lifecycle(data_paths):
+    async def scenario(port):
+        status, created = await _request(port, "POST", "/sessions", {"learner": "甲", "count": 3})
+        assert status == 201 and created["total"] == 3
+        sid = created["session_id"]
+
+        status, info = await _request(port, "GET", f"/sessions/{sid}")
+        assert status == 200 and info["answered"] == 0
+
+        wrong_ids = []
+        for idx in range(3):
+            status, item = await _request(port, "GET", f"/sessions/{sid}/questions/{idx}")
+            assert status == 200
+            assert "answer" not in item["question"]
+            status, graded = await _request(port, "POST", f"/sessions/{sid}/answers", {"index": idx, "answer": "瞎写"})
+            assert status == 200 and graded["correct"] is False
+            wrong_ids.append(item["question"]["id"])
+
+        status, again = await _request(port, "POST", f"/sessions/{sid}/answers", {"index": 0, "answer": "B"})
+        assert status == 409
+
+        status, summary = await _request(port, "POST", f"/sessions/{sid}/finish")
+        assert status == 200 and summary["finished"] and summary["wrong"] == 3
+
+        status, results = await _request(port, "GET", "/results")
+        assert status == 200 and len(results["results"]) == 1
+        return wrong_ids
+
+    wrong_ids = _run(data_paths, scenario)
+    profile = profiles.get_profile(PROFILE, BANK_ID)
+    saved = {q.id for q in storage.load_wrong_questions(profile.wrong_path)}
+    assert saved == set(wrong_ids)
+    assert storage.load_stats(profile.stats_path)["total_answered"] == 3
+
+
+def test_wrong_book_is_scoped_per_bank(data_paths):
+    async def finish_all_wrong(port):
+        _, created = await _request(port, "POST", "/sessions", {"count": 3})
+        sid = created["session_id"]
+        for idx in range(3):
+            await _request(port, "POST", f"/sessions/{sid}/answers", {"index": idx, "answer": "瞎写"})
+        await _request(port, "POST", f"/sessions/{sid}/finish")
+
+    async def wrong_session(port):
+        return await _request(port, "POST", "/sessions", {"mode": "wrong", "count": 3})
+
+    _run(data_paths, finish_all_wrong, bank_id="b_one")
+    assert _run(data_paths, wrong_session, bank_id="b_one")[0] == 201
+    # 另一个题库的错题本仍是空的，题号相同也不会串
+    assert _run(data_paths, wrong_session, bank_id="b_two")[0] == 409
+    assert storage.load_wrong_questions(profiles.get_profile(PROFILE, "b_two").wrong_path) == []
+
+
+@pytest.mark.parametrize(
+    "body, status",
+    [
+        ({"q_type": ["x"]}, 400),
+        ({"mode": {"a": 1}}, 400),
+        ({"mode": "exam"}, 400),
+        ({"count": "many"}, 400),
+        ({"q_type": "no-such-type"}, 409),
+    ],
+)
+def test_create_session_rejects_bad_fields(data_paths, body, status):
+    async def scenario(port):
+        return await _request(port, "POST", "/sessions", body)
+
+    got, reply = _run(data_paths, scenario)
+    assert got == status and "error" in reply
+
+
+@pytest.mark.parametrize("length", ["abc", "-5"])
+def test_bad_content_length(data_paths, length):
+    async def scenario(port):
+        return await _raw(port, f"POST /sessions HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode())
+
+    reply = _run(data_paths, scenario)
+    assert reply.startswith(b"HTTP/1.1 400 ")
+
+
+def test_unknown_routes_and_sessions(data_paths):
+    async def scenario(port):
+        return [
+            (await _request(port, "GET", "/nope"))[0],
+            (await _request(port, "DELETE", "/bank"))[0],
+            (await _request(port, "GET", "/sessions/deadbeef"))[0],
+            (await _request(port, "POST", "/sessions", None))[0],
+        ]
+
+    assert _run(data_paths, scenario) == [404, 405, 404, 201]
+
+
+def test_handler_error_becomes_500(data_paths, monkeypatch):
+    def boom(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(QuizServer, "_pick_questions", boom)
+
+    async def scenario(port):
+        first = await _request(port, "POST", "/sessions", {})
+        # 出错之后服务仍然可用
+        second = await _request(port, "GET", "/bank")
+        return first, second
+
+    (status, reply), (status2, _) = _run(data_paths, scenario)
+    assert status == 500 and reply["error"]
+    assert status2 == 200
+
+
+async def _ws_handshake(port, query):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        (
+            f"GET /broadcast?{query} HTTP/1.1\r\nHost: test\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            "Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\nSec-WebSocket-Version: 13\r\n\r\n"
+        ).encode("latin-1")
+    )
+    await writer.drain()
+    status_line = await asyncio.wait_for(reader.readline(), timeout=5)
+    writer.close()
+    return int(status_line.split(b" ")[1])
+
+
+def test_broadcast_teacher_requires_token(data_paths):
+    async def main():
+        server = _server(data_paths, teacher_token="s3cret")
+        await server.start("127.0.0.1", 0)
+        try:
+            return [
+                await _ws_handshake(server.port, "role=teacher"),
+                await _ws_handshake(server.port, "role=teacher&token=guess"),
+                await _ws_handshake(server.port, "role=teacher&token=s3cret"),
+                await _ws_handshake(server.port, "role=student&name=a"),
+            ]
+        finally:
+            # 等断开的广播连接把最后一帧直方图发完
+            await asyncio.sleep(0.3)
+            await server.close()
+
+    assert asyncio.run(main()) == [403, 403, 101, 101]
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""会话存储：淘汰写检查点、再次访问时恢复，已结束的会话不会复活。"""
+
+from session_store import CompactSession, SessionStore
+
+
+def _store(tmp_path):
+    return SessionStore(checkpoint_dir=str(tmp_path), max_resident=1)
+
+
+def _evict_all(store):
+    evicted = store.collect_evictions()
+    store.write_checkpoints(evicted)
+    store.release_pending(evicted)
+    return evicted
+
+
+def test_evicted_session_is_restored_from_checkpoint(tmp_path):
+    store = _store(tmp_path)
+    a = CompactSession("a", "甲", "normal", [3, 1, 2])
+    a.set_status(0, "wrong")
+    a.answers[0] = "B"
+    store.put(a)
+    store.put(CompactSession("b", "乙", "normal", [1]))
+
+    assert [s.session_id for s in _evict_all(store)] == ["a"]
+    assert (tmp_path / "a.json").exists()
+
+    restored = store.get("a")
+    assert restored is not a
+    assert restored.indexes.tolist() == [3, 1, 2]
+    assert restored.status_of(0) == "wrong" and restored.answer_of(0) == "B"
+    assert store.restores == 1
+    # 恢复后检查点立即删除，常驻的这份才是最新的
+    assert not (tmp_path / "a.json").exists()
+
+
+def test_finished_session_is_not_resurrected(tmp_path):
+    store = _store(tmp_path)
+    store.put(CompactSession("a", "甲", "normal", [1, 2]))
+    store.put(CompactSession("b", "乙", "normal", [1]))
+    _evict_all(store)
+
+    a = store.get("a")
+    a.finished = True
+    store.touch(a)
+    # 把 a 挤出常驻区：已结束的会话直接丢弃，不留检查点
+    store.get("b")
+    _evict_all(store)
+
+    assert store.get("a") is None
+    assert not (tmp_path / "a.json").exists()
+
+
+def test_checkpoint_written_after_restore_is_dropped(tmp_path):
+    store = _store(tmp_path)
+    store.put(CompactSession("a", "甲", "normal", [1]))
+    store.put(CompactSession("b", "乙", "normal", [1]))
+    evicted = store.collect_evictions()
+    # 检查点还在写的时候会话又被访问
+    a = store.get("a")
+    store.write_checkpoints(evicted)
+    store.release_pending(evicted)
+
+    assert a.session_id == "a"
+    assert not (tmp_path / "a.json").exists()
+
+
+def test_drop_checkpoint_after_finish(tmp_path):
+    store = _store(tmp_path)
+    session = CompactSession("a", "甲", "normal", [1])
+    store.write_checkpoints([session])
+    store.drop_checkpoint("a")
+    assert store.get("a") is None
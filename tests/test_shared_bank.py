@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""共享内存题库：工作进程读到的题目与主进程一致，判分和简答参考分也一致。"""
+
+import pytest
+
+from blank_answers import split_blank_answer
+from models import Question
+from quiz_engine import _check_answer, grade_details
+from shared_bank import SharedBank
+from short_answer import attach_short_refs
+
+
+def _bank():
+    questions = [
+        Question(1, "short", "简述栈的特点", {}, "栈是后进先出的线性表，只能在栈顶插入和删除"),
+        Question(2, "short", "简述队列的特点", {}, "队列是先进先出的线性表，在队尾插入、队头删除"),
+        Question(3, "short", "什么是顺序存储", {}, "用一组地址连续的存储单元依次存放线性表的元素"),
+        Question(4, "blank", "算法分析主要分析____和____", {}, "第1空:时间复杂度 \n第2空:空间复杂度"),
+        Question(5, "single", "栈的特点是", {"A": "先进先出", "B": "后进先出"}, "B", topic="栈"),
+    ]
+    attach_short_refs(questions)
+    questions[3].blanks = split_blank_answer(questions[3].answer)
+    return questions
+
+
+@pytest.fixture
+def shared():
+    bank = SharedBank.create(_bank())
+    worker = SharedBank.attach(bank.name)
+    yield worker
+    worker.close()
+    bank.close()
+    bank.unlink()
+
+
+def test_shared_copy_keeps_precomputed_fields(shared):
+    for original, copy in zip(_bank(), shared):
+        assert copy.to_dict() == original.to_dict()
+
+
+@pytest.mark.parametrize(
+    "i, user",
+    [
+        (0, "栈是后进先出的表"),
+        (1, "先进先出，队尾插入"),
+        (2, "连续的存储单元"),
+        (3, "时间复杂度；瞎写"),
+        (4, "B"),
+    ],
+)
+def test_worker_grading_matches_single_process(shared, i, user):
+    original = _bank()[i]
+    copy = shared[i]
+    assert _check_answer(copy, user) == _check_answer(original, user)
+    assert grade_details(copy, user) == grade_details(original, user)
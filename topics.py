@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+"""
+topics.py
+
+题库的话题聚类（无监督）：题库只有“单选 / 填空 / 判断 / 简答”这样的题型分节，没有章节和知识点标签，
+这里按题目内容自动分成若干话题，用于按话题均衡抽题和按话题统计正确率：
+- 每道题取 题干 + 选项 的文本，做与宽松判分相同的归一化，切成字符 2-gram，
+  哈希成 TF-IDF 向量并单位化（与 similar_index.py 相同的做法，只取 2-gram）；
+- 用 NumPy 的小批量 k-means（mini-batch k-means）聚类：k-means++ 选初始中心，
+  每批随机取 TOPIC_BATCH 道题，按“中心被分到的累计题数”递减学习率更新中心，中心保持单位长度
+  （相当于按余弦相似度聚类）；空簇用离自己中心最远的题重新播种；
+  中心移动足够小时提前停止，几千题的题库一般几十毫秒；
+- 话题数默认按题量自动取 √(题数 / 2)（2 ~ TOPIC_MAX_COUNT 个），也可以在 config.TOPIC_COUNT 里固定；
+- 话题名取簇内最有区分度的两个 2-gram（簇内出现比例 × IDF），再扩展成簇里常连着出现的
+  更长片段，例如 "平均查找长度·关键字"；
+- 聚类不在解析 / 导入的路径上，而是题库载入时的一步（ensure_topics，由 bank_registry、
+  quiz_server 和命令行 / Tk 版载入题库后调用），结果写进内存里的 Question.topic；
+- 按题库快照缓存话题模型（IDF、各簇中心、话题名、每道题文本指纹 → 话题）到
+  config.TOPIC_CACHE_DIR/<快照路径指纹>.npz：再次载入时按指纹直接取话题；重新导入后新增或改过的题
+  用缓存的 IDF 和中心做一次矩阵乘法就近归入已有话题；累计新归入的题超过拟合时题量的
+  TOPIC_REFIT_RATIO 时才整体重新聚类。
+
+话题结果用于：
+- quiz_engine.balanced_sample：按话题轮流抽题（config.TOPIC_BALANCED_SAMPLING）；
+- topic_stats：结合作答历史（history.jsonl）按话题统计正确率。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+import config
+from blank_answers import fuzzy_key
+from dedup import question_text
+from models import Question
+from similar_index import SIMILAR_DIM, build_matrix, idf_weights, tf_matrix
+
+TOPIC_COUNT = getattr(config, "TOPIC_COUNT", 0)
+TOPIC_MAX_COUNT = getattr(config, "TOPIC_MAX_COUNT", 24)
+TOPIC_CACHE_DIR = getattr(config, "TOPIC_CACHE_DIR", os.path.join(config.BASE_DIR, "data", "topics"))
+TOPIC_REFIT_RATIO = getattr(config, "TOPIC_REFIT_RATIO", 0.2)
+
+# 题目太少时不分话题
+MIN_QUESTIONS = 8
+TOPIC_BATCH = 256
+MAX_ITERS = 200
+# 中心平均移动量小于这个值就停止
+TOLERANCE = 1e-4
+_SEED = 20240918
+# 起话题名时每个簇最多看多少道题；2-gram 扩展成长片段要求的出现比例
+LABEL_SAMPLE = 200
+EXTEND_RATIO = 0.8
+
+# 话题名只用“像词”的片段：全是汉字 / 字母 / 数字
+_WORDLIKE_RE = re.compile(r"^[0-9a-z一-鿿]+$")
+# 题干里到处都是的套话，不适合当话题名
+_LABEL_STOPWORDS = {
+    "下列", "以下", "正确", "错误", "说法", "描述", "叙述", "选项", "哪个", "哪些", "其中",
+    "可以", "属于", "一个", "什么", "不是", "的是", "是指", "称为", "为了", "进行", "使用",
+}
+
+
+def auto_topic_count(n: int) -> int:
+    if TOPIC_COUNT:
+        return max(1, min(int(TOPIC_COUNT), n))
+    return max(2, min(TOPIC_MAX_COUNT, round(math.sqrt(n / 2))))
+
+
+def _normalize_rows(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return m / norms
+
+
+def _kmeans_pp(x: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """k-means++ 初始化（余弦距离 1 - x·c）。"""
+    n = len(x)
+    centers = [int(rng.integers(n))]
+    dist = 1.0 - x @ x[centers[0]]
+    for _ in range(1, k):
+        d = np.clip(dist, 0.0, None)
+        total = float(d.sum())
+        nxt = int(rng.choice(n, p=d / total)) if total > 0 else int(rng.integers(n))
+        centers.append(nxt)
+        dist = np.minimum(dist, 1.0 - x @ x[nxt])
+    return x[centers].copy()
+
+
+class MiniBatchKMeans:
+    """球面小批量 k-means：中心单位长度，按余弦相似度分配。"""
+
+    def __init__(self, k: int, seed: int = _SEED):
+        self.k = k
+        self.rng = np.random.default_rng(seed)
+        self.centers: Optional[np.ndarray] = None
+        self.counts = np.zeros(k, dtype=np.float64)
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        return np.argmax(x @ self.centers.T, axis=1)
+
+    def partial_fit(self, batch: np.ndarray) -> float:
+        """用一批样本更新中心，返回中心的平均移动量。"""
+        if self.centers is None:
+            self.centers = _kmeans_pp(batch, self.k, self.rng)
+        labels = self.predict(batch)
+        m = np.bincount(labels, minlength=self.k).astype(np.float64)
+        sums = np.zeros_like(self.centers)
+        np.add.at(sums, labels, batch)
+        hit = m > 0
+        self.counts += m
+        # 每个中心的学习率 = 本批分到的题数 / 累计题数，等价于逐个样本的 1/count 更新
+        eta = np.zeros(self.k)
+        eta[hit] = m[hit] / self.counts[hit]
+        means = np.zeros_like(self.centers)
+        means[hit] = sums[hit] / m[hit, None]
+        old = self.centers
+        new = old * (1.0 - eta)[:, None].astype(np.float32) + means * eta[:, None].astype(np.float32)
+        self.centers = _normalize_rows(new).astype(np.float32)
+        return float(np.abs(self.centers - old).sum(axis=1).mean())
+
+    def fit(self, x: np.ndarray) -> np.ndarray:
+        n = len(x)
+        batch = min(TOPIC_BATCH, n)
+        self.centers = _kmeans_pp(x[self.rng.choice(n, size=min(n, 20 * self.k), replace=False)], self.k, self.rng)
+        for _ in range(MAX_ITERS):
+            idx = self.rng.choice(n, size=batch, replace=False)
+            if self.partial_fit(x[idx]) < TOLERANCE:
+                break
+        self._reseed_empty(x)
+        return self.predict(x)
+
+    def _reseed_empty(self, x: np.ndarray):
+        """没有分到任何题的中心，换成离自己中心最远的题。"""
+        for _ in range(self.k):
+            labels = self.predict(x)
+            sizes = np.bincount(labels, minlength=self.k)
+            empty = np.flatnonzero(sizes == 0)
+            if not len(empty):
+                return
+            sim = (x * self.centers[labels]).sum(axis=1)
+            sim[sizes[labels] <= 1] = np.inf  # 别把单题簇唯一的题挖走
+            self.centers[empty[0]] = x[int(np.argmin(sim))]
+
+
+def _wordlike_grams(text: str, sizes: Sequence[int]) -> set:
+    s = fuzzy_key(text)
+    return {
+        g for n in sizes for g in (s[i:i + n] for i in range(len(s) - n + 1))
+        if _WORDLIKE_RE.match(g) and not g.isdigit()
+    }
+
+
+def _topic_labels(texts: Sequence[str], labels: np.ndarray, k: int) -> List[str]:
+    """
+    每个簇取两个最有区分度的 2-gram（簇内出现比例 × IDF，不共用字）当名字，
+    再把每个 2-gram 扩展成簇里几乎总是连着出现的更长片段（"均查" → "平均查找长度"）；重名时加编号。
+    每个簇只看前 LABEL_SAMPLE 道题，IDF 也只在这些题上算。
+    """
+    samples = [np.flatnonzero(labels == c)[:LABEL_SAMPLE] for c in range(k)]
+    bigrams = {int(i): _wordlike_grams(texts[i], (2,)) - _LABEL_STOPWORDS for m in samples for i in m}
+    df: Counter = Counter()
+    for g in bigrams.values():
+        df.update(g)
+    n = len(bigrams)
+    names: List[str] = []
+    for c, members in enumerate(samples):
+        if not len(members):
+            names.append("")
+            continue
+        cdf: Counter = Counter()
+        longer: Counter = Counter()
+        for i in members:
+            cdf.update(bigrams[i])
+            longer.update(_wordlike_grams(texts[i], (3, 4, 5, 6)))
+        scored = sorted(cdf, key=lambda g: (-(cdf[g] / len(members)) * math.log(n / df[g]), g))
+        picked: List[str] = []
+        for g in scored:
+            if len(picked) == 2:
+                break
+            extended = [h for h in longer if g in h and longer[h] >= EXTEND_RATIO * cdf[g]]
+            g = max(extended, key=lambda h: (len(h), longer[h], h), default=g)
+            if not any(set(g) & set(p) for p in picked):
+                picked.append(g)
+        name = "·".join(picked) or f"话题{c + 1}"
+        if name in names:
+            name = f"{name}#{c + 1}"
+        names.append(name)
+    return names
+
+
+def _text_keys(texts: Sequence[str]) -> np.ndarray:
+    """每道题文本的 64 位指纹，用来认出重新导入后没变的题。"""
+    return np.asarray(
+        [int.from_bytes(hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest(), "little", signed=True) for t in texts],
+        dtype=np.int64,
+    )
+
+
+class TopicModel:
+    """一个题库的话题模型：IDF、簇中心、话题名，以及已归类题目的文本指纹 → 簇号。"""
+
+    def __init__(self, idf: np.ndarray, centers: np.ndarray, names: List[str], keys: Dict[int, int], fitted: int, added: int = 0):
+        self.idf = idf
+        self.centers = centers
+        self.names = names
+        self.keys = keys
+        # 整体聚类时的题量、之后累计就近归入的题数（判断是否需要重新聚类）
+        self.fitted = fitted
+        self.added = added
+
+    @classmethod
+    def fit(cls, texts: Sequence[str], keys: np.ndarray, k: Optional[int] = None) -> "TopicModel":
+        """整体聚类；固定随机种子，同一份题库每次得到相同的话题。"""
+        n = len(texts)
+        k = min(k or auto_topic_count(n), n)
+        tf = tf_matrix(texts, SIMILAR_DIM, orders=(2,))
+        idf = idf_weights(tf)
+        x = _normalize_rows(tf * idf).astype(np.float32)
+        kmeans = MiniBatchKMeans(k)
+        labels = kmeans.fit(x)
+        names = _topic_labels(texts, labels, k)
+        return cls(idf, kmeans.centers, names, dict(zip(keys.tolist(), labels.tolist())), n)
+
+    def labels_for(self, texts: Sequence[str], keys: np.ndarray) -> np.ndarray:
+        """已知指纹直接取簇号；新题按缓存的 IDF 向量化后归入最近的中心，并记进模型。"""
+        labels = np.asarray([self.keys.get(key, -1) for key in keys.tolist()], dtype=np.int64)
+        new = np.flatnonzero(labels < 0)
+        if len(new):
+            x = build_matrix([texts[i] for i in new], SIMILAR_DIM, orders=(2,), idf=self.idf)
+            labels[new] = np.argmax(x @ self.centers.T, axis=1)
+            self.keys.update(zip(keys[new].tolist(), labels[new].tolist()))
+            self.added += len(new)
+        return labels
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez(
+            tmp,
+            idf=self.idf,
+            centers=self.centers,
+            names=np.asarray(self.names, dtype=str),
+            key_ids=np.fromiter(self.keys.keys(), dtype=np.int64, count=len(self.keys)),
+            key_labels=np.fromiter(self.keys.values(), dtype=np.int64, count=len(self.keys)),
+            counts=np.asarray([self.fitted, self.added], dtype=np.int64),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["TopicModel"]:
+        try:
+            with np.load(path) as data:
+                idf = data["idf"]
+                centers = data["centers"]
+                names = [str(name) for name in data["names"]]
+                keys = dict(zip(data["key_ids"].tolist(), data["key_labels"].tolist()))
+                fitted, added = (int(v) for v in data["counts"])
+        except (OSError, KeyError, ValueError):
+            return None
+        if idf.shape != (SIMILAR_DIM,) or centers.ndim != 2 or centers.shape != (len(names), SIMILAR_DIM):
+            return None
+        return cls(idf, centers, names, keys, fitted, added)
+
+
+def _model_path(source: str) -> str:
+    norm = os.path.normcase(os.path.abspath(source))
+    return os.path.join(TOPIC_CACHE_DIR, hashlib.sha1(norm.encode("utf-8")).hexdigest()[:12] + ".npz")
+
+
+def _apply(questions: Sequence[Question], labels: np.ndarray, names: List[str]):
+    for q, c in zip(questions, labels.tolist()):
+        q.topic = names[c]
+
+
+def attach_topics(questions: Sequence[Question], k: Optional[int] = None) -> int:
+    """给整个题库重新聚类并写入 q.topic（不读写缓存），返回话题数（题太少时为 0，不写）。"""
+    if len(questions) < MIN_QUESTIONS:
+        return 0
+    texts = [question_text(q) for q in questions]
+    keys = _text_keys(texts)
+    model = TopicModel.fit(texts, keys, k)
+    _apply(questions, model.labels_for(texts, keys), model.names)
+    return len(set(model.names) - {""})
+
+
+def ensure_topics(questions: Sequence[Question], source: Optional[str] = None) -> None:
+    """
+    题库载入后补上话题（只改内存里的题目对象；已经都有话题时什么也不做）。
+    source 是题库快照路径，用作话题模型缓存的键；为 None 时不缓存，每次整体聚类。
+    """
+    if len(questions) < MIN_QUESTIONS or all(q.topic for q in questions):
+        return
+    texts = [question_text(q) for q in questions]
+    keys = _text_keys(texts)
+    path = _model_path(source) if source else None
+    model = TopicModel.load(path) if path else None
+    if model is not None:
+        unseen = sum(1 for key in keys.tolist() if key not in model.keys)
+        if model.added + unseen <= TOPIC_REFIT_RATIO * model.fitted:
+            labels = model.labels_for(texts, keys)
+            if unseen and path:
+                _save_quietly(model, path)
+            _apply(questions, labels, model.names)
+            return
+    # 没有缓存，或新题太多（话题分布可能已经变了）：整体重新聚类
+    model = TopicModel.fit(texts, keys)
+    if path:
+        _save_quietly(model, path)
+    _apply(questions, model.labels_for(texts, keys), model.names)
+
+
+def _save_quietly(model: TopicModel, path: str):
+    try:
+        model.save(path)
+    except OSError:
+        # 缓存写不进去只是下次多算一遍
+        pass
+
+
+@dataclass
+class TopicStat:
+    topic: str
+    questions: int
+    answered: int = 0
+    correct: int = 0
+
+    @property
+    def rate(self) -> float:
+        return self.correct / self.answered if self.answered else 0.0
+
+
+def topic_stats(
+    questions: Iterable[Question],
+    history: Iterable[Dict[str, Any]],
+    bank_id: Optional[str] = None,
+) -> List[TopicStat]:
+    """
+    按话题汇总作答历史：每个话题的题数、作答次数、答对次数，按正确率从低到高排序
+    （没答过的话题排在最后）。bank_id 给定时只统计这个题库的记录。
+    """
+    topic_of: Dict[int, str] = {}
+    result: Dict[str, TopicStat] = {}
+    for q in questions:
+        if not q.topic:
+            continue
+        topic_of[q.id] = q.topic
+        stat = result.setdefault(q.topic, TopicStat(q.topic, 0))
+        stat.questions += 1
+    for rec in history:
+        if bank_id is not None and rec.get("bank", bank_id) != bank_id:
+            continue
+        topic = topic_of.get(rec.get("qid"))
+        if topic is None:
+            continue
+        stat = result[topic]
+        stat.answered += 1
+        stat.correct += 1 if rec.get("correct") else 0
+    return sorted(result.values(), key=lambda s: (s.answered == 0, s.rate, s.topic))